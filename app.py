@@ -8,7 +8,6 @@ To run: streamlit run app.py
 """
 
 import streamlit as st
-import pandas as pd
 from src.authentication import authenticate
 from constants import Constants
 
@@ -5,6 +5,7 @@ This module defines all constant values used throughout the application includin
 column names, file paths, color schemes, and navigation configuration.
 """
 
+import os
 import streamlit as st
 from typing import List
 
@@ -22,9 +23,26 @@ class Constants:
         DATAPATH (str): Base path for input data files.
         COLUMN_NAMES (List[str]): Expected column names for portfolio files.
         NON_NULLABLE_COLUMNS (List[str]): Columns that must not contain null values.
+        BUSINESS_RULES (List[dict]): Declarative cross-column rules every bill must satisfy.
+        DUPLICATE_KEY_COLUMNS (List[str]): Columns that together identify a bill; rows sharing them are duplicates.
+        BUILDING_KEY_COLUMN (str): In-memory categorical column holding the canonical building key.
         TIMESERIES_PATH (str): Path for time series database files.
         EXPORT_PATH (str): Path for exported files.
         MASTERFILE_PATH (str): Path for master files.
+        CACHE_PATH (str): Path for persistent caches (parsed uploads, indexes).
+        UPLOAD_WORKERS (int): Worker pool size for batch uploads.
+        VALIDATION_WORKERS (int): Thread pool size for concurrent validation stages.
+        STARTUP_TIME_BUDGET (float): Maximum cold import time in seconds before the
+            startup profiler reports a regression.
+        PORTFOLIO_STORE_MAX_ENTRIES (int): Number of distinct portfolio frames kept
+            in the process-wide portfolio store.
+        VALIDATION_CHUNK_ROWS (int): Rows read per chunk by the streaming validator.
+        SEARCH_TOP_K (int): Maximum number of options the search bar shows, both
+            for a query and before anything is typed.
+        ACTIVITY_WINDOW_MONTHS (int): Months looked back to flag intermittently
+            billed supplies in the Comparison tab.
+        BILLING_CYCLE_MONTHS (int): Months between two bills of a supply; a supply
+            billed this many months ago is expected in the current month.
         BACKGROUND_COLOR (str): Hex color code for UI background.
         PRIMARY_COLOR (str): Hex color code for primary UI elements.
         DONUT_COLORING (List[str]): RGB color palette for donut charts.
@@ -110,12 +128,93 @@ class Constants:
         'ΤΥΠΟΣ ΛΟΓΑΡΙΑΣΜΟΥ'
     ]
     
+    # Each rule is compiled into one vectorised column expression (see
+    # src.validation_engine). Supported checks:
+    #   less_equal: columns[0] <= columns[1]
+    #   sum_equals: sum(columns) == target, within tolerance
+    #   rate:       sum(columns) * rate == target, within tolerance
+    # Rows where a compared value is missing are not checked (the mandatory
+    # column check reports those). "error" rules fail the file, "warning"
+    # rules are only reported.
+    BUSINESS_RULES = [
+        {
+            'name': 'period_order',
+            'description': 'Consumption period starts after it ends',
+            'check': 'less_equal',
+            'columns': ['ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΑΠΌ', 'ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΕΩΣ'],
+            'severity': 'error',
+        },
+        {
+            'name': 'meter_reading_order',
+            'description': 'Current meter reading below previous reading',
+            'check': 'less_equal',
+            'columns': ['ΠΡΟΗΓ.ΕΝΔ.', 'ΠΑΡ.ΕΝΔΕΙΞΗ'],
+            'severity': 'error',
+        },
+        {
+            'name': 'tier_charges_sum',
+            'description': 'Tier charges do not add up to the total charge',
+            'check': 'sum_equals',
+            'columns': ['ΤΙΜΗΜΑ 1', 'ΤΙΜΗΜΑ 2', 'ΤΙΜ.3', 'ΤΙΜΗΜΑ 4', 'ΤΙΜΗΜΑ 5'],
+            'target': 'ΤΙΜΗΜΑ',
+            'tolerance': 0.02,
+            'severity': 'error',
+        },
+        {
+            'name': 'vat_on_charge',
+            'description': 'VAT on water charge does not match the 13% rate',
+            'check': 'rate',
+            'columns': ['ΤΙΜΗΜΑ'],
+            'target': 'ΦΠΑ ΤΙΜ.',
+            'rate': 0.13,
+            'tolerance': 0.02,
+            'severity': 'warning',
+        },
+        {
+            'name': 'vat_on_other_charges',
+            'description': 'VAT on other charges does not match the 24% rate',
+            'check': 'rate',
+            'columns': ['ΠΑΓΙΟ', 'ΤΕΑΠ', 'ΟΑΠ', 'ΕΡΓΑΣΙΕΣ'],
+            'target': 'ΦΠΑ ΛΟΙΠΩΝ',
+            'rate': 0.24,
+            'tolerance': 0.05,
+            'severity': 'warning',
+        },
+    ]
+    
+    DUPLICATE_KEY_COLUMNS = [
+        'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ',
+        'ΑΡ.ΠΑΡΟΧΗΣ',
+        'ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΑΠΌ',
+        'ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΕΩΣ'
+    ]
+    
+    BUILDING_KEY_COLUMN = "BUILDING_KEY"
+    
     TIMESERIES_PATH = "data/"
     
     EXPORT_PATH = "data/exports/"
     
     MASTERFILE_PATH = "data/"
     
+    CACHE_PATH = "data/cache/"
+    
+    UPLOAD_WORKERS = min(4, os.cpu_count() or 1)
+    
+    VALIDATION_WORKERS = 4
+    
+    STARTUP_TIME_BUDGET = 3.0
+    
+    PORTFOLIO_STORE_MAX_ENTRIES = 32
+    
+    VALIDATION_CHUNK_ROWS = 5000
+    
+    SEARCH_TOP_K = 20
+    
+    ACTIVITY_WINDOW_MONTHS = 6
+    
+    BILLING_CYCLE_MONTHS = 3
+    
     BACKGROUND_COLOR = "#0a1b38"
     
     PRIMARY_COLOR = "#0db1f2"
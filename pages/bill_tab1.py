@@ -11,7 +11,11 @@ from src.single_file_checks import MonthlyDataChecks
 from src.upload_file_checks import UploadedFileCheck
 from src.update_timeseries import TimeSeriesUpdate
 from src.update_masterfile import MasterFileUpdate
-from src.generate_metrics import Metrics
+from src.portfolio_store import PortfolioStore
+from src.upload_cache import UploadCache, VerdictCache, file_sha256
+from src.batch_upload import BatchUpload, batch_key
+from src.integrity_watermark import IntegrityWatermark
+from src.normalise import with_building_key
 
 def create_tab1() -> None:
     """
@@ -19,7 +23,8 @@ def create_tab1() -> None:
     
     This function provides a complete workflow for:
     - Portfolio type selection (Eurobank or Management)
-    - File upload with custom styling
+    - File upload with custom styling, one workbook or several workbooks/zip
+      archives at once (batch mode)
     - Excel sheet selection for multi-sheet files
     - Data quality validation
     - Time series database updates
@@ -32,10 +37,16 @@ def create_tab1() -> None:
         
     Side Effects:
         - Renders file upload UI with custom CSS styling
-        - Updates st.session_state.df_portfolio with uploaded data
+        - Adds the uploaded data, with its categorical building key, to the shared
+          PortfolioStore and keeps only its key in st.session_state.portfolio_key,
+          and its type in st.session_state.portfolio_type
         - Updates st.session_state.tab1_completed flag
-        - Updates st.session_state.processed_file with file identifier
+        - Updates st.session_state.processed_file with the file's content hash
+        - Validates newly uploaded files, records the verdict in the persistent
+          VerdictCache and writes the files that pass to the UploadCache
         - Displays validation messages and progress indicators
+        - Can start a background re-verification of the historical database
+        - Shows the supplies missing from the master file and lets the user add them
     """
     
     st.write("")
@@ -109,49 +120,197 @@ def create_tab1() -> None:
         ('Eurobank', 'Management'),
         horizontal=False,
     )
+    with left_col:
+        create_integrity_panel(portfolio_type)
 
     # File uploader
-    uploaded_file = right_col.file_uploader(
-        "Upload monthly portfolio utilities file", 
-        type=['xlsx', 'xls'],
-        # help="Upload monthly Eurobank portfolio utilities file",
+    uploaded_files = right_col.file_uploader(
+        "Upload monthly portfolio utilities file(s)", 
+        type=['xlsx', 'xls', 'zip'],
+        accept_multiple_files=True,
+        help="Upload one monthly file, or several months / a zip archive at once (e.g. 202509.xlsx)",
         width="stretch",
     )
     st.write("")
+    
+    # Several files or an archive: process them together in batch mode
+    if len(uploaded_files) > 1 or (uploaded_files and uploaded_files[0].name.lower().endswith(".zip")):
+        create_batch_upload(uploaded_files, portfolio_type)
+        return
+    
+    uploaded_file = uploaded_files[0] if uploaded_files else None
     if uploaded_file is not None:
         
-        # Checks for portfolio excel file
-        excel_check = UploadedFileCheck(uploaded_file, unique_id=portfolio_type.lower())
-        df_portfolio = excel_check.exist_multiple_sheets()
-
-
-    if uploaded_file is not None and df_portfolio is not None:
-        
-        file_key = f"{uploaded_file.name}_{uploaded_file.size}_{portfolio_type}"
+        # Identify the upload by its content, so renamed or edited files never collide
+        file_hash = file_sha256(uploaded_file)
+        file_key = f"{file_hash}_{portfolio_type.lower()}"
         if 'processed_file' not in st.session_state or st.session_state.processed_file != file_key:
             
-            st.session_state.processed_file = file_key
-            
-            # # Portfolio dataframe checks
-            # portfolio_checks = MonthlyDataChecks(df_portfolio, portfolio_name=portfolio_type.lower())
-            # checks_passed = portfolio_checks.single_file_checks_pipeline()
-            # if checks_passed is False:
-            #     st.stop()
-
-            # # Append file to historical database
-            # timeseries = TimeSeriesUpdate(df_portfolio, portfolio_type.lower())
-            # timeseries.add_new_data()
-            
-            # # Check for new supply IDs
-            # masterfile = MasterFileUpdate(df_portfolio, portfolio_type)
-            # masterfile.update_masterfile()
+            # A file seen before (in any session) skips parsing and validation
+            df_portfolio = UploadCache.get(file_hash, portfolio_type)
+            from_cache = df_portfolio is not None
+            if not from_cache:
+                # Checks for portfolio excel file
+                excel_check = UploadedFileCheck(uploaded_file, unique_id=portfolio_type.lower())
+                df_portfolio = excel_check.exist_multiple_sheets()
             
-            st.session_state.df_portfolio = df_portfolio
-            checks_passed = True # Temporary bypass for testing
-            if checks_passed:
-                st.session_state.tab1_completed = True
-                st.success("File processed successfully!", icon="✅")
+            if df_portfolio is not None:
             
-            st.write("")
-            st.write("")
-            st.write("")
\ No newline at end of file
+                st.session_state.processed_file = file_key
+                
+                if from_cache:
+                    checks_passed = True
+                else:
+                    # # Portfolio dataframe checks
+                    # portfolio_checks = MonthlyDataChecks(df_portfolio, portfolio_name=portfolio_type.lower())
+                    # checks_passed = portfolio_checks.single_file_checks_pipeline()
+                    # if checks_passed is False:
+                    #     st.stop()
+
+                    # # Append file to historical database
+                    # timeseries = TimeSeriesUpdate(df_portfolio, portfolio_type.lower())
+                    # timeseries.add_new_data()
+                    
+                    # # Check for new supply IDs
+                    # masterfile = MasterFileUpdate(df_portfolio, portfolio_type)
+                    # masterfile.update_masterfile()
+                    
+                    # A file that already failed under the current rules is not
+                    # validated again; only files that pass are cached as validated,
+                    # so the bypass below never lets another session skip the checks
+                    report = VerdictCache.get(file_hash, portfolio_type)
+                    if report is None or report["passed"]:
+                        report = MonthlyDataChecks(df_portfolio, portfolio_name=portfolio_type.lower()).validate()
+                        VerdictCache.put(file_hash, portfolio_type, report)
+                    if report["passed"]:
+                        UploadCache.put(file_hash, portfolio_type, df_portfolio)
+                    else:
+                        st.warning(f"{portfolio_type} portfolio does not pass the checks: {'; '.join(report['messages'])}")
+                    
+                    checks_passed = True # Temporary bypass for testing
+                
+                st.session_state.portfolio_key = PortfolioStore.put(with_building_key(df_portfolio), key=file_hash)
+                st.session_state.portfolio_type = portfolio_type.lower()
+                if checks_passed:
+                    st.session_state.tab1_completed = True
+                    st.success("File processed successfully!" if not from_cache else "File already validated, loaded from cache!", icon="✅")
+                
+                st.write("")
+                st.write("")
+                st.write("")
+        
+        # Rendered on every rerun, so the button that adds new supplies is handled
+        if st.session_state.get('processed_file') == file_key:
+            create_masterfile_panel(file_hash, portfolio_type)
+
+
+def create_batch_upload(uploaded_files: list, portfolio_type: str) -> None:
+    """
+    Process several uploaded files (or zip archives) together and report on all of them.
+    
+    Files are parsed and validated concurrently, appended to the historical
+    databases in month order, and summarised in one report. The most recent
+    valid month becomes the portfolio shown in the other tabs.
+    
+    Args:
+        uploaded_files (list): Files returned by the uploader.
+        portfolio_type (str): Portfolio type selected in the UI, used for files
+            whose name does not mention one.
+    
+    Returns:
+        None
+        
+    Side Effects:
+        - Updates st.session_state.processed_file, portfolio_key, portfolio_type
+          and tab1_completed
+        - Keeps the consolidated report in st.session_state.batch_report and the
+          key and type of the portfolio shown in st.session_state.batch_latest
+        - Shows the master file panel for the portfolio shown in the other tabs
+    """
+    file_key = batch_key(uploaded_files, portfolio_type)
+    if st.session_state.get('processed_file') == file_key:
+        st.dataframe(st.session_state.batch_report, hide_index=True)
+        if st.session_state.get('batch_latest') is not None:
+            create_masterfile_panel(*st.session_state.batch_latest)
+        return
+    
+    with st.status("Processing files...") as status:
+        batch = BatchUpload(uploaded_files, portfolio_type)
+        report = batch.run()
+        status.update(label=f"Processed {len(report)} files", state="complete")
+    
+    st.session_state.processed_file = file_key
+    st.session_state.batch_report = report
+    batch.display_report(report)
+    
+    latest = batch.latest_valid_file(portfolio_type)
+    st.session_state.batch_latest = None
+    if latest is not None:
+        st.session_state.portfolio_key = PortfolioStore.put(with_building_key(latest["df"]), key=latest["file_hash"])
+        st.session_state.portfolio_type = latest["portfolio_type"]
+        st.session_state.tab1_completed = True
+        st.session_state.batch_latest = (st.session_state.portfolio_key, latest["portfolio_type"])
+        st.info(f"Showing {latest['portfolio_type'].title()} {latest['month'] or latest['name']} in the other tabs.")
+        create_masterfile_panel(*st.session_state.batch_latest)
+
+
+def create_masterfile_panel(portfolio_key: str, portfolio_type: str) -> None:
+    """
+    Compare a processed portfolio with its master file and offer to add new supplies.
+    
+    Args:
+        portfolio_key (str): Key of the portfolio in the shared PortfolioStore.
+        portfolio_type (str): Portfolio type ('Eurobank' or 'Management', any case).
+    
+    Returns:
+        None
+        
+    Side Effects:
+        - Renders the new supply IDs, the button adding them and the master file download
+    """
+    df_portfolio = PortfolioStore.get(portfolio_key)
+    if df_portfolio is None:
+        return
+    st.subheader("Master File")
+    try:
+        masterfile = MasterFileUpdate(df_portfolio, portfolio_type)
+    except FileNotFoundError:
+        st.info(f"No {portfolio_type.title()} master file found.")
+        return
+    masterfile.update_masterfile()
+
+
+def create_integrity_panel(portfolio_type: str) -> None:
+    """
+    Show the verified state of the historical database and offer a full re-verification.
+    
+    Args:
+        portfolio_type (str): Portfolio type selected in the UI.
+    
+    Returns:
+        None
+        
+    Side Effects:
+        - Renders an expander with the watermark summary
+        - Starts a background re-verification job when the button is pressed
+    """
+    with st.expander("Database integrity"):
+        job = IntegrityWatermark.full_verification_job(portfolio_type)
+        if job is not None and not job.done():
+            st.info("Full re-verification running in the background...")
+        elif job is not None and job.exception() is not None:
+            st.error(f"Re-verification failed: {job.exception()}")
+        
+        watermark = IntegrityWatermark.load(portfolio_type)
+        if watermark.partitions:
+            num_rows = sum(summary["rows"] for summary in watermark.partitions.values())
+            st.caption(f"{len(watermark.partitions)} months, {num_rows} rows verified, "
+                       f"{watermark.num_duplicates()} duplicate rows")
+        else:
+            st.caption("History not verified yet.")
+        if watermark.full_verification:
+            st.caption(f"Last full re-verification: {watermark.full_verification}")
+        
+        if st.button("Re-verify full history", key=f"reverify_{portfolio_type.lower()}"):
+            IntegrityWatermark.start_full_verification(portfolio_type)
+            st.info("Full re-verification started in the background.")
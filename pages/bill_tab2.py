@@ -7,8 +7,11 @@ interactive charts, and searchable metrics for buildings and supply IDs.
 """
 
 import streamlit as st
+from constants import Constants
 from src.generate_metrics import Metrics
+from src.normalise import with_building_key
 from src.search_bar import SearchBar
+from src.portfolio_store import PortfolioStore, get_session_portfolio
 
 def create_tab2() -> None:
     """
@@ -17,12 +20,13 @@ def create_tab2() -> None:
     This function provides:
     - Overall bill-level metrics and visualizations
     - Interactive search bar for buildings and supply IDs
-    - Drill-down metrics for selected buildings or supply IDs
+    - Drill-down metrics for selected buildings or supply IDs, including
+      inactive ones found only in the historical databases
     - Donut charts for debt distribution
     - Time series charts for consumption and costs
     
-    The function uses data from st.session_state.df_portfolio which must
-    be set by the file upload tab.
+    The function uses the shared portfolio referenced by
+    st.session_state.portfolio_key, which must be set by the file upload tab.
     
     Returns:
         None
@@ -32,10 +36,17 @@ def create_tab2() -> None:
         - Applies custom CSS styling for consistent font sizes
     """
     
+    df_portfolio = get_session_portfolio()
+    if df_portfolio is None:
+        st.info("⏳ The uploaded file is no longer in memory. Please upload it again in the first tab.")
+        return
+    
     st.write("")
     st.subheader("Bill Metrics")
     st.write("")
-    bill_metrics = Metrics(st.session_state.df_portfolio)
+    portfolio_type = st.session_state.get("portfolio_type", "eurobank")
+    history_path = f"{Constants.TIMESERIES_PATH}{portfolio_type}_historical_db.xlsx"
+    bill_metrics = Metrics(df_portfolio, history_path=history_path)
     col1, col2 = st.columns(2)
     with col1:
         st.write("")
@@ -122,23 +133,27 @@ def create_tab2() -> None:
     #     </style>
     #     """, unsafe_allow_html=True)
 
-    search_bar = SearchBar(st.session_state.df_portfolio)
+    search_bar = SearchBar(df_portfolio, portfolio_key=st.session_state.get("portfolio_key"),
+                           portfolio_type=portfolio_type)
     
     selected_option = search_bar.building_searchbox()
     
-    selection_list = st.session_state.df_portfolio['ΔΙΕΥΘΥΝΣΗ'].unique().tolist() + st.session_state.df_portfolio['ΑΡ.ΠΑΡΟΧΗΣ'].unique().tolist()
-    if selected_option is not None and selected_option in selection_list:
-        st.write(f"Selected Option: {selected_option}")
-        if selected_option in (st.session_state.df_portfolio['ΔΙΕΥΘΥΝΣΗ'].unique().tolist()):
-            option_metrics = Metrics(st.session_state.df_portfolio,
-                                    level='building',
-                                    dropdown_selection=selected_option,
-                                    )
-        elif selected_option in (st.session_state.df_portfolio['ΑΡ.ΠΑΡΟΧΗΣ'].unique().tolist()):
-            option_metrics = Metrics(st.session_state.df_portfolio,
-                                    level='supply_id',
-                                    dropdown_selection=selected_option,
-                                    )
+    # One hash lookup: display string -> (level, typed key), built with the search index
+    resolved = search_bar.index.resolve(selected_option)
+    if resolved is not None:
+        level, key = resolved
+        if selected_option in search_bar.index.inactive:
+            # Only found in the portfolio type's historical database: show its history instead
+            st.info(f"{key} is not in this month's portfolio. Showing its history.")
+            data = PortfolioStore.load_excel(history_path, prepare=with_building_key)
+        else:
+            st.write(f"Selected Option: {selected_option}")
+            data = df_portfolio
+        option_metrics = Metrics(data,
+                                level=level,
+                                dropdown_selection=key,
+                                history_path=history_path,
+                                )
         col1, col2 = st.columns(2)
         with col1:
             option_metrics.build_kpis()
@@ -150,7 +165,7 @@ def create_tab2() -> None:
         with col2:
             option_metrics.build_timeseries(yaxis='consumption')
             
-    elif selected_option is not None and selected_option not in selection_list:
+    elif selected_option is not None:
         st.info("Please select a valid Building or Supply ID from the search box above to view metrics.")
         
 
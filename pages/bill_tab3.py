@@ -2,27 +2,121 @@
 Bill Tab 3 - Comparison view for the Bills page.
 
 This module provides the third tab interface for comparing portfolio data
-and historical metrics.
+and historical metrics: for a processed month, the supplies that were
+expected but not billed (ΑΠΕΝΤΑΞΗ ΠΑΡΟΧΩΝ), newly appearing supplies and
+intermittently billed supplies, read from the supply activity bitmap, and
+the comparative workbook of the month against the previous processed month.
 """
 
-import streamlit as st
+import os
+
+import numpy as np
 import pandas as pd
-from src.generate_metrics import Metrics
+import streamlit as st
+from constants import Constants
+from src.activity_bitmap import activity_bitmap
+from src.comparative import ComparativeFile
+from src.entity_index import shared_entity_index
+from src.portfolio_store import PortfolioStore
+
+
+def supply_details(supplies: np.ndarray, portfolio_type: str) -> pd.DataFrame:
+    """
+    Describe supplies with their latest address and the last month they were billed.
+
+    Args:
+        supplies (np.ndarray): Integer supply IDs.
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+    Returns:
+        pd.DataFrame: 'ΑΡ.ΠΑΡΟΧΗΣ', 'ΔΙΕΥΘΥΝΣΗ' and 'Last Month' per supply.
+    """
+    entities = shared_entity_index().table
+    entities = entities[entities['portfolio_type'] == portfolio_type].sort_values('last_month', kind='stable')
+    latest = entities.groupby('ΑΡ.ΠΑΡΟΧΗΣ').agg(**{'ΔΙΕΥΘΥΝΣΗ': ('ΔΙΕΥΘΥΝΣΗ', 'last'), 'Last Month': ('last_month', 'max')})
+    return latest.reindex(supplies).rename_axis('ΑΡ.ΠΑΡΟΧΗΣ').reset_index()
+
 
 def create_tab3() -> None:
     """
     Create and render the comparison tab interface.
     
-    This function serves as a placeholder for future comparative analysis
-    features. Currently displays a placeholder message.
+    For the selected portfolio type and processed month, this function shows:
+    - Supplies billed one billing cycle earlier (Constants.BILLING_CYCLE_MONTHS)
+      but not this month
+    - Supplies billed for the first time this month
+    - Supplies that missed a bill expected one billing cycle after another
+      and were billed again, over the last Constants.ACTIVITY_WINDOW_MONTHS months
+    - A button generating the comparative workbook against the previous processed month
     
     Returns:
         None
         
     Side Effects:
-        - Renders content in the Streamlit UI
+        - Renders metrics and expandable supply lists in the Streamlit UI
+        - Builds the activity bitmap from the historical database on first use
+        - Writes the comparative workbook to Constants.EXPORT_PATH when requested
+        - Keeps its path per portfolio type and month in st.session_state.comparative_files
     """
-    st.write("Placeholder for Comparison Tab")
+    st.write("")
+    st.subheader("Supply Activity")
+    st.write("")
+    col1, col2 = st.columns(2)
+    with col1:
+        portfolio_type = st.radio("Portfolio", ["eurobank", "management"], format_func=str.title,
+                                  horizontal=True, key="activity_portfolio_type")
+    bitmap = activity_bitmap(portfolio_type)
+    if not bitmap.months:
+        st.info(f"No processed months in the {portfolio_type} historical database yet.")
+        return
+    with col2:
+        month = st.selectbox("Month", bitmap.months[::-1], key="activity_month")
+
+    changes = bitmap.changes(month)
+    sections = [
+        ("missing", "Expected but missing",
+         f"Billed {Constants.BILLING_CYCLE_MONTHS} months earlier but not in {month}"),
+        ("new", "New supplies", f"Billed for the first time in {month}"),
+        ("intermittent", "Intermittently billed",
+         f"A bill expected {Constants.BILLING_CYCLE_MONTHS} months after another was missing, "
+         f"then billing resumed, over the last {Constants.ACTIVITY_WINDOW_MONTHS} months"),
+    ]
+    columns = st.columns(len(sections))
+    for column, (category, label, help_text) in zip(columns, sections):
+        with column:
+            st.metric(label, f"{len(changes[category]):,}", help=help_text)
+    for category, label, _ in sections:
+        if len(changes[category]):
+            with st.expander(f"View {label.lower()} ({len(changes[category]):,})"):
+                st.dataframe(supply_details(changes[category], portfolio_type), hide_index=True)
+
+    position = bitmap.months.index(month)
+    if position == 0:
+        return
+    previous_month = bitmap.months[position - 1]
+    st.write("")
+    st.subheader("Comparative File")
+    if month in bitmap.pending:
+        st.info(f"{month} is not in the {portfolio_type} historical database file yet. "
+                "Replace it with the updated database to generate its comparative file.")
+        return
+    if st.button(f"Generate comparison {month} vs {previous_month}", key="build_comparative_file"):
+        history = PortfolioStore.load_excel(f"{Constants.TIMESERIES_PATH}{portfolio_type}_historical_db.xlsx")
+        months = pd.to_numeric(history['Processed_Month'], errors='coerce')
+        with st.spinner("Writing comparative file..."):
+            comparative = ComparativeFile(history[months == month], history[months == previous_month],
+                                          history[months < month], activity=changes)
+            os.makedirs(Constants.EXPORT_PATH, exist_ok=True)
+            # One file per portfolio type and month, so the two portfolios never overwrite each other
+            path = comparative.build_comparative_file(
+                os.path.join(Constants.EXPORT_PATH, f"ΣΥΓΚΡΙΤΙΚΟΣ {portfolio_type.upper()} {month}.xlsx"))
+            # Kept per selection, so switching portfolio or month never offers another selection's file
+            st.session_state.setdefault("comparative_files", {})[(portfolio_type, month)] = path
+    path = st.session_state.get("comparative_files", {}).get((portfolio_type, month))
+    if path and os.path.exists(path):
+        with open(path, "rb") as file:
+            st.download_button("Download comparative file", data=file.read(),
+                               file_name=os.path.basename(path), key="download_comparative_file")
     
     
     
@@ -5,16 +5,7 @@ This is the main page for utility bills analysis, providing a tabbed interface
 for file upload, KPI visualization, and comparative analysis.
 """
 
-import pandas as pd
 import streamlit as st  
-from io import BytesIO
-from pages import bill_tab1
-from src.single_file_checks import MonthlyDataChecks 
-from src.upload_file_checks import UploadedFileCheck
-from src.update_timeseries import TimeSeriesUpdate
-from src.update_masterfile import MasterFileUpdate
-from src.generate_metrics import Metrics
-import pygwalker as pyg
 from pages.bill_tab1 import create_tab1
 from pages.bill_tab2 import create_tab2
 from pages.bill_tab3 import create_tab3
@@ -0,0 +1,359 @@
+"""
+Supply activity module for the Streamlit application.
+
+This module keeps, for every portfolio type, a supply × month activity
+bitmap: one bit per supply ('ΑΡ.ΠΑΡΟΧΗΣ') and processed month, set when the
+supply was billed that month, stored as packed bits (eight months per byte).
+It is built from the historical database once and advanced with every month
+appended by TimeSeriesUpdate. Supplies that were expected but are missing in
+a month (ΑΠΕΝΤΑΞΗ ΠΑΡΟΧΩΝ), newly appearing supplies and intermittently billed
+supplies are answered with vectorised bit operations on the packed columns.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from constants import Constants
+from src.integrity_watermark import file_signature
+
+SUPPLY = 'ΑΡ.ΠΑΡΟΧΗΣ'
+
+
+def add_months(month: int, months: int) -> int:
+    """
+    Shift a processed month by a number of calendar months.
+
+    Args:
+        month (int): Month as YYYYMM.
+        months (int): Calendar months to add (negative to go back).
+
+    Returns:
+        int: The shifted month as YYYYMM.
+    """
+    return int((pd.Period(str(month), freq='M') + months).strftime('%Y%m'))
+
+
+class ActivityBitmap:
+    """
+    The months in which every supply of a historical database was billed.
+
+    Bit j of a supply's row (little-endian within each byte) is set if the
+    supply has a bill in months[j]. Months are the processed months present,
+    so a month that was never ingested does not make every supply look missing.
+
+    Attributes:
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+        supplies (np.ndarray): Sorted integer supply IDs, one per row.
+        months (List[int]): Sorted processed months (YYYYMM), one per bit column.
+        bits (np.ndarray): uint8 matrix of shape (len(supplies), ceil(len(months) / 8)).
+        source (Optional[str]): file_signature of the history the bitmap was built from, if any.
+        pending (List[int]): Months advanced in memory that the history file does not hold yet.
+        path (str): Directory holding the bitmaps (class attribute).
+    """
+
+    path = os.path.join(Constants.CACHE_PATH, "activity")
+    # Reentrant: reconcile() advances and saves while holding it
+    _lock = threading.RLock()
+
+    def __init__(self, portfolio_type: str) -> None:
+        """
+        Initialize an empty bitmap.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            None
+        """
+        self.portfolio_type = portfolio_type.lower()
+        self.supplies = np.empty(0, dtype=np.int64)
+        self.months = []
+        self.bits = np.zeros((0, 0), dtype=np.uint8)
+        self.source = None
+        self.pending = []
+
+    @classmethod
+    def load(cls, portfolio_type: str) -> "ActivityBitmap":
+        """
+        Load the stored bitmap of a portfolio type.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            ActivityBitmap: The stored bitmap, or an empty one.
+        """
+        bitmap = cls(portfolio_type)
+        entry = os.path.join(cls.path, f"{bitmap.portfolio_type}.pkl")
+        try:
+            stored = pd.read_pickle(entry) if os.path.exists(entry) else None
+        except Exception:
+            # A corrupt or incompatible bitmap is rebuilt by the next reconcile
+            stored = None
+        if isinstance(stored, dict):
+            bitmap.__dict__.update(stored)
+        return bitmap
+
+    def save(self) -> None:
+        """
+        Store the bitmap atomically.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Writes a pickle file under Constants.CACHE_PATH/activity
+        """
+        os.makedirs(self.path, exist_ok=True)
+        entry = os.path.join(self.path, f"{self.portfolio_type}.pkl")
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            pd.to_pickle(dict(self.__dict__), tmp_entry)
+            os.replace(tmp_entry, entry)
+
+    def advance(self, frame: pd.DataFrame, processed_month: Optional[int] = None, pending: bool = False) -> None:
+        """
+        Set the bits of the supplies billed in a new month (or in a whole history).
+
+        Args:
+            frame (pd.DataFrame): The new rows.
+            processed_month (Optional[int], optional): Month of the rows as YYYYMM.
+                Defaults to the rows' 'Processed_Month' column, if any.
+            pending (bool, optional): The rows are not in the history file yet; their
+                months are listed in self.pending until reconcile finds them there.
+                Defaults to False.
+
+        Returns:
+            None
+        """
+        supplies = pd.to_numeric(frame[SUPPLY], errors='coerce')
+        if processed_month is None and 'Processed_Month' in frame.columns:
+            months = pd.to_numeric(frame['Processed_Month'], errors='coerce')
+        else:
+            months = pd.Series(processed_month, index=frame.index, dtype='float64')
+        billed = pd.DataFrame({SUPPLY: supplies, 'month': months}).dropna().astype('int64').drop_duplicates()
+        if billed.empty:
+            return
+
+        with self._lock:
+            self._set_bits(billed, pending)
+
+    def _set_bits(self, billed: pd.DataFrame, pending: bool) -> None:
+        """
+        Enlarge the matrix with the billed supplies and months and set their bits;
+        the caller holds the lock.
+
+        The new arrays are built first and swapped in together, so supplies,
+        months and bits always match in size.
+
+        Args:
+            billed (pd.DataFrame): Distinct integer (supply, 'month') pairs.
+            pending (bool): The months are not in the history file yet.
+
+        Returns:
+            None
+        """
+        all_supplies = np.union1d(self.supplies, billed[SUPPLY].to_numpy())
+        all_months = sorted(set(self.months) | set(billed['month'].tolist()))
+        activity = np.zeros((len(all_supplies), len(all_months)), dtype=bool)
+        if len(self.months):
+            # Earlier bits keep their place in the enlarged matrix
+            old = np.unpackbits(self.bits, axis=1, count=len(self.months), bitorder='little').astype(bool)
+            activity[np.ix_(np.searchsorted(all_supplies, self.supplies),
+                            np.searchsorted(all_months, self.months))] = old
+        activity[np.searchsorted(all_supplies, billed[SUPPLY].to_numpy()),
+                 np.searchsorted(all_months, billed['month'].to_numpy())] = True
+
+        bits = np.packbits(activity, axis=1, bitorder='little')
+        self.supplies, self.months, self.bits = all_supplies, all_months, bits
+        if pending:
+            self.pending = sorted(set(self.pending) | set(billed['month'].tolist()))
+
+    def reconcile(self, timeseries: pd.DataFrame, source: Optional[str] = None) -> List[int]:
+        """
+        Bring the bitmap up to date with a historical database.
+
+        If the history only gained months, just their rows are applied;
+        otherwise (months removed) the bitmap is rebuilt from the whole history.
+
+        Args:
+            timeseries (pd.DataFrame): The historical database.
+            source (Optional[str], optional): file_signature of the file it was
+                read from. Defaults to None (always compare months).
+
+        Returns:
+            List[int]: The months applied to the bitmap.
+
+        Side Effects:
+            - Saves the bitmap if anything changed
+        """
+        if 'Processed_Month' in timeseries.columns:
+            months = pd.to_numeric(timeseries['Processed_Month'], errors='coerce')
+        else:
+            months = pd.Series(np.nan, index=timeseries.index)
+        present = set(int(month) for month in months.dropna().unique())
+        with self._lock:
+            if source is not None and source == self.source:
+                return []
+            if not self.months or not set(self.months) <= present:
+                # Rebuilt from the whole history, then swapped in
+                rebuilt = ActivityBitmap(self.portfolio_type)
+                rebuilt.advance(timeseries)
+                self.supplies, self.months, self.bits = rebuilt.supplies, rebuilt.months, rebuilt.bits
+                added = sorted(present)
+            else:
+                added = sorted(present - set(self.months))
+                if added:
+                    self.advance(timeseries[months.isin(added)])
+            # Pending months are now either in the file or were dropped by the rebuild
+            self.pending = []
+            self.source = source
+            self.save()
+        return added
+
+    def column(self, position: int) -> np.ndarray:
+        """
+        Return which supplies were billed in the month at a bit position.
+
+        Args:
+            position (int): Index into self.months.
+
+        Returns:
+            np.ndarray: Boolean vector, one value per supply.
+        """
+        return ((self.bits[:, position >> 3] >> (position & 7)) & 1).astype(bool)
+
+    def seen_before(self, position: int) -> np.ndarray:
+        """
+        Return which supplies were billed in any month before a bit position.
+
+        Whole bytes are tested at once; only the byte holding the position is masked.
+
+        Args:
+            position (int): Index into self.months.
+
+        Returns:
+            np.ndarray: Boolean vector, one value per supply.
+        """
+        earlier_bytes = self.bits[:, :position >> 3].any(axis=1)
+        earlier_bits = (self.bits[:, position >> 3] & ((1 << (position & 7)) - 1)).astype(bool)
+        return earlier_bytes | earlier_bits
+
+    def changes(self, month: int, window: int = Constants.ACTIVITY_WINDOW_MONTHS,
+                cycle: int = Constants.BILLING_CYCLE_MONTHS) -> Dict[str, np.ndarray]:
+        """
+        Compare the supplies billed in a month with the months before it.
+
+        - missing: billed one billing cycle earlier but not this month (expected
+          this month; ΑΠΕΝΤΑΞΗ ΠΑΡΟΧΩΝ). Supplies are billed periodically, so the
+          previous month alone would flag every supply between two bills.
+        - new: billed this month and never before
+        - intermittent: within the last `window` calendar months, billed in some
+          month but not one billing cycle later, although that month was
+          ingested, and billed again after it. A supply on a regular cycle has
+          gaps between its bills and is not flagged.
+
+        Args:
+            month (int): Processed month as YYYYMM.
+            window (int, optional): Calendar months looked back for intermittent
+                billing. Defaults to Constants.ACTIVITY_WINDOW_MONTHS.
+            cycle (int, optional): Calendar months between two bills of a supply.
+                Defaults to Constants.BILLING_CYCLE_MONTHS. Nothing is missing if
+                that month was not ingested.
+
+        Returns:
+            Dict[str, np.ndarray]: Supply IDs per category ('missing', 'new', 'intermittent').
+
+        Raises:
+            ValueError: If the month is not in the bitmap
+        """
+        with self._lock:
+            return self._changes(month, window, cycle)
+
+    def _changes(self, month: int, window: int, cycle: int) -> Dict[str, np.ndarray]:
+        """
+        Compare a month with the months before it; the caller holds the lock.
+
+        Args:
+            month (int): Processed month as YYYYMM.
+            window (int): Calendar months looked back for intermittent billing.
+            cycle (int): Calendar months between two bills of a supply.
+
+        Returns:
+            Dict[str, np.ndarray]: Supply IDs per category ('missing', 'new', 'intermittent').
+
+        Raises:
+            ValueError: If the month is not in the bitmap
+        """
+        if month not in self.months:
+            raise ValueError(f"{month} is not in the {self.portfolio_type} historical database")
+        position = self.months.index(month)
+        current = self.column(position)
+        expected_month = add_months(month, -cycle)
+        if expected_month in self.months:
+            expected = self.column(self.months.index(expected_month))
+        else:
+            expected = np.zeros_like(current)
+
+        first_month = add_months(month, 1 - window)
+        recent = {m: self.column(i) for i, m in enumerate(self.months[:position + 1]) if m >= first_month}
+        # Supplies billed in a month of the window after each month
+        billed_after, later = {}, np.zeros_like(current)
+        for m in sorted(recent, reverse=True):
+            billed_after[m] = later
+            later = later | recent[m]
+        intermittent = np.zeros_like(current)
+        for m, billed in recent.items():
+            due = add_months(m, cycle)
+            if due in recent:
+                intermittent |= billed & ~recent[due] & billed_after[due]
+        return {
+            "missing": self.supplies[expected & ~current],
+            "new": self.supplies[current & ~self.seen_before(position)],
+            "intermittent": self.supplies[intermittent],
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_bitmaps() -> Dict[str, ActivityBitmap]:
+    """
+    Return the process-wide bitmaps, by portfolio type.
+
+    Returns:
+        Dict[str, ActivityBitmap]: Initially empty; filled by activity_bitmap().
+    """
+    return {}
+
+
+def activity_bitmap(portfolio_type: str) -> ActivityBitmap:
+    """
+    Return the shared activity bitmap of a portfolio type, up to date with its history file.
+
+    The history is only read if the file changed since the bitmap was built.
+
+    Args:
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+    Returns:
+        ActivityBitmap: The shared bitmap.
+
+    Side Effects:
+        - Updates the stored bitmap if the history file changed; other sessions
+          wait for the update rather than rebuild it at the same time
+    """
+    from src.portfolio_store import PortfolioStore
+
+    portfolio_type = portfolio_type.lower()
+    bitmaps = _shared_bitmaps()
+    with ActivityBitmap._lock:
+        if portfolio_type not in bitmaps:
+            bitmaps[portfolio_type] = ActivityBitmap.load(portfolio_type)
+        bitmap = bitmaps[portfolio_type]
+        path = f"{Constants.TIMESERIES_PATH}{portfolio_type}_historical_db.xlsx"
+        if os.path.exists(path) and bitmap.source != file_signature(path):
+            bitmap.reconcile(PortfolioStore.load_excel(path), source=file_signature(path))
+    return bitmap
@@ -5,19 +5,71 @@ This module provides user authentication functionality using the streamlit_authe
 library, including login forms, logout functionality, and session management.
 """
 
+import copy
+import os
 import streamlit as st
-import streamlit_authenticator as stauth
-import yaml
-from yaml.loader import SafeLoader
 from constants import Constants
-from typing import NoReturn
+from src.lazy_imports import lazy_import
+from typing import Any, Dict, NoReturn
+
+# Only needed when Constants.AUTHENTICATION is enabled
+stauth = lazy_import("streamlit_authenticator")
+yaml = lazy_import("yaml")
+
+CONFIG_PATH = "config.yaml"
+
+
+@st.cache_resource(show_spinner=False)
+def _load_auth_config(config_path: str, config_mtime: float) -> Dict[str, Any]:
+    """
+    Load config.yaml and hash any plain-text passwords, once per config version.
+    
+    The result is cached process-wide by Streamlit and shared by every session.
+    Passing the file modification time as an argument makes an edited config
+    a cache miss, so the expensive bcrypt hashing runs again only when the
+    credentials actually change. Passwords already hashed with
+    `python -m src.hash_passwords` are left untouched.
+    
+    Args:
+        config_path (str): Path to the authentication config file.
+        config_mtime (float): Modification time of the config file (cache key only).
+    
+    Returns:
+        Dict[str, Any]: The parsed config with hashed passwords. Must not be mutated.
+    """
+    with open(config_path) as file:
+        config = yaml.safe_load(file)
+    stauth.Hasher.hash_passwords(config['credentials'])
+    return config
+
+
+def load_auth_config(config_path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Return a private copy of the cached, pre-hashed authentication config.
+    
+    streamlit_authenticator writes login state (e.g. failed attempts) into the
+    credentials dictionary, so each session gets its own copy of the cached one.
+    
+    Args:
+        config_path (str, optional): Path to the authentication config file.
+            Defaults to "config.yaml".
+    
+    Returns:
+        Dict[str, Any]: A deep copy of the parsed config with hashed passwords.
+    
+    Raises:
+        FileNotFoundError: If the config file is not found
+    """
+    config = _load_auth_config(config_path, os.path.getmtime(config_path))
+    return copy.deepcopy(config)
+
 
 def authenticate() -> None:
     """
     Handle user authentication for the Streamlit application.
     
     This function manages the complete authentication workflow including:
-    - Loading credentials from config.yaml
+    - Loading pre-hashed credentials from the process-wide config cache
     - Applying custom CSS styling for login forms
     - Creating and managing the authentication widget
     - Handling login/logout state
@@ -86,19 +138,20 @@ def authenticate() -> None:
         """, unsafe_allow_html=True)
     
 
-    with open('config.yaml') as file:
-        config = yaml.load(file, Loader=SafeLoader)
+    config = load_auth_config()
 
+    # Passwords are already hashed by load_auth_config, so the widget must not
+    # hash again. It is still built on every run because its cookie manager is
+    # a component that has to be rendered each time.
     authenticator = stauth.Authenticate(
         config['credentials'],
         config['cookie']['name'],
         config['cookie']['key'],
         config['cookie']['expiry_days'],
+        auto_hash=False,
         # config['preauthorized']
     )
 
-    stauth.Hasher.hash_passwords(config['credentials'])
-
     # Get authentication status from session state
     if st.session_state["authentication_status"]:
         authenticator.logout('Logout', 'main')
@@ -0,0 +1,368 @@
+"""
+Batch upload module for the Streamlit application.
+
+This module processes several monthly portfolio workbooks (or zip archives of
+workbooks) in one go. Files are parsed and validated concurrently in a worker
+pool, then appended to the historical databases in month order, and a single
+consolidated report is produced for all of them.
+"""
+
+import hashlib
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+from constants import Constants
+from src.integrity_watermark import file_signature
+from src.portfolio_store import PortfolioStore
+from src.single_file_checks import MonthlyDataChecks
+from src.streaming_checks import StreamingDataChecks
+from src.supply_state import SupplyState
+from src.update_timeseries import TimeSeriesUpdate
+from src.upload_cache import UploadCache, VerdictCache
+from src.upload_file_checks import UploadedFileCheck
+
+# File names such as "202509.xlsx" or "eurobank/202509.xlsx"
+MONTH_PATTERN = re.compile(r"(?<!\d)(20\d{2})(0[1-9]|1[0-2])(?!\d)")
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+
+def _parse_and_validate(name: str, data: bytes, portfolio_type: str) -> Dict[str, Any]:
+    """
+    Parse and validate a single workbook; runs inside a pool worker.
+
+    Kept at module level so it can be sent to worker processes. It never
+    touches the Streamlit UI. .xlsx workbooks are validated by streaming, so a
+    failing file is rejected without ever being loaded into memory, and a
+    passing one is then read once without being validated again. Verdicts are
+    cached per file and rule-set version: a file already validated under the
+    current rules is answered from the cache, whether it passed or failed. A
+    cached frame without a passing verdict is validated again.
+
+    Args:
+        name (str): File name, used for reporting only.
+        data (bytes): Raw bytes of the workbook.
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+    Returns:
+        Dict[str, Any]: The parsed DataFrame ('df'), the validation verdict
+                        ('passed') and human readable 'messages'.
+    """
+    file_hash = hashlib.sha256(data).hexdigest()
+    result = {"file_hash": file_hash, "df": None, "passed": False, "from_cache": False, "violations": None, "messages": []}
+
+    verdict = VerdictCache.get(file_hash, portfolio_type)
+    if verdict is not None and not verdict["passed"]:
+        result.update(from_cache=True, violations=verdict["violations"])
+        result["messages"].extend(verdict["messages"])
+        return result
+
+    # Only returned with a passing verdict for the same rules; anything else is validated again
+    df = UploadCache.get(file_hash, portfolio_type)
+    if df is not None:
+        result.update(df=df, passed=True, from_cache=True)
+        result["messages"].append("Already validated, loaded from cache")
+        result["messages"].extend(verdict["messages"])
+        return result
+
+    streamed = None
+    if name.lower().endswith(".xlsx"):
+        try:
+            streamed = StreamingDataChecks(io.BytesIO(data), portfolio_type).validate()
+        except ValueError as e:
+            result["messages"].append(f"Error reading file: {str(e)}")
+            return result
+        if not streamed["passed"]:
+            VerdictCache.put(file_hash, portfolio_type, streamed)
+            result["violations"] = streamed["violations"]
+            result["messages"].extend(streamed["messages"])
+            return result
+
+    try:
+        df, sheet_names = UploadedFileCheck.read_workbook(io.BytesIO(data))
+    except Exception as e:
+        result["messages"].append(f"Error reading file: {str(e)}")
+        return result
+    if len(sheet_names) > 1:
+        result["messages"].append(f"Multiple sheets, used the first one ('{sheet_names[0]}')")
+
+    if streamed is not None:
+        # The streaming pass already ran every rule; only the empty rows it ignored are dropped
+        report = streamed
+        df = df.dropna(how="all")
+    else:
+        report = MonthlyDataChecks(df, portfolio_type).validate()
+    VerdictCache.put(file_hash, portfolio_type, report)
+    result.update(df=df, passed=report["passed"], violations=report["violations"])
+    result["messages"].extend(report["messages"])
+    if report["passed"]:
+        UploadCache.put(file_hash, portfolio_type, df)
+    return result
+
+
+class BatchUpload:
+    """
+    A class for processing several uploaded portfolio files together.
+
+    Zip archives are expanded into their Excel members. The month and the
+    portfolio type of every file are inferred from its name (e.g.
+    'management/202509.xlsx'), falling back to the portfolio type selected in
+    the UI. Parsing and validation run concurrently; appends to the
+    historical database run afterwards, oldest month first, so each month is
+    checked against the history including the months before it.
+
+    Attributes:
+        files (List[Dict[str, Any]]): Expanded files with name, bytes, month and portfolio type.
+        default_portfolio_type (str): Portfolio type used when the name does not tell.
+        max_workers (int): Size of the worker pool.
+        results (List[Dict[str, Any]]): Per-file outcomes, filled by run().
+        updated_databases (Dict[str, pd.DataFrame]): Updated historical database per portfolio type.
+    """
+
+    def __init__(self, uploaded_files: List[Any], default_portfolio_type: str, max_workers: Optional[int] = None) -> None:
+        """
+        Initialize the BatchUpload with the files from the uploader.
+
+        Args:
+            uploaded_files (List[Any]): Uploaded Excel or zip files.
+            default_portfolio_type (str): Portfolio type selected in the UI.
+            max_workers (Optional[int], optional): Worker pool size. Defaults to
+                Constants.UPLOAD_WORKERS.
+
+        Returns:
+            None
+        """
+        self.default_portfolio_type = default_portfolio_type.lower()
+        self.max_workers = max_workers or Constants.UPLOAD_WORKERS
+        self.files = self.expand_uploads(uploaded_files)
+        for file in self.files:
+            file["month"] = self.infer_month(file["name"])
+            file["portfolio_type"] = self.infer_portfolio_type(file["name"], self.default_portfolio_type)
+        self.results = []
+        self.updated_databases = {}
+
+    @staticmethod
+    def expand_uploads(uploaded_files: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Read uploaded files into memory, expanding zip archives into their workbooks.
+
+        Args:
+            uploaded_files (List[Any]): Uploaded files with 'name' and 'getvalue()'.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per workbook with its 'name' and 'data' bytes.
+        """
+        files = []
+        for uploaded_file in uploaded_files:
+            data = uploaded_file.getvalue()
+            if uploaded_file.name.lower().endswith(".zip"):
+                with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                    for member in archive.infolist():
+                        member_name = os.path.basename(member.filename)
+                        if (member.is_dir() or member.filename.startswith("__MACOSX")
+                                or member_name.startswith("~$")
+                                or not member_name.lower().endswith(EXCEL_EXTENSIONS)):
+                            continue
+                        files.append({"name": member.filename, "data": archive.read(member)})
+            else:
+                files.append({"name": uploaded_file.name, "data": data})
+        return files
+
+    @staticmethod
+    def infer_month(name: str) -> Optional[int]:
+        """
+        Infer the month of a file from a YYYYMM token in its name.
+
+        Args:
+            name (str): File name, optionally with folders (e.g. 'eurobank/202509.xlsx').
+
+        Returns:
+            Optional[int]: The month as YYYYMM, or None if the name has no such token.
+        """
+        match = MONTH_PATTERN.search(os.path.basename(name))
+        return int(match.group(1) + match.group(2)) if match else None
+
+    @staticmethod
+    def infer_portfolio_type(name: str, default: str) -> str:
+        """
+        Infer the portfolio type from the file name or its folder in a zip archive.
+
+        Args:
+            name (str): File name, optionally with folders.
+            default (str): Portfolio type used when the name does not mention one.
+
+        Returns:
+            str: 'eurobank' or 'management'.
+        """
+        lowered = name.lower()
+        for portfolio_type in ("eurobank", "management"):
+            if portfolio_type in lowered:
+                return portfolio_type
+        return default
+
+    def _validate_all(self) -> List[Dict[str, Any]]:
+        """
+        Parse and validate every file, concurrently when more than one worker is available.
+
+        Excel parsing is pure Python and holds the GIL, so the pool uses processes.
+
+        Returns:
+            List[Dict[str, Any]]: Validation outcome per file, in the order of self.files.
+        """
+        jobs = [(file["name"], file["data"], file["portfolio_type"]) for file in self.files]
+        workers = min(self.max_workers, len(jobs))
+        if workers <= 1:
+            return [_parse_and_validate(*job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_parse_and_validate, *zip(*jobs)))
+
+    def run(self) -> pd.DataFrame:
+        """
+        Validate all files and append the valid ones to the historical databases.
+
+        Returns:
+            pd.DataFrame: The consolidated report, one row per file, ordered by
+                          portfolio type and month.
+
+        Side Effects:
+            - Fills self.results and self.updated_databases
+            - Writes newly validated files to the UploadCache
+        """
+        for file, outcome in zip(self.files, self._validate_all()):
+            self.results.append({**file, **outcome, "status": "Passed checks" if outcome["passed"] else "Failed checks"})
+
+        ordered = sorted(self.results, key=lambda r: (r["portfolio_type"], r["month"] or 0, r["name"]))
+        for portfolio_type in sorted({r["portfolio_type"] for r in ordered}):
+            self._append_months([r for r in ordered if r["portfolio_type"] == portfolio_type and r["passed"]], portfolio_type)
+
+        return pd.DataFrame([{
+            "File": r["name"],
+            "Portfolio": r["portfolio_type"].title(),
+            "Month": r["month"],
+            "Rows": len(r["df"]) if r["df"] is not None else None,
+            "Status": r["status"],
+            "Details": "; ".join(r["messages"]),
+        } for r in ordered])
+
+    def _append_months(self, results: List[Dict[str, Any]], portfolio_type: str) -> None:
+        """
+        Append valid files of one portfolio type to its historical database, oldest first.
+
+        Args:
+            results (List[Dict[str, Any]]): Passed files of this portfolio type, in month order.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            None
+
+        Side Effects:
+            - Updates the 'status'/'messages' of each result, including meter-reading
+              continuity warnings
+            - Updates the stored supply state if the history file changed
+            - Adds the entities of every appended month to the shared entity index
+              and sets it in the supply activity bitmap
+            - Stores the updated database in self.updated_databases
+        """
+        if not results:
+            return
+        path = f"{TimeSeriesUpdate.path}{portfolio_type}_historical_db.xlsx"
+        timeseries = PortfolioStore.load_excel(path)
+        supply_state = SupplyState.load(portfolio_type)
+        supply_state.reconcile(timeseries, source=file_signature(path))
+        appended = False
+        for result in results:
+            update = TimeSeriesUpdate(result["df"], portfolio_type, timeseries=timeseries, processed_month=result["month"])
+            common_ids, num_invoices = update.find_existing_invoices()
+            if common_ids:
+                result["status"] = "Already in database" if len(common_ids) == num_invoices else "Partly in database"
+                result["messages"].append(f"{len(common_ids)}/{num_invoices} records already in database")
+                continue
+            discontinuities = supply_state.check_continuity(result["df"])
+            if not discontinuities.empty:
+                result["messages"].append(f"Warning: {len(discontinuities)} supplies do not continue their last meter reading")
+            # Later months of the batch are checked against this one; the stored
+            # table only advances once the updated database replaces the file
+            supply_state.advance(result["df"], result["month"])
+            timeseries = update.append_new_data()
+            update.update_entity_index()
+            update.update_activity()
+            result["status"] = "Appended"
+            appended = True
+        if appended:
+            self.updated_databases[portfolio_type] = timeseries
+
+    def latest_valid_file(self, portfolio_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the most recent valid file, preferring the given portfolio type.
+
+        Args:
+            portfolio_type (str): Preferred portfolio type.
+
+        Returns:
+            Optional[Dict[str, Any]]: The latest passed file, or None if no file passed.
+        """
+        passed = [r for r in self.results if r["passed"]]
+        preferred = [r for r in passed if r["portfolio_type"] == portfolio_type.lower()] or passed
+        if not preferred:
+            return None
+        return max(preferred, key=lambda r: r["month"] or 0)
+
+    def display_report(self, report: pd.DataFrame) -> None:
+        """
+        Display the consolidated report and download buttons for updated databases.
+
+        Args:
+            report (pd.DataFrame): The report returned by run().
+
+        Returns:
+            None
+
+        Side Effects:
+            - Renders a summary, the report table, the row-level violations of
+              failed files and one download button per updated historical database
+        """
+        num_passed = sum(r["passed"] for r in self.results)
+        if num_passed == len(self.results):
+            st.success(f"All {len(self.results)} files passed the checks.", icon="✅")
+        else:
+            st.error(f"{len(self.results) - num_passed}/{len(self.results)} files failed the checks.")
+        st.dataframe(report, hide_index=True)
+        for result in self.results:
+            if result["violations"] is not None and not result["violations"].empty:
+                with st.expander(f"View failing rows of {result['name']}"):
+                    st.dataframe(result["violations"], hide_index=True)
+
+        current_date = datetime.now().strftime("%Y%m%d")
+        for portfolio_type, database in self.updated_databases.items():
+            buffer = io.BytesIO()
+            database.to_excel(buffer, index=False)
+            buffer.seek(0)
+            st.download_button(
+                label=f"Download Updated {portfolio_type.title()} Database",
+                data=buffer,
+                file_name=f"{portfolio_type}_historical_db_{current_date}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=f"download_batch_{portfolio_type}",
+            )
+
+
+def batch_key(uploaded_files: List[Any], portfolio_type: str) -> str:
+    """
+    Build an identifier for a set of uploaded files, independent of their order.
+
+    Args:
+        uploaded_files (List[Any]): Uploaded files with 'getvalue()'.
+        portfolio_type (str): Portfolio type selected in the UI.
+
+    Returns:
+        str: SHA-256 over the sorted content hashes and the portfolio type.
+    """
+    hashes = sorted(hashlib.sha256(f.getvalue()).hexdigest() for f in uploaded_files)
+    return hashlib.sha256("".join(hashes + [portfolio_type.lower()]).encode()).hexdigest()
@@ -0,0 +1,220 @@
+"""
+Validation benchmark module for the Streamlit application.
+
+This module measures the upload pipeline on synthetic portfolios of growing
+size: reading the workbook (UploadedFileCheck.read_workbook), validating it
+(MonthlyDataChecks.validate) and checking it against a history before the
+append (TimeSeriesUpdate). For every stage and size it reports throughput in
+rows per second and peak memory (tracemalloc). Timing and memory are
+measured in separate runs, since tracing allocations slows the code down.
+Results are appended to a JSON Lines history file together with the git
+revision, so versions can be compared.
+
+To run: python -m src.benchmark [--rows 10000 100000] [--duplicate-rate 0.01] [--null-rate 0.001] [--repeat 3]
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from constants import Constants
+from src.integrity_watermark import IntegrityWatermark
+from src.single_file_checks import MonthlyDataChecks
+from src.supply_state import SupplyState
+from src.synthetic_data import MAX_WORKSHEET_ROWS, SyntheticPortfolio
+from src.update_timeseries import TimeSeriesUpdate
+from src.upload_file_checks import UploadedFileCheck
+
+BENCHMARK_HISTORY_FILE = "benchmark_history.jsonl"
+
+# Month of the generated file; the history holds the months before it
+BENCHMARK_MONTH = 202510
+HISTORY_MONTHS = 3
+
+
+def git_revision() -> Optional[str]:
+    """
+    Return the short git revision of the working tree, if it is a git checkout.
+
+    Returns:
+        Optional[str]: The revision, with '+dirty' if there are uncommitted changes.
+    """
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision.stdout.strip() + ("+dirty" if status.stdout.strip() else "")
+
+
+def measure(stage: Callable[[], Any], rows: int, repeat: int = 3) -> Dict[str, float]:
+    """
+    Measure the best time and the peak memory of a stage.
+
+    Args:
+        stage (Callable[[], Any]): The code to measure; called repeat + 1 times.
+        rows (int): Rows processed by one call.
+        repeat (int, optional): Timed runs; the fastest is kept. Defaults to 3.
+
+    Returns:
+        Dict[str, float]: 'seconds' (best run), 'rows_per_second' and 'peak_mb'
+                          (peak traced memory of one extra run).
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(seconds)
+    return {"seconds": best, "rows_per_second": rows / best if best else None, "peak_mb": peak / 2**20}
+
+
+def benchmark_size(rows: int, duplicate_rate: float = 0.0, null_rate: float = 0.0, seed: int = 0,
+                   repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Benchmark every stage on one synthetic month of the given size.
+
+    Args:
+        rows (int): Rows of the generated month.
+        duplicate_rate (float, optional): Share of duplicate rows. Defaults to 0.
+        null_rate (float, optional): Share of missing mandatory values. Defaults to 0.
+        seed (int, optional): Random seed. Defaults to 0.
+        repeat (int, optional): Timed runs per stage. Defaults to 3.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The measurements per stage. The workbook
+            stage is skipped when the month does not fit in one worksheet.
+    """
+    generator = SyntheticPortfolio(rows, duplicate_rate=duplicate_rate, null_rate=null_rate, seed=seed)
+    portfolio = generator.month(BENCHMARK_MONTH)
+    # Same seed, so the history has the same supplies, without injected errors
+    history_generator = SyntheticPortfolio(rows, seed=seed)
+    months = pd.period_range(end=pd.Period(str(BENCHMARK_MONTH), freq="M") - 1, periods=HISTORY_MONTHS, freq="M")
+    history = pd.concat([history_generator.month(int(month.strftime("%Y%m"))).assign(Processed_Month=int(month.strftime("%Y%m")))
+                         for month in months], ignore_index=True)
+
+    results = {}
+    if rows <= MAX_WORKSHEET_ROWS:
+        workbook = io.BytesIO()
+        portfolio.to_excel(workbook, index=False)
+        results["UploadedFileCheck.read_workbook"] = measure(
+            lambda: UploadedFileCheck.read_workbook(io.BytesIO(workbook.getvalue())), rows, repeat)
+
+    # validate() drops empty rows in place, so every run gets its own copy
+    results["MonthlyDataChecks.validate"] = measure(
+        lambda: MonthlyDataChecks(portfolio.copy(), "eurobank").validate(), rows, repeat)
+
+    def update() -> pd.DataFrame:
+        # Same checks as TimeSeriesUpdate.add_new_data, with the watermark and the
+        # supply state built in memory so the stored ones are not touched
+        timeseries_update = TimeSeriesUpdate(portfolio, "eurobank", timeseries=history, processed_month=BENCHMARK_MONTH)
+        timeseries_update.watermark = watermark = IntegrityWatermark("benchmark")
+        watermark.reconcile(history, save=False)
+        timeseries_update.supply_state = SupplyState("benchmark")
+        timeseries_update.supply_state.advance(history)
+        watermark.missing_columns()
+        if watermark.num_duplicates():
+            watermark.duplicate_rows(history)
+        timeseries_update.find_existing_invoices()
+        timeseries_update.check_continuity()
+        return timeseries_update.append_new_data()
+
+    results["TimeSeriesUpdate"] = measure(update, rows, repeat)
+    return results
+
+
+def load_previous_run(history_path: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Load the most recent run with the same configuration from the history file.
+
+    Args:
+        history_path (str): Path of the JSON Lines history file.
+        config (Dict[str, Any]): Rates, seed and sizes of the current run.
+
+    Returns:
+        Optional[Dict[str, Any]]: The last comparable run, or None if there is none.
+    """
+    if not os.path.exists(history_path):
+        return None
+    with open(history_path, encoding="utf-8") as file:
+        runs = [json.loads(line) for line in file if line.strip()]
+    comparable = [run for run in runs if run.get("config") == config]
+    return comparable[-1] if comparable else None
+
+
+def run_benchmark(sizes: List[int], duplicate_rate: float = 0.0, null_rate: float = 0.0, seed: int = 0,
+                  repeat: int = 3) -> Dict[str, Any]:
+    """
+    Run the benchmark for every size, print a report and append it to the history.
+
+    Args:
+        sizes (List[int]): Row counts to benchmark (e.g. 10,000 to 5,000,000).
+        duplicate_rate (float, optional): Share of duplicate rows. Defaults to 0.
+        null_rate (float, optional): Share of missing mandatory values. Defaults to 0.
+        seed (int, optional): Random seed. Defaults to 0.
+        repeat (int, optional): Timed runs per stage. Defaults to 3.
+
+    Returns:
+        Dict[str, Any]: The recorded run.
+
+    Side Effects:
+        - Appends the run to Constants.EXPORT_PATH/benchmark_history.jsonl
+    """
+    config = {"sizes": sizes, "duplicate_rate": duplicate_rate, "null_rate": null_rate, "seed": seed}
+    history_path = os.path.join(Constants.EXPORT_PATH, BENCHMARK_HISTORY_FILE)
+    previous = load_previous_run(history_path, config)
+
+    print(f"{'rows':>10}  {'stage':<32} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}  change")
+    results = {}
+    for rows in sizes:
+        results[str(rows)] = benchmark_size(rows, duplicate_rate, null_rate, seed, repeat)
+        for stage, result in results[str(rows)].items():
+            change = ""
+            before = (previous or {}).get("results", {}).get(str(rows), {}).get(stage)
+            if before and before.get("rows_per_second") and result["rows_per_second"]:
+                change = f"{result['rows_per_second'] / before['rows_per_second'] - 1:+.0%} rows/s"
+            print(f"{rows:>10,}  {stage:<32} {result['seconds']:>9.3f} {result['rows_per_second']:>12,.0f} "
+                  f"{result['peak_mb']:>9.1f}  {change}")
+
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "config": config,
+        "results": results,
+    }
+    if previous is not None:
+        print(f"\nCompared with {previous.get('revision')} at {previous['timestamp']}")
+
+    os.makedirs(Constants.EXPORT_PATH, exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(run, ensure_ascii=False) + "\n")
+    return run
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark upload validation on synthetic portfolios.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="row counts to benchmark")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of duplicate rows")
+    parser.add_argument("--null-rate", type=float, default=0.0, help="share of missing mandatory values")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    args = parser.parse_args()
+    run_benchmark(args.rows, duplicate_rate=args.duplicate_rate, null_rate=args.null_rate, seed=args.seed,
+                  repeat=args.repeat)
+    sys.exit(0)
@@ -2,11 +2,20 @@
 Comparative file module for the Streamlit application.
 
 This module provides functionality for comparing portfolio data across time periods
-and updating databases with new supply IDs.
+and updating databases with new supply IDs. The comparable sheet is computed with
+an indexed merge of per-supply aggregates, and the workbook is streamed to
+Constants.EXPORT_PATH through openpyxl's write-only mode.
 """
 
+import os
+from datetime import date
+from typing import Dict, Optional, Set
+
+import numpy as np
 import pandas as pd
-from typing import Set
+from constants import Constants
+from openpyxl import Workbook
+from src.generate_metrics import Metrics
 
 class ComparativeFile:
     """
@@ -20,14 +29,18 @@ class ComparativeFile:
         portfolio_current (pd.DataFrame): The current period's portfolio data.
         portfolio_previous (pd.DataFrame): The previous period's portfolio data.
         database (pd.DataFrame): The historical database containing all supply IDs.
-        portfolio_comparable (pd.DataFrame): DataFrame for storing comparative analysis.
+        portfolio_comparable (pd.DataFrame): Per-supply debt and consumption of both
+                                             periods with their differences.
         inactive_supply_ids (Set): Supply IDs that exist in database but not in current portfolio.
+        activity (Optional[Dict[str, np.ndarray]]): New and missing supplies of the current
+                                                    month (see ActivityBitmap.changes).
         supply_id_col (str): Column name for supply IDs (class attribute).
     """
     
     supply_id_col = "ΑΡ.ΠΑΡΟΧΗΣ"
 
-    def __init__(self, portfolio_current: pd.DataFrame, portfolio_previous: pd.DataFrame, database: pd.DataFrame) -> None:
+    def __init__(self, portfolio_current: pd.DataFrame, portfolio_previous: pd.DataFrame, database: pd.DataFrame,
+                 activity: Optional[Dict[str, np.ndarray]] = None) -> None:
         """
         Initialize the ComparativeFile with portfolio data.
         
@@ -35,6 +48,9 @@ class ComparativeFile:
             portfolio_current (pd.DataFrame): The current period's portfolio DataFrame.
             portfolio_previous (pd.DataFrame): The previous period's portfolio DataFrame.
             database (pd.DataFrame): The historical database DataFrame.
+            activity (Optional[Dict[str, np.ndarray]], optional): The current month's
+                ActivityBitmap.changes(), which the 'ΚΑΤΑΣΤΑΣΗ' column is derived from.
+                Defaults to None (no 'ΚΑΤΑΣΤΑΣΗ' column).
         
         Returns:
             None
@@ -42,7 +58,8 @@ class ComparativeFile:
         self.portfolio_current = portfolio_current
         self.portfolio_previous = portfolio_previous
         self.database = database
-        self.portfolio_comparable = pd.DataFrame()
+        self.activity = activity
+        self.portfolio_comparable = self.build_comparable()
         
     
     def database_update(self) -> None:
@@ -63,36 +80,129 @@ class ComparativeFile:
         Note:
             TODO: Add duplicate check for database after update
         """
-        current_supply_ids = set(self.portfolio_current[self.supply_id_col].unique())
-        current_database_ids = set(self.database[self.supply_id_col].unique())
+        # Compared as numbers: supply IDs are ints in monthly files and floats in the database
+        current_supply_ids = pd.Index(pd.to_numeric(self.portfolio_current[self.supply_id_col], errors='coerce').dropna().unique())
+        current_database_ids = pd.Index(pd.to_numeric(self.database[self.supply_id_col], errors='coerce').dropna().unique())
         # unregistered_supply_ids = exist in current portfolio but not in db
-        unregistered_supply_ids = (current_supply_ids - current_database_ids).tolist()
-        rows_to_add_to_database = self.portfolio_current[self.portfolio_current[self.supply_id_col].isin(unregistered_supply_ids)]
+        unregistered_supply_ids = current_supply_ids[~current_supply_ids.isin(current_database_ids)]
+        rows_to_add_to_database = self.portfolio_current[pd.to_numeric(self.portfolio_current[self.supply_id_col], errors='coerce').isin(unregistered_supply_ids)]
         self.database = pd.concat([self.database, rows_to_add_to_database], ignore_index=True)
         # TODO: elegxos an db exei duplicates
         # inactive ids = exist in db but not in current portfolio
-        self.inactive_supply_ids = current_database_ids - current_supply_ids.tolist()
+        self.inactive_supply_ids = set(current_database_ids[~current_database_ids.isin(current_supply_ids)].astype('int64').tolist())
+        
+
+    @classmethod
+    def aggregate(cls, portfolio: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sum the debt and consumption of a portfolio per supply ID.
+        
+        Args:
+            portfolio (pd.DataFrame): A monthly portfolio.
+        
+        Returns:
+            pd.DataFrame: Indexed by integer supply ID, with the supply's last
+                          'ΔΙΕΥΘΥΝΣΗ', total 'ΟΦΕΙΛΗ' and total 'ΚΥΒΙΚΑ'.
+        """
+        supplies = pd.to_numeric(portfolio[cls.supply_id_col], errors='coerce')
+        totals = pd.DataFrame({
+            cls.supply_id_col: supplies,
+            'ΔΙΕΥΘΥΝΣΗ': portfolio['ΔΙΕΥΘΥΝΣΗ'],
+            'ΟΦΕΙΛΗ': pd.to_numeric(portfolio['ΟΦΕΙΛΗ'], errors='coerce'),
+            'ΚΥΒΙΚΑ': Metrics._total_consumption(portfolio),
+        }).dropna(subset=[cls.supply_id_col])
+        totals[cls.supply_id_col] = totals[cls.supply_id_col].astype('int64')
+        return totals.groupby(cls.supply_id_col).agg(
+            {'ΔΙΕΥΘΥΝΣΗ': 'last', 'ΟΦΕΙΛΗ': 'sum', 'ΚΥΒΙΚΑ': 'sum'})
+
+    def build_comparable(self) -> pd.DataFrame:
+        """
+        Compare the debt and consumption of every supply ID between the two periods.
+        
+        The per-supply totals of both periods are joined on their supply ID
+        index; a supply billed in one period only counts as 0 in the other.
+        With the month's activity, 'ΚΑΤΑΣΤΑΣΗ' is 'ΝΕΑ' for supplies never billed
+        before, 'ΑΠΕΝΤΑΞΗ' for supplies billed one billing cycle earlier but not
+        this month (listed even if the previous month did not bill them) and
+        'ΕΝΕΡΓΗ' otherwise. Supplies are billed periodically, so whether a
+        supply was in the previous month says neither.
+        
+        Returns:
+            pd.DataFrame: One row per supply ID of either period with its address,
+                          previous and current 'ΟΦΕΙΛΗ' and 'ΚΥΒΙΚΑ', their
+                          differences and, with the activity, 'ΚΑΤΑΣΤΑΣΗ'.
+        """
+        current = self.aggregate(self.portfolio_current)
+        previous = self.aggregate(self.portfolio_previous)
+        comparable = previous.join(current, how='outer', lsuffix=' ΠΡΟΗΓ.', sort=True)
+        if self.activity is not None:
+            missing = pd.Index(self.activity['missing'], dtype='int64')
+            comparable = comparable.reindex(comparable.index.union(missing))
+            addresses = self.aggregate(self.database)['ΔΙΕΥΘΥΝΣΗ']
+            comparable['ΔΙΕΥΘΥΝΣΗ ΠΡΟΗΓ.'] = comparable['ΔΙΕΥΘΥΝΣΗ ΠΡΟΗΓ.'].fillna(addresses.reindex(comparable.index))
+        for col in ['ΟΦΕΙΛΗ', 'ΚΥΒΙΚΑ']:
+            comparable[[f'{col} ΠΡΟΗΓ.', col]] = comparable[[f'{col} ΠΡΟΗΓ.', col]].fillna(0)
+        columns = {
+            'ΔΙΕΥΘΥΝΣΗ': comparable['ΔΙΕΥΘΥΝΣΗ'].fillna(comparable['ΔΙΕΥΘΥΝΣΗ ΠΡΟΗΓ.']),
+            'ΟΦΕΙΛΗ ΠΡΟΗΓ.': comparable['ΟΦΕΙΛΗ ΠΡΟΗΓ.'],
+            'ΟΦΕΙΛΗ': comparable['ΟΦΕΙΛΗ'],
+            'ΔΙΑΦΟΡΑ ΟΦΕΙΛΗΣ': comparable['ΟΦΕΙΛΗ'] - comparable['ΟΦΕΙΛΗ ΠΡΟΗΓ.'],
+            'ΚΥΒΙΚΑ ΠΡΟΗΓ.': comparable['ΚΥΒΙΚΑ ΠΡΟΗΓ.'],
+            'ΚΥΒΙΚΑ': comparable['ΚΥΒΙΚΑ'],
+            'ΔΙΑΦΟΡΑ ΚΥΒΙΚΩΝ': comparable['ΚΥΒΙΚΑ'] - comparable['ΚΥΒΙΚΑ ΠΡΟΗΓ.'],
+        }
+        if self.activity is not None:
+            columns['ΚΑΤΑΣΤΑΣΗ'] = np.select(
+                [comparable.index.isin(self.activity['new']), comparable.index.isin(missing)],
+                ['ΝΕΑ', 'ΑΠΕΝΤΑΞΗ'], 'ΕΝΕΡΓΗ')
+        return pd.DataFrame(columns, index=comparable.index).rename_axis(self.supply_id_col).reset_index()
+
+    @staticmethod
+    def _write_sheet(workbook: Workbook, title: str, data: pd.DataFrame) -> None:
+        """
+        Stream a DataFrame into a new sheet of a write-only workbook.
         
+        Args:
+            workbook (Workbook): An openpyxl workbook opened with write_only=True.
+            title (str): Sheet name.
+            data (pd.DataFrame): Rows to write, with a header row.
+        
+        Returns:
+            None
+        """
+        sheet = workbook.create_sheet(title)
+        sheet.append(list(data.columns))
+        for row in data.astype(object).where(data.notna(), None).itertuples(index=False):
+            sheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value for value in row])
 
-    def build_comparative_file(self) -> None:
+    def build_comparative_file(self, path: Optional[str] = None) -> str:
         """
         Generate an Excel file with comparative portfolio data.
         
         Creates a multi-sheet Excel workbook containing:
+        - Comparative analysis sheet
         - Current portfolio data
         - Previous portfolio data
-        - Comparative analysis sheet
         
-        The file is saved as "ΣΥΓΚΡΙΤΙΚΟΣ ΕΥΔΑΠ.xlsx" in the current directory.
+        Rows are streamed one at a time (openpyxl write-only mode), so the
+        workbook is never held in memory as cell objects.
+        
+        Args:
+            path (Optional[str], optional): Destination .xlsx file. Defaults to
+                "ΣΥΓΚΡΙΤΙΚΟΣ ΕΥΔΑΠ <dd.mm.yyyy>.xlsx" in Constants.EXPORT_PATH.
         
         Returns:
-            None
+            str: Path of the written file.
             
         Side Effects:
-            - Creates an Excel file in the current working directory
+            - Creates an Excel file (and Constants.EXPORT_PATH if needed)
         """
-        with pd.ExcelWriter("ΣΥΓΚΡΙΤΙΚΟΣ ΕΥΔΑΠ.xlsx") as writer:
-            self.portfolio_current.to_excel(writer, sheet_name="Current Portfolio", index=False)
-            self.portfolio_previous.to_excel(writer, sheet_name="Previous Portfolio", index=False)
-            self.portfolio_comparable.to_excel(writer, sheet_name="ΣΥΓΚΡΙΤΙΚΟΣ", index=False)
-
+        if path is None:
+            os.makedirs(Constants.EXPORT_PATH, exist_ok=True)
+            path = os.path.join(Constants.EXPORT_PATH, f"ΣΥΓΚΡΙΤΙΚΟΣ ΕΥΔΑΠ {date.today():%d.%m.%Y}.xlsx")
+        workbook = Workbook(write_only=True)
+        self._write_sheet(workbook, "ΣΥΓΚΡΙΤΙΚΟΣ", self.portfolio_comparable)
+        self._write_sheet(workbook, "Current Portfolio", self.portfolio_current)
+        self._write_sheet(workbook, "Previous Portfolio", self.portfolio_previous)
+        workbook.save(path)
+        return path
@@ -0,0 +1,284 @@
+"""
+Entity index module for the Streamlit application.
+
+This module keeps a persistent index of every entity ever seen in the
+historical databases of both portfolios: one row per distinct combination of
+supply ID, building address, tenant, owner, tax ID and meter number, with the
+portfolio type and the first and last month it appeared in. The index is built
+from the histories once, then advanced with every month appended by
+TimeSeriesUpdate, and loaded once per process. The search bar uses it to find
+supplies and buildings that are no longer in the current month's portfolio,
+and to search by tenant, owner, tax ID or meter number.
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from constants import Constants
+from src.integrity_watermark import file_signature
+from src.normalise import tax_id_key
+
+PORTFOLIO_TYPES = ("eurobank", "management")
+
+
+class EntityIndex:
+    """
+    The entities of the historical databases, one row per supply, building, tenant, owner, tax ID and meter.
+
+    Attributes:
+        table (pd.DataFrame): 'portfolio_type', the entity columns, 'first_month'
+                              and 'last_month' (YYYYMM, NaN if unknown).
+        months (Dict[str, List[int]]): Processed_Month values applied per portfolio type.
+        sources (Dict[str, str]): file_signature of the history each type was built from.
+        version (int): Incremented on every change, to invalidate derived search indexes.
+        pending (Set[str]): Portfolio types advanced in memory with a month their
+                            history file does not hold yet.
+        columns (List[str]): Columns identifying an entity (class attribute).
+        path (str): Directory holding the index (class attribute).
+    """
+
+    columns = ['ΑΡ.ΠΑΡΟΧΗΣ', 'ΔΙΕΥΘΥΝΣΗ', 'ΕΝΟΙΚΟΣ', 'ΙΔΙΟΚΤΗΤΗΣ', 'ΑΦΜ', 'ΑΡ.ΜΕΤΡΗΤΗ']
+    path = os.path.join(Constants.CACHE_PATH, "entity_index")
+    _lock = threading.RLock()
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty entity index.
+
+        Returns:
+            None
+        """
+        self.table = pd.DataFrame(columns=['portfolio_type'] + self.columns + ['first_month', 'last_month'])
+        self.months = {}
+        self.sources = {}
+        self.version = 0
+        self.pending = set()
+
+    @classmethod
+    def load(cls) -> "EntityIndex":
+        """
+        Load the stored entity index.
+
+        Returns:
+            EntityIndex: The stored index, or an empty one.
+        """
+        index = cls()
+        entry = os.path.join(cls.path, "entities.pkl")
+        try:
+            stored = pd.read_pickle(entry) if os.path.exists(entry) else None
+        except Exception:
+            # A corrupt or incompatible index is rebuilt from the histories
+            stored = None
+        if isinstance(stored, dict) and list(stored["table"].columns) == list(index.table.columns):
+            index.__dict__.update(stored)
+        return index
+
+    def save(self) -> None:
+        """
+        Store the entity index atomically.
+
+        Portfolio types with pending months are stored without their source,
+        so the next process checks them against the history file again.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Writes a pickle file under Constants.CACHE_PATH/entity_index
+        """
+        os.makedirs(self.path, exist_ok=True)
+        entry = os.path.join(self.path, "entities.pkl")
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            stored = dict(self.__dict__, pending=set())
+            stored["sources"] = {portfolio_type: source for portfolio_type, source in self.sources.items()
+                                 if portfolio_type not in self.pending}
+            pd.to_pickle(stored, tmp_entry)
+            os.replace(tmp_entry, entry)
+
+    @classmethod
+    def entities(cls, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Extract the entity columns of a portfolio in a comparable form.
+
+        Supply IDs are made integers, since they are floats in the histories;
+        tax IDs are zero-padded strings (see tax_id_key) and meter numbers are
+        strings without decimals. Text columns keep their original spelling.
+
+        Args:
+            frame (pd.DataFrame): A monthly file or a historical database.
+
+        Returns:
+            pd.DataFrame: The entity columns of every row with a supply ID.
+        """
+        from src.update_timeseries import TimeSeriesUpdate
+
+        entities = frame.reindex(columns=cls.columns)
+        entities = entities.assign(**{'ΑΡ.ΠΑΡΟΧΗΣ': pd.to_numeric(entities['ΑΡ.ΠΑΡΟΧΗΣ'], errors='coerce')})
+        entities = entities.dropna(subset=['ΑΡ.ΠΑΡΟΧΗΣ']).astype(
+            {col: object for col in cls.columns if col != 'ΑΡ.ΠΑΡΟΧΗΣ'})
+        meters = entities['ΑΡ.ΜΕΤΡΗΤΗ'].dropna()
+        return entities.assign(**{
+            'ΑΡ.ΠΑΡΟΧΗΣ': entities['ΑΡ.ΠΑΡΟΧΗΣ'].astype('int64'),
+            'ΑΦΜ': entities['ΑΦΜ'].map(tax_id_key, na_action='ignore'),
+            'ΑΡ.ΜΕΤΡΗΤΗ': TimeSeriesUpdate.invoice_keys(meters).reindex(entities.index),
+        })
+
+    def advance(self, portfolio_type: str, frame: pd.DataFrame, processed_month: Optional[int] = None,
+                pending: bool = False) -> None:
+        """
+        Add the entities of a month (or of a whole history) to the index.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+            frame (pd.DataFrame): The new rows.
+            processed_month (Optional[int], optional): Month of the rows as YYYYMM.
+                Defaults to the rows' 'Processed_Month' column, if any.
+            pending (bool, optional): The rows are not in the history file yet, so
+                they are kept in memory until reconcile finds them there. Defaults to False.
+
+        Returns:
+            None
+        """
+        portfolio_type = portfolio_type.lower()
+        entities = self.entities(frame)
+        if processed_month is None and 'Processed_Month' in frame.columns:
+            months = pd.to_numeric(frame.loc[entities.index, 'Processed_Month'], errors='coerce')
+        else:
+            months = pd.Series(processed_month, index=entities.index, dtype='float64')
+        new = (entities.assign(portfolio_type=portfolio_type, month=months)
+               .groupby(['portfolio_type'] + self.columns, dropna=False)['month']
+               .agg(first_month='min', last_month='max').reset_index())
+
+        with self._lock:
+            merged = pd.concat([self.table, new], ignore_index=True)
+            self.table = (merged.groupby(['portfolio_type'] + self.columns, dropna=False)
+                          .agg(first_month=('first_month', 'min'), last_month=('last_month', 'max'))
+                          .reset_index()
+                          .astype({'first_month': 'float64', 'last_month': 'float64'}))
+            applied = set(self.months.get(portfolio_type, []))
+            self.months[portfolio_type] = sorted(applied | set(int(month) for month in months.dropna().unique()))
+            if pending:
+                self.pending.add(portfolio_type)
+            self.version += 1
+
+    def reconcile(self, portfolio_type: str, timeseries: pd.DataFrame, source: Optional[str] = None) -> List[int]:
+        """
+        Bring the entities of a portfolio type up to date with its historical database.
+
+        Only months not applied yet are read; if months were removed from the
+        history, the portfolio type's entities are rebuilt from all of it.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+            timeseries (pd.DataFrame): The historical database.
+            source (Optional[str], optional): file_signature of the file it was read from.
+
+        Returns:
+            List[int]: The months applied.
+
+        Side Effects:
+            - Saves the index if anything changed
+        """
+        portfolio_type = portfolio_type.lower()
+        if source is not None and self.sources.get(portfolio_type) == source:
+            return []
+
+        if 'Processed_Month' in timeseries.columns:
+            months = pd.to_numeric(timeseries['Processed_Month'], errors='coerce')
+        else:
+            months = pd.Series(np.nan, index=timeseries.index)
+        present = set(int(month) for month in months.dropna().unique())
+        applied = set(self.months.get(portfolio_type, []))
+        with self._lock:
+            self.pending.discard(portfolio_type)
+            if not applied or not applied <= present:
+                self.table = self.table[self.table['portfolio_type'] != portfolio_type]
+                self.months[portfolio_type] = []
+                self.advance(portfolio_type, timeseries)
+                added = sorted(present)
+            else:
+                added = sorted(present - applied)
+                if added:
+                    self.advance(portfolio_type, timeseries[months.isin(added)])
+            self.sources[portfolio_type] = source
+            self.save()
+        return added
+
+    def rows(self, portfolio_type: Optional[str] = None) -> pd.DataFrame:
+        """
+        Return the entity rows of one portfolio type, or of all of them.
+
+        Args:
+            portfolio_type (Optional[str], optional): Portfolio type ('eurobank' or
+                'management'). Defaults to None (both portfolio types).
+
+        Returns:
+            pd.DataFrame: The matching rows of the table.
+        """
+        if portfolio_type is None:
+            return self.table
+        return self.table[self.table['portfolio_type'] == portfolio_type.lower()]
+
+    def buildings(self, portfolio_type: Optional[str] = None) -> pd.Series:
+        """
+        Return every building address with the last month it was seen in.
+
+        Args:
+            portfolio_type (Optional[str], optional): Only addresses of this portfolio
+                type's history. Defaults to None (both portfolio types).
+
+        Returns:
+            pd.Series: Last month (YYYYMM) per address.
+        """
+        return self.rows(portfolio_type).dropna(subset=['ΔΙΕΥΘΥΝΣΗ']).groupby('ΔΙΕΥΘΥΝΣΗ')['last_month'].max()
+
+    def supplies(self, portfolio_type: Optional[str] = None) -> pd.Series:
+        """
+        Return every supply ID with the last month it was seen in.
+
+        Args:
+            portfolio_type (Optional[str], optional): Only supplies of this portfolio
+                type's history. Defaults to None (both portfolio types).
+
+        Returns:
+            pd.Series: Last month (YYYYMM) per supply ID.
+        """
+        return self.rows(portfolio_type).groupby('ΑΡ.ΠΑΡΟΧΗΣ')['last_month'].max()
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_index() -> EntityIndex:
+    """
+    Return the process-wide entity index, loaded once per server process.
+
+    Returns:
+        EntityIndex: The stored index, or an empty one.
+    """
+    return EntityIndex.load()
+
+
+def shared_entity_index() -> EntityIndex:
+    """
+    Return the process-wide entity index, up to date with the history files.
+
+    A history file is only read if it changed since the index was built from it.
+
+    Returns:
+        EntityIndex: The shared index.
+
+    Side Effects:
+        - Updates the stored index if a history file changed
+    """
+    from src.portfolio_store import PortfolioStore
+
+    index = _shared_index()
+    for portfolio_type in PORTFOLIO_TYPES:
+        path = f"{Constants.TIMESERIES_PATH}{portfolio_type}_historical_db.xlsx"
+        if os.path.exists(path) and index.sources.get(portfolio_type) != file_signature(path):
+            index.reconcile(portfolio_type, PortfolioStore.load_excel(path), source=file_signature(path))
+    return index
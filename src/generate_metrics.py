@@ -7,13 +7,18 @@ and creates interactive Plotly charts for debt distribution and time series anal
 """
 
 import streamlit as st
-import plotly.express as px
 import pandas as pd
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
 from constants import Constants
+from src.lazy_imports import lazy_import
+from src.normalise import building_key, with_building_key
+from src.portfolio_store import PortfolioStore
 from typing import Optional, Literal, Any
 
+# Plotly is only needed once a chart is drawn, so it is not imported at startup
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+plotly_subplots = lazy_import("plotly.subplots")
+
 class Metrics:
     """
     A class for generating metrics and visualizations from utility bill portfolio data.
@@ -30,20 +35,27 @@ class Metrics:
         is_valid (bool): Flag indicating if the metrics instance has valid data.
         debt_per_type (pd.DataFrame): Aggregated debt grouped by bill type.
         supply_ids (np.ndarray): Unique supply IDs in the filtered portfolio.
-        building_ids (np.ndarray): Unique building addresses in the filtered portfolio.
+        building_ids (np.ndarray): Unique building keys in the filtered portfolio.
         timeseries_data (pd.DataFrame): Historical time series data for the selected level.
     """
     
-    def __init__(self, portfolio: pd.DataFrame, level: Literal['bill', 'building', 'supply_id'] = 'bill', dropdown_selection: Optional[Any] = None) -> None:
+    def __init__(self, portfolio: pd.DataFrame, level: Literal['bill', 'building', 'supply_id'] = 'bill', dropdown_selection: Optional[Any] = None, history_path: str = Constants.TIMESERIES_PATH + "eurobank_historical_db.xlsx") -> None:
         """
         Initialize the Metrics instance with portfolio data and analysis level.
         
+        The portfolio is treated as read-only: it is usually a shared frame from
+        PortfolioStore, so derived columns are added to a new frame with assign().
+        Buildings are identified by the categorical building key computed at
+        ingest (see src.normalise), so address variants count as one building.
+        
         Args:
             portfolio (pd.DataFrame): The portfolio DataFrame containing bill data.
             level (Literal['bill', 'building', 'supply_id'], optional): The aggregation level
                 for analysis. Defaults to 'bill'.
             dropdown_selection (Optional[Any], optional): Building address (str) or supply ID (int)
                 to filter data when level is 'building' or 'supply_id'. Defaults to None.
+            history_path (str, optional): Historical database of the portfolio's type, used
+                for the time series. Defaults to the Eurobank historical database.
         
         Returns:
             None
@@ -53,35 +65,43 @@ class Metrics:
         self.dropdown_selection = dropdown_selection
         self.is_valid = False
         
-        self.portfolio = self._filter_portfolio_by_level(portfolio, level, dropdown_selection)
+        self.portfolio = self._filter_portfolio_by_level(with_building_key(portfolio), level, dropdown_selection)
         if self.portfolio is None or self.portfolio.empty:
             st.warning(f"No data available for the selected {level}.")
             return
         
-        self.portfolio['consumption'] = self.portfolio['ΚΥΒΙΚΑ 1'].fillna(0) + \
-                                    self.portfolio['ΚΥΒΙΚΑ 2'].fillna(0) + \
-                                    self.portfolio['ΚΥΒ.3'].fillna(0) + \
-                                    self.portfolio['ΚΥΒ.4'].fillna(0) + \
-                                    self.portfolio['ΚΥΒ.5'].fillna(0)
+        self.portfolio = self.portfolio.assign(consumption=self._total_consumption(self.portfolio))
                                     
         self.debt_per_type = self.portfolio.groupby('ΤΥΠΟΣ ΛΟΓΑΡΙΑΣΜΟΥ').agg({'ΟΦΕΙΛΗ': 'sum'}).reset_index()
         self.supply_ids = self.portfolio['ΑΡ.ΠΑΡΟΧΗΣ'].unique()
-        self.building_ids = self.portfolio['ΔΙΕΥΘΥΝΣΗ'].unique()
-
-        timeseries_data = pd.read_excel("data/eurobank_historical_db.xlsx")
-        timeseries_data['consumption'] = timeseries_data['ΚΥΒΙΚΑ 1'].fillna(0) + \
-                                    timeseries_data['ΚΥΒΙΚΑ 2'].fillna(0) + \
-                                    timeseries_data['ΚΥΒ.3'].fillna(0) + \
-                                    timeseries_data['ΚΥΒ.4'].fillna(0) + \
-                                    timeseries_data['ΚΥΒ.5'].fillna(0)
+        self.building_ids = self.portfolio[Constants.BUILDING_KEY_COLUMN].dropna().unique()
 
+        timeseries_data = PortfolioStore.load_excel(history_path, prepare=with_building_key)
         self.timeseries_data = self._filter_portfolio_by_level(timeseries_data, level, dropdown_selection)
         if self.timeseries_data is None or self.timeseries_data.empty:
             st.warning("No historical data available for the selected level and dropdown selection.")
             return
+        self.timeseries_data = self.timeseries_data.assign(consumption=self._total_consumption(self.timeseries_data))
         
         self.is_valid = True
 
+    @staticmethod
+    def _total_consumption(data: pd.DataFrame) -> pd.Series:
+        """
+        Sum the consumption tiers of each bill.
+        
+        Args:
+            data (pd.DataFrame): Portfolio DataFrame with the 'ΚΥΒΙΚΑ'/'ΚΥΒ.' tier columns.
+        
+        Returns:
+            pd.Series: Total cubic meters per row, with missing tiers counted as 0.
+        """
+        return data['ΚΥΒΙΚΑ 1'].fillna(0) + \
+               data['ΚΥΒΙΚΑ 2'].fillna(0) + \
+               data['ΚΥΒ.3'].fillna(0) + \
+               data['ΚΥΒ.4'].fillna(0) + \
+               data['ΚΥΒ.5'].fillna(0)
+
     @staticmethod
     def _filter_portfolio_by_level(data: pd.DataFrame, level: str, dropdown_selection: Optional[Any]) -> Optional[pd.DataFrame]:
         """
@@ -90,7 +110,8 @@ class Metrics:
         Args:
             data (pd.DataFrame): The portfolio DataFrame to filter.
             level (str): The aggregation level ('bill', 'building', or 'supply_id').
-            dropdown_selection (Optional[Any]): The value to filter by (building address or supply ID).
+            dropdown_selection (Optional[Any]): The value to filter by (building address or key,
+                or supply ID).
         
         Returns:
             Optional[pd.DataFrame]: Filtered DataFrame based on level, or None if level is invalid.
@@ -98,9 +119,13 @@ class Metrics:
         if level == 'bill':
             return data
         elif level == 'building':
-            return data[data['ΔΙΕΥΘΥΝΣΗ']==dropdown_selection]
+            # Compares integer category codes; any spelling of the address matches
+            return data[data[Constants.BUILDING_KEY_COLUMN] == building_key(dropdown_selection)]
         elif level == 'supply_id':
-            return data[data['ΑΡ.ΠΑΡΟΧΗΣ']==dropdown_selection]
+            # Supply IDs are ints in monthly files and floats in the histories; a
+            # selection may arrive as a string, so both sides are compared as numbers
+            supply = pd.to_numeric(dropdown_selection, errors='coerce')
+            return data[pd.to_numeric(data['ΑΡ.ΠΑΡΟΧΗΣ'], errors='coerce') == supply]
         else:
             return None
 
@@ -247,7 +272,7 @@ class Metrics:
         df = pd.DataFrame(monthly_data_display)
         df = df.sort_values('Month')
         
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        fig = plotly_subplots.make_subplots(specs=[[{"secondary_y": True}]])
         
         # Add debt trace (left y-axis)
         fig.add_trace(
@@ -0,0 +1,84 @@
+"""
+Password pre-hashing command for the Streamlit application.
+
+This module replaces every plain-text password in config.yaml with its bcrypt
+hash, so that the application never has to hash credentials while serving
+requests. Passwords that are already hashed are left unchanged, which makes
+the command safe to run repeatedly.
+
+To run: python -m src.hash_passwords [--config config.yaml] [--dry-run]
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, List
+
+import yaml
+
+from src.utils import generate_hashed_passwords, stauth
+
+
+def find_plain_text_users(config: Dict[str, Any]) -> List[str]:
+    """
+    List the users whose password in the config is not a bcrypt hash.
+
+    Args:
+        config (Dict[str, Any]): Parsed authentication config.
+
+    Returns:
+        List[str]: Usernames with plain-text passwords, in config order.
+    """
+    usernames = config['credentials']['usernames']
+    return [username for username, user in usernames.items()
+            if not stauth.Hasher.is_hash(str(user['password']))]
+
+
+def hash_config_passwords(config_path: str = "config.yaml", dry_run: bool = False) -> List[str]:
+    """
+    Hash all plain-text passwords in the config file in place.
+
+    Args:
+        config_path (str, optional): Path to the authentication config. Defaults to "config.yaml".
+        dry_run (bool, optional): Only report which users would be updated. Defaults to False.
+
+    Returns:
+        List[str]: Usernames whose passwords were (or would be) hashed.
+
+    Side Effects:
+        - Rewrites the config file unless dry_run is set or nothing needs hashing
+
+    Raises:
+        FileNotFoundError: If the config file is not found
+        yaml.YAMLError: If the config file is malformed
+    """
+    with open(config_path, encoding="utf-8") as file:
+        config = yaml.safe_load(file)
+
+    users = find_plain_text_users(config)
+    if not users or dry_run:
+        return users
+
+    usernames = config['credentials']['usernames']
+    hashed = generate_hashed_passwords([str(usernames[user]['password']) for user in users])
+    for user, password in zip(users, hashed):
+        usernames[user]['password'] = password
+
+    with open(config_path, "w", encoding="utf-8") as file:
+        yaml.safe_dump(config, file, sort_keys=False, allow_unicode=True)
+    return users
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-hash plain-text passwords in the auth config.")
+    parser.add_argument("--config", default="config.yaml", help="path to the authentication config")
+    parser.add_argument("--dry-run", action="store_true", help="list users without rewriting the file")
+    args = parser.parse_args()
+
+    updated = hash_config_passwords(args.config, dry_run=args.dry_run)
+    if not updated:
+        print("All passwords are already hashed.")
+    elif args.dry_run:
+        print(f"Would hash passwords for: {', '.join(updated)}")
+    else:
+        print(f"Hashed passwords for: {', '.join(updated)}")
+    sys.exit(0)
@@ -0,0 +1,381 @@
+"""
+Integrity watermark module for the Streamlit application.
+
+This module records which parts of a historical database have already been
+verified. The history is split into partitions by 'Processed_Month'; for every
+partition the watermark keeps a checksum and a small invariant summary (row
+count, duplicates, its composite-key hashes and invoice numbers). On the next
+upload only partitions whose checksum changed are verified again, and the new
+month is checked against the stored summaries instead of the whole history.
+A full re-verification can be started on demand as a background job.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from constants import Constants
+from src.streaming_checks import normalised_key_hashes
+from src.validation_engine import duplicate_key_groups, rule_set_version
+
+# Partition of rows without a Processed_Month
+UNKNOWN_PARTITION = -1
+
+
+def file_signature(path: str) -> str:
+    """
+    Identify a version of a file without reading it.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: The path, modification time and size of the file.
+    """
+    stat = os.stat(path)
+    return f"{path}@{stat.st_mtime_ns}:{stat.st_size}"
+
+
+@st.cache_resource(show_spinner=False)
+def _background_jobs() -> Tuple[ThreadPoolExecutor, Dict[str, Future]]:
+    """
+    Return the process-wide executor and running jobs for full re-verifications.
+
+    Returns:
+        Tuple[ThreadPoolExecutor, Dict[str, Future]]: A single-thread executor and
+                                                      the latest job per portfolio type.
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="integrity"), {}
+
+
+class IntegrityWatermark:
+    """
+    The verified state of a historical database, stored per partition.
+
+    Attributes:
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+        columns (List[str]): Columns of the history when it was last verified.
+        source (Optional[str]): file_signature of the verified history file, if any.
+        rules (str): rule_set_version the partitions were verified under.
+        partitions (Dict[int, Dict[str, Any]]): Invariant summary per Processed_Month.
+        full_verification (Optional[str]): Time of the last full re-verification.
+        path (str): Directory holding the watermarks (class attribute).
+        key_columns (List[str]): Composite key used for duplicates (class attribute).
+    """
+
+    path = os.path.join(Constants.CACHE_PATH, "watermarks")
+    key_columns = Constants.DUPLICATE_KEY_COLUMNS
+    _lock = threading.Lock()
+
+    def __init__(self, portfolio_type: str) -> None:
+        """
+        Initialize an empty watermark (nothing verified yet).
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            None
+        """
+        self.portfolio_type = portfolio_type.lower()
+        self.columns = []
+        self.source = None
+        self.rules = rule_set_version()
+        self.partitions = {}
+        self.full_verification = None
+
+    @classmethod
+    def load(cls, portfolio_type: str) -> "IntegrityWatermark":
+        """
+        Load the stored watermark of a portfolio type.
+
+        A watermark recorded under other validation rules is discarded, so
+        every partition is verified again under the current rules.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            IntegrityWatermark: The stored watermark, or an empty one.
+        """
+        watermark = cls(portfolio_type)
+        entry = os.path.join(cls.path, f"{watermark.portfolio_type}.pkl")
+        try:
+            stored = pd.read_pickle(entry) if os.path.exists(entry) else None
+        except Exception:
+            # A corrupt or incompatible watermark is rebuilt by the next reconcile
+            stored = None
+        if isinstance(stored, dict) and stored.get("rules") == watermark.rules:
+            watermark.__dict__.update(stored)
+            # Watermarks stored before the counting rule changed are corrected on load
+            watermark.count_cross_duplicates()
+        return watermark
+
+    def save(self) -> None:
+        """
+        Store the watermark atomically.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Writes a pickle file under Constants.CACHE_PATH/watermarks
+        """
+        os.makedirs(self.path, exist_ok=True)
+        entry = os.path.join(self.path, f"{self.portfolio_type}.pkl")
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            pd.to_pickle(dict(self.__dict__), tmp_entry)
+            os.replace(tmp_entry, entry)
+
+    @staticmethod
+    def partition_of(timeseries: pd.DataFrame) -> pd.Series:
+        """
+        Return the partition (Processed_Month) of every row.
+
+        Args:
+            timeseries (pd.DataFrame): The historical database.
+
+        Returns:
+            pd.Series: Integer month per row, UNKNOWN_PARTITION where it is missing.
+        """
+        if 'Processed_Month' not in timeseries.columns:
+            return pd.Series(UNKNOWN_PARTITION, index=timeseries.index)
+        months = pd.to_numeric(timeseries['Processed_Month'], errors='coerce')
+        return months.fillna(UNKNOWN_PARTITION).astype('int64')
+
+    @classmethod
+    def checksums(cls, timeseries: pd.DataFrame) -> Dict[int, str]:
+        """
+        Compute the checksum of every partition in one hashing pass.
+
+        Args:
+            timeseries (pd.DataFrame): The historical database.
+
+        Returns:
+            Dict[int, str]: SHA-256 over the row hashes of each partition, in row order.
+        """
+        row_hashes = pd.util.hash_pandas_object(timeseries, index=False).to_numpy()
+        partitions = cls.partition_of(timeseries).to_numpy()
+        order = np.argsort(partitions, kind="stable")
+        months, starts = np.unique(partitions[order], return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+        header = "\x1f".join(map(str, timeseries.columns)).encode("utf-8")
+        return {int(month): hashlib.sha256(header + row_hashes[order[start:end]].tobytes()).hexdigest()
+                for month, start, end in zip(months, starts, bounds)}
+
+    def _summarise(self, partition: pd.DataFrame, checksum: str) -> Dict[str, Any]:
+        """
+        Verify one partition and build its invariant summary.
+
+        Duplicates with other partitions depend on the whole history and are
+        filled in by count_cross_duplicates().
+
+        Args:
+            partition (pd.DataFrame): Rows of one Processed_Month.
+            checksum (str): The partition's checksum.
+
+        Returns:
+            Dict[str, Any]: Row count, duplicates within the partition, key hashes
+                            and invoice numbers.
+        """
+        from src.update_timeseries import TimeSeriesUpdate
+
+        has_keys = all(col in partition.columns for col in self.key_columns)
+        keys = normalised_key_hashes(partition, self.key_columns) if has_keys else np.empty(0, dtype=np.uint64)
+        _, num_duplicates = duplicate_key_groups(partition, self.key_columns) if has_keys else (None, 0)
+        invoices = (TimeSeriesUpdate.invoice_keys(partition['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ'].dropna()).unique()
+                    if 'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ' in partition.columns else np.empty(0, dtype=object))
+        return {
+            "rows": len(partition),
+            "checksum": checksum,
+            "num_duplicates": int(num_duplicates),
+            "cross_duplicates": 0,
+            "keys": np.unique(keys),
+            "invoices": np.asarray(invoices, dtype=object),
+            "verified_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def reconcile(self, timeseries: pd.DataFrame, source: Optional[str] = None, save: bool = True) -> List[int]:
+        """
+        Bring the watermark up to date with a historical database.
+
+        If the history is the same file version that was last verified, nothing
+        is read. Otherwise the partitions are checksummed in one pass and only
+        new or changed partitions are verified; removed partitions are dropped.
+
+        Args:
+            timeseries (pd.DataFrame): The historical database.
+            source (Optional[str], optional): file_signature of the file it was
+                read from. Defaults to None (always checksum).
+            save (bool, optional): Store the watermark afterwards. Defaults to True.
+
+        Returns:
+            List[int]: The partitions that were verified again.
+
+        Side Effects:
+            - Saves the watermark if anything changed and save is True
+        """
+        if source is not None and source == self.source and self.columns == list(timeseries.columns):
+            return []
+
+        checksums = self.checksums(timeseries)
+        changed = [month for month, checksum in checksums.items()
+                   if self.partitions.get(month, {}).get("checksum") != checksum]
+        removed = [month for month in self.partitions if month not in checksums]
+        for month in removed:
+            del self.partitions[month]
+
+        if changed:
+            partition_of = self.partition_of(timeseries)
+            for month in changed:
+                self.partitions[month] = self._summarise(timeseries[partition_of == month], checksums[month])
+        if changed or removed:
+            self.count_cross_duplicates()
+
+        self.columns = list(timeseries.columns)
+        self.source = source
+        if save:
+            self.save()
+        return changed
+
+    def count_cross_duplicates(self) -> None:
+        """
+        Count, for every partition, the keys that already appear in an earlier partition.
+
+        Each key repeated across partitions is counted once per later partition
+        holding it, so a pair of partitions is never counted twice. Together
+        with the duplicates within partitions this adds up to every row beyond
+        the first with the same key.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Updates the 'cross_duplicates' of every partition summary
+        """
+        seen = np.empty(0, dtype=np.uint64)
+        for month in sorted(self.partitions):
+            summary = self.partitions[month]
+            summary["cross_duplicates"] = int(np.isin(summary["keys"], seen, assume_unique=True).sum())
+            seen = np.union1d(seen, summary["keys"])
+
+    def missing_columns(self) -> List[str]:
+        """
+        List the required columns missing from the verified history.
+
+        Returns:
+            List[str]: Required column names that were not in the history.
+        """
+        return [col for col in Constants.COLUMN_NAMES if col not in self.columns]
+
+    def num_duplicates(self) -> int:
+        """
+        Count duplicate rows across the verified history from the partition summaries.
+
+        Returns:
+            int: Duplicates within partitions plus rows repeating another partition's key.
+        """
+        return sum(summary["num_duplicates"] + summary["cross_duplicates"] for summary in self.partitions.values())
+
+    def duplicate_rows(self, timeseries: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        Return the duplicate rows of the partitions whose summary reports duplicates.
+
+        Only those partitions are scanned, together with the partitions holding
+        the other rows of their duplicates across partitions, so every group
+        is complete.
+
+        Args:
+            timeseries (pd.DataFrame): The historical database.
+
+        Returns:
+            Optional[pd.DataFrame]: The duplicate rows with their 'Duplicate Group',
+                                    or None if there are none.
+        """
+        months = [month for month, summary in self.partitions.items()
+                  if summary["num_duplicates"] or summary["cross_duplicates"]]
+        if not months:
+            return None
+        shared = [summary["keys"] for month, summary in self.partitions.items()
+                  if month in months and summary["cross_duplicates"]]
+        if shared:
+            shared = np.concatenate(shared)
+            months += [month for month, summary in self.partitions.items()
+                       if month not in months and np.isin(summary["keys"], shared).any()]
+        rows = timeseries[self.partition_of(timeseries).isin(months)]
+        groups, _ = duplicate_key_groups(rows, self.key_columns)
+        duplicates = rows[groups >= 0].copy()
+        duplicates.insert(0, "Duplicate Group", groups[groups >= 0] + 1)
+        return duplicates.sort_values("Duplicate Group", kind="stable")
+
+    def existing_invoices(self, new_file: pd.DataFrame) -> Tuple[List[str], int]:
+        """
+        Find invoices of a new month that are already in the verified history.
+
+        Args:
+            new_file (pd.DataFrame): The new monthly file.
+
+        Returns:
+            Tuple[List[str], int]: Invoice numbers found in both, and the number of
+                                   distinct invoices in the new file.
+        """
+        from src.update_timeseries import TimeSeriesUpdate
+
+        new_invoices = TimeSeriesUpdate.invoice_keys(new_file['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ']).unique()
+        known = [summary["invoices"] for summary in self.partitions.values()]
+        if not known:
+            return [], len(new_invoices)
+        # A hash lookup: np.isin compares object arrays pair by pair
+        common = new_invoices[pd.Index(new_invoices).isin(np.concatenate(known))]
+        return list(common), len(new_invoices)
+
+    @classmethod
+    def start_full_verification(cls, portfolio_type: str) -> Future:
+        """
+        Re-verify every partition of a historical database in a background thread.
+
+        The stored watermark is ignored and rebuilt from the history file. Only
+        one re-verification runs per portfolio type at a time.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            Future: The running (or already running) job; its result is the new watermark.
+        """
+        executor, jobs = _background_jobs()
+        portfolio_type = portfolio_type.lower()
+        job = jobs.get(portfolio_type)
+        if job is not None and not job.done():
+            return job
+
+        def verify() -> "IntegrityWatermark":
+            path = f"{Constants.TIMESERIES_PATH}{portfolio_type}_historical_db.xlsx"
+            watermark = cls(portfolio_type)
+            watermark.reconcile(pd.read_excel(path), source=file_signature(path))
+            watermark.full_verification = datetime.now().isoformat(timespec="seconds")
+            watermark.save()
+            return watermark
+
+        jobs[portfolio_type] = executor.submit(verify)
+        return jobs[portfolio_type]
+
+    @classmethod
+    def full_verification_job(cls, portfolio_type: str) -> Optional[Future]:
+        """
+        Return the latest full re-verification job of a portfolio type.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            Optional[Future]: The job, or None if none was started in this process.
+        """
+        return _background_jobs()[1].get(portfolio_type.lower())
@@ -0,0 +1,98 @@
+"""
+Lazy import module for the Streamlit application.
+
+This module provides a lightweight module proxy that defers importing heavy
+third-party dependencies (plotly, streamlit_authenticator, yaml, ...) until a
+feature first accesses one of their attributes, so that server boot and the
+first page render only pay for what they actually use.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict
+
+
+# Wall-clock seconds spent resolving each lazily imported module on first use
+IMPORT_TIMINGS: Dict[str, float] = {}
+
+_import_lock = threading.Lock()
+
+
+class LazyModule(ModuleType):
+    """
+    A module proxy that imports the real module on first attribute access.
+
+    The proxy can be used exactly like the module it stands for
+    (e.g. ``px.pie(...)``). The first attribute lookup triggers the actual
+    import, records how long it took in IMPORT_TIMINGS, and caches the loaded
+    module so that subsequent lookups cost a single dictionary access.
+
+    Attributes:
+        _lazy_name (str): Fully qualified name of the module to import.
+        _lazy_module (Optional[ModuleType]): The loaded module, None until first use.
+    """
+
+    def __init__(self, module_name: str) -> None:
+        """
+        Initialize the LazyModule proxy.
+
+        Args:
+            module_name (str): Fully qualified module name, e.g. "plotly.express".
+
+        Returns:
+            None
+        """
+        super().__init__(module_name)
+        self._lazy_name = module_name
+        self._lazy_module = None
+
+    def _load(self) -> ModuleType:
+        """
+        Import the proxied module if it has not been imported yet.
+
+        Returns:
+            ModuleType: The real, fully initialised module.
+        """
+        if self._lazy_module is None:
+            with _import_lock:
+                if self._lazy_module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._lazy_name)
+                    IMPORT_TIMINGS[self._lazy_name] = time.perf_counter() - start
+                    self._lazy_module = module
+        return self._lazy_module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __dir__(self) -> list:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<LazyModule '{self._lazy_name}' ({state})>"
+
+
+def lazy_import(module_name: str) -> ModuleType:
+    """
+    Return a module that is only imported when it is first used.
+
+    If the module is already present in sys.modules (because something else
+    imported it eagerly), the real module is returned directly.
+
+    Args:
+        module_name (str): Fully qualified module name to import lazily.
+
+    Returns:
+        ModuleType: The real module if already imported, otherwise a LazyModule proxy.
+
+    Example:
+        >>> px = lazy_import("plotly.express")
+        >>> fig = px.pie(df, names="ΤΥΠΟΣ ΛΟΓΑΡΙΑΣΜΟΥ", values="ΟΦΕΙΛΗ")  # plotly imported here
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    return LazyModule(module_name)
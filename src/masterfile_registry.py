@@ -0,0 +1,379 @@
+"""
+Master file registry module for the Streamlit application.
+
+This module holds each portfolio type's master file in memory together with a
+hashed index of its supply IDs ('Παροχή'), so checking an upload for new
+supplies is one vectorised isin() on integer keys. The parsed master file is
+stored next to the cache as a pickle sidecar, keyed by the Excel file's
+modification time and size: the workbook is only parsed again after it
+changes, even across server restarts, and a registry is loaded once per
+process and file version.
+
+New supplies are upserted into the registry by supply ID. Each upsert is
+appended to a delta log next to the master file (one pickled frame per
+write), so the workbook is never rewritten; the log is source data, not a
+cache, and is replayed on top of the workbook on load. An up-to-date
+workbook is only generated, in openpyxl's streaming write-only mode, when
+someone downloads it, and every download is recorded in the log. Upserts
+are dropped from the log only once a workbook downloaded after them has
+replaced the master file, so supplies removed from it by hand do not come
+back and supplies never downloaded are never lost.
+"""
+
+import io
+import os
+import pickle
+import threading
+from typing import Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from constants import Constants
+from openpyxl import Workbook
+from src.integrity_watermark import file_signature
+
+SUPPLY_COLUMN = 'Παροχή'
+
+
+def supply_keys(supplies: pd.Series) -> pd.Series:
+    """
+    Convert supply IDs to nullable integers, whatever their dtype.
+
+    Args:
+        supplies (pd.Series): Supply IDs (int, float or text).
+
+    Returns:
+        pd.Series: 'Int64' supply IDs; values that are not whole numbers are <NA>.
+    """
+    numeric = pd.to_numeric(supplies, errors='coerce')
+    return numeric.where(numeric % 1 == 0).astype('Int64')
+
+
+class MasterFileRegistry:
+    """
+    A portfolio type's master file with a hashed index of its supply IDs.
+
+    Attributes:
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+        source (str): file_signature of the master file the registry was read from.
+        masterfile (pd.DataFrame): The master file.
+        supply_ids (pd.Index): Distinct integer supply IDs of the master file.
+        upserted (pd.Index): Supply IDs upserted from the delta log, which the
+                             workbook does not hold yet.
+        path (str): Directory holding the sidecars (class attribute).
+    """
+
+    path = os.path.join(Constants.CACHE_PATH, "masterfiles")
+    _lock = threading.Lock()
+
+    def __init__(self, portfolio_type: str, masterfile: pd.DataFrame, source: str) -> None:
+        """
+        Index the supply IDs of a master file.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+            masterfile (pd.DataFrame): The master file.
+            source (str): file_signature of the file it was read from.
+
+        Returns:
+            None
+        """
+        self.portfolio_type = portfolio_type.lower()
+        self.source = source
+        self.masterfile = masterfile
+        self.supply_ids = pd.Index(supply_keys(masterfile[SUPPLY_COLUMN]).dropna().unique().astype('int64'))
+        self.upserted = pd.Index([], dtype='int64')
+
+    @staticmethod
+    def masterfile_path(portfolio_type: str) -> str:
+        """
+        Return the path of a portfolio type's master file.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            str: Path of the Excel master file.
+        """
+        return f"{Constants.MASTERFILE_PATH}{portfolio_type.lower()}_masterfile.xlsx"
+
+    @staticmethod
+    def delta_path(portfolio_type: str) -> str:
+        """
+        Return the path of a portfolio type's delta log, next to its master file.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            str: Path of the append-only log of upserted rows and downloads.
+        """
+        return f"{Constants.MASTERFILE_PATH}{portfolio_type.lower()}_masterfile_delta.pkl"
+
+    @classmethod
+    def read_deltas(cls, portfolio_type: str) -> Tuple[List[Any], int]:
+        """
+        Read the delta log of a portfolio type, oldest first.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            Tuple[List[Any], int]: The log's entries (empty if there is none) and
+                the byte offset where the readable entries end. An entry is either
+                the pd.DataFrame of one upsert or a {'downloaded': source} dict
+                recording a download of the workbook version `source`.
+        """
+        deltas = []
+        end = 0
+        if not os.path.exists(cls.delta_path(portfolio_type)):
+            return deltas, end
+        with open(cls.delta_path(portfolio_type), "rb") as file:
+            while True:
+                try:
+                    deltas.append(pickle.load(file))
+                except Exception:
+                    # End of the log, or a write cut short; upsert() cuts the torn
+                    # tail off before appending, so it is always the last frame
+                    break
+                end = file.tell()
+        return deltas, end
+
+    @classmethod
+    def load(cls, portfolio_type: str) -> "MasterFileRegistry":
+        """
+        Load a master file from its sidecar, or parse it if it changed since,
+        and replay the upserts of the delta log on top of it.
+
+        Upserts recorded before a download of an earlier workbook version
+        are dropped from the log: the workbook that replaced that version
+        already holds them (or had them removed by hand).
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            MasterFileRegistry: The registry of the current master file.
+
+        Raises:
+            FileNotFoundError: If the master file does not exist
+
+        Side Effects:
+            - Writes the sidecar under Constants.CACHE_PATH/masterfiles after parsing
+            - Rewrites the delta log without the upserts a replaced workbook holds
+        """
+        source = file_signature(cls.masterfile_path(portfolio_type))
+        entry = os.path.join(cls.path, f"{portfolio_type.lower()}.pkl")
+        try:
+            stored = pd.read_pickle(entry) if os.path.exists(entry) else None
+        except Exception:
+            # A corrupt or incompatible sidecar is replaced below
+            stored = None
+        if isinstance(stored, dict) and stored.get("source") == source:
+            registry = cls(portfolio_type, stored["masterfile"], source)
+        else:
+            registry = cls(portfolio_type, pd.read_excel(cls.masterfile_path(portfolio_type)), source)
+            registry.save()
+        with cls._lock:
+            entries, _ = cls.read_deltas(portfolio_type)
+            # The last download of a workbook version that has since been replaced
+            replaced = max((position for position, entry in enumerate(entries)
+                            if isinstance(entry, dict) and entry.get("downloaded") != source), default=-1)
+            if replaced >= 0:
+                entries = entries[replaced + 1:]
+                registry._rewrite_log(entries)
+        for entry in entries:
+            if isinstance(entry, pd.DataFrame):
+                registry._apply(entry)
+                registry.upserted = registry.upserted.union(
+                    pd.Index(supply_keys(entry[SUPPLY_COLUMN]).dropna().astype('int64')))
+        return registry
+
+    def save(self) -> None:
+        """
+        Store the parsed master file atomically.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Writes a pickle file under Constants.CACHE_PATH/masterfiles
+        """
+        os.makedirs(self.path, exist_ok=True)
+        entry = os.path.join(self.path, f"{self.portfolio_type}.pkl")
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            pd.to_pickle({"source": self.source, "masterfile": self.masterfile}, tmp_entry)
+            os.replace(tmp_entry, entry)
+
+    def _append(self, entry: Any) -> None:
+        """
+        Append one entry to the delta log durably; the caller holds the lock.
+
+        Args:
+            entry (Any): An upserted pd.DataFrame or a {'downloaded': source} dict.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Appends to the delta log next to the master file, cutting off an
+              entry torn by an interrupted write first
+        """
+        _, end = self.read_deltas(self.portfolio_type)
+        with open(self.delta_path(self.portfolio_type), "ab") as file:
+            # Entries appended after a torn one could never be read back
+            file.truncate(end)
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _rewrite_log(self, entries: List[Any]) -> None:
+        """
+        Replace the delta log atomically, or remove it if no entries are left;
+        the caller holds the lock.
+
+        Args:
+            entries (List[Any]): The entries to keep, oldest first.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Rewrites or removes the delta log next to the master file
+        """
+        log = self.delta_path(self.portfolio_type)
+        if not entries:
+            os.remove(log)
+            return
+        tmp_log = f"{log}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_log, "wb") as file:
+            for entry in entries:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_log, log)
+
+    def _apply(self, rows: pd.DataFrame) -> None:
+        """
+        Upsert rows into the in-memory master file.
+
+        Rows with a new supply ID are appended; for a known supply ID, the row's
+        non-empty values replace the stored ones and the others are kept.
+
+        Args:
+            rows (pd.DataFrame): Rows with the master file's columns.
+
+        Returns:
+            None
+        """
+        columns = self.masterfile.columns
+        merged = pd.concat([self.masterfile, rows.reindex(columns=columns)], ignore_index=True)
+        keys = supply_keys(merged[SUPPLY_COLUMN])
+        # groupby().last() takes the last non-empty value of every column per supply
+        upserted = merged[keys.notna()].groupby(keys[keys.notna()], sort=False).last()
+        upserted = upserted.assign(**{SUPPLY_COLUMN: upserted.index.astype('int64')}).reset_index(drop=True)
+        without_key = merged[keys.isna().to_numpy()]
+        self.masterfile = (pd.concat([upserted, without_key], ignore_index=True) if len(without_key) else upserted)[columns]
+        self.supply_ids = pd.Index(upserted[SUPPLY_COLUMN])
+
+    def upsert(self, rows: pd.DataFrame) -> int:
+        """
+        Merge rows into the master file by supply ID and append them to the delta log.
+
+        Args:
+            rows (pd.DataFrame): Rows with the master file's columns; rows
+                                 without a whole-number supply ID are ignored.
+
+        Returns:
+            int: Number of rows written.
+
+        Side Effects:
+            - Appends one frame to the delta log next to the master file
+        """
+        rows = rows.reindex(columns=self.masterfile.columns)
+        keys = supply_keys(rows[SUPPLY_COLUMN])
+        rows = rows[keys.notna().to_numpy()].assign(**{SUPPLY_COLUMN: keys.dropna().astype('int64')})
+        if rows.empty:
+            return 0
+        with self._lock:
+            self._append(rows)
+            self._apply(rows)
+            self.upserted = self.upserted.union(pd.Index(rows[SUPPLY_COLUMN]))
+        return len(rows)
+
+    def to_xlsx(self) -> bytes:
+        """
+        Write the up-to-date master file as a workbook, streaming rows one at a time.
+
+        Returns:
+            bytes: The .xlsx file, with the columns of the original master file.
+
+        Side Effects:
+            - Records the download in the delta log, so the upserts it holds are
+              dropped once the workbook replaces the master file
+        """
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        worksheet.append(list(self.masterfile.columns))
+        for row in self.masterfile.itertuples(index=False, name=None):
+            worksheet.append([None if pd.isna(value) else value for value in row])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        if len(self.upserted):
+            with self._lock:
+                self._append({"downloaded": self.source})
+        return buffer.getvalue()
+
+    def untracked(self, supplies: pd.Series) -> np.ndarray:
+        """
+        Tell which supply IDs are missing from the master file.
+
+        Args:
+            supplies (pd.Series): Supply IDs ('ΑΡ.ΠΑΡΟΧΗΣ') of any dtype.
+
+        Returns:
+            np.ndarray: Boolean mask, True where the supply ID is not in the
+                        master file (or is not a whole number).
+        """
+        keys = supply_keys(supplies)
+        return ~(keys.isin(self.supply_ids).fillna(False).to_numpy(dtype=bool))
+
+
+# One current master file version per portfolio type
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _shared_registry(portfolio_type: str, source: str) -> MasterFileRegistry:
+    """
+    Return the registry of one master file version, loaded once per process.
+
+    Args:
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+        source (str): file_signature of the master file and its delta log (part of the cache key).
+
+    Returns:
+        MasterFileRegistry: The shared registry.
+    """
+    return MasterFileRegistry.load(portfolio_type)
+
+
+def masterfile_registry(portfolio_type: str) -> MasterFileRegistry:
+    """
+    Return the shared registry of a portfolio type's current master file.
+
+    Args:
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+    Returns:
+        MasterFileRegistry: The registry, re-read only if the file or its delta log changed.
+
+    Raises:
+        FileNotFoundError: If the master file does not exist
+    """
+    portfolio_type = portfolio_type.lower()
+    source = file_signature(MasterFileRegistry.masterfile_path(portfolio_type))
+    delta_path = MasterFileRegistry.delta_path(portfolio_type)
+    if os.path.exists(delta_path):
+        # Upserts from another process change the log, so they are picked up too
+        source += f"+{file_signature(delta_path)}"
+    return _shared_registry(portfolio_type, source)
@@ -0,0 +1,127 @@
+"""
+Text normalisation module for the Streamlit application.
+
+This module maps free-text values to canonical forms so that spelling variants
+of the same thing compare equal. Greek text is folded (accents such as the
+tonos removed, case folded, whitespace collapsed), and building addresses
+('ΚΑΛΛΙΡΡΟΗΣ 21  Δήμος ΑΘΗΝΑΙΩΝ ΤΚ 11743') are parsed into a canonical
+building key. Tax IDs ('ΑΦΜ') are written as 9-digit strings. Series are
+normalised once per distinct value, not per row.
+"""
+
+import re
+import unicodedata
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from constants import Constants
+
+WHITESPACE = re.compile(r"\s+")
+
+# '<street and number> Δήμος <municipality> ΤΚ <postcode>', after folding
+# (folding turns 'Δήμος' into 'δημοσ')
+ADDRESS_PATTERN = re.compile(r"^(?P<street>.*?)\s*\bδημοσ\s+(?P<municipality>.*?)\s*\bτκ\s*(?P<postcode>\d{3}\s?\d{2})$")
+
+
+def fold_text(text: Optional[str]) -> str:
+    """
+    Fold text for accent- and case-insensitive comparison.
+
+    Accents (Greek tonos and dialytika included) are removed, the text is
+    casefolded (which also turns the final sigma 'ς' into 'σ') and runs of
+    whitespace are collapsed to one space.
+
+    Args:
+        text (Optional[str]): The text to fold; None and NaN give "".
+
+    Returns:
+        str: The folded text, e.g. 'Δήμος  ΑΘΗΝΑΙΩΝ' -> 'δημοσ αθηναιων'.
+    """
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return ""
+    decomposed = unicodedata.normalize("NFD", str(text))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return WHITESPACE.sub(" ", stripped.casefold()).strip()
+
+
+def tax_id_key(tax_id: Optional[object]) -> str:
+    """
+    Map a tax ID ('ΑΦΜ') to its canonical 9-digit form.
+
+    The historical databases store tax IDs as floats, which drops the leading
+    zero of some of them ('94014249.0' for '094014249').
+
+    Args:
+        tax_id (Optional[object]): The raw 'ΑΦΜ' value (number or text); None and NaN give "".
+
+    Returns:
+        str: The tax ID zero-padded to 9 digits, or its folded text if it is not a number.
+    """
+    number = pd.to_numeric(tax_id, errors="coerce")
+    if pd.isna(number) or number != int(number):
+        return WHITESPACE.sub("", fold_text(tax_id))
+    return str(int(number)).zfill(9)
+
+
+def building_key(address: Optional[str]) -> str:
+    """
+    Map a building address to its canonical building key.
+
+    The address is folded and split into street (with number), municipality
+    and postcode. Addresses that do not follow the usual layout keep their
+    folded text as key.
+
+    Args:
+        address (Optional[str]): The raw 'ΔΙΕΥΘΥΝΣΗ' value.
+
+    Returns:
+        str: 'street|municipality|postcode', e.g. 'καλλιρροησ 21|αθηναιων|11743'.
+    """
+    folded = fold_text(address)
+    match = ADDRESS_PATTERN.match(folded)
+    if match is None:
+        return folded
+    postcode = match.group("postcode").replace(" ", "")
+    return f"{match.group('street')}|{match.group('municipality')}|{postcode}"
+
+
+def building_keys(addresses: pd.Series) -> pd.Series:
+    """
+    Compute the building key of every row as a categorical column.
+
+    Each distinct address is parsed once; rows only carry small integer codes.
+
+    Args:
+        addresses (pd.Series): Raw 'ΔΙΕΥΘΥΝΣΗ' values.
+
+    Returns:
+        pd.Series: Categorical building keys aligned with addresses (NaN where
+                   the address is missing).
+    """
+    codes, uniques = pd.factorize(addresses)
+    keys = [building_key(address) for address in uniques]
+    categories = pd.Index(sorted(set(keys)))
+    key_codes = categories.get_indexer(keys) if keys else np.empty(0, dtype=np.intp)
+    row_codes = np.where(codes >= 0, key_codes[np.maximum(codes, 0)] if keys else -1, -1)
+    return pd.Series(pd.Categorical.from_codes(row_codes, categories=categories),
+                     index=addresses.index, name=Constants.BUILDING_KEY_COLUMN)
+
+
+def with_building_key(portfolio: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the categorical building key column to a portfolio, once.
+
+    The column is for in-memory grouping and filtering only; it is not part of
+    the portfolio schema and is never written to the historical database.
+
+    Args:
+        portfolio (pd.DataFrame): Portfolio or history with a 'ΔΙΕΥΘΥΝΣΗ' column.
+
+    Returns:
+        pd.DataFrame: A new frame with Constants.BUILDING_KEY_COLUMN, or the
+                      portfolio unchanged if it already has it or has no addresses.
+    """
+    if Constants.BUILDING_KEY_COLUMN in portfolio.columns or 'ΔΙΕΥΘΥΝΣΗ' not in portfolio.columns:
+        return portfolio
+    return portfolio.assign(**{Constants.BUILDING_KEY_COLUMN: building_keys(portfolio['ΔΙΕΥΘΥΝΣΗ'])})
@@ -0,0 +1,158 @@
+"""
+Shared portfolio store module for the Streamlit application.
+
+This module keeps a single, process-wide copy of every distinct portfolio
+DataFrame, keyed by a hash of its content. Sessions only keep the key in
+st.session_state, so memory grows with the number of distinct files rather
+than with the number of users looking at them.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import pandas as pd
+import streamlit as st
+from constants import Constants
+
+# Copy-on-write lets every session share the stored frame: derived frames and
+# shallow copies reuse its memory and only copy a column when it is modified.
+# It is always on (and the option deprecated) from pandas 3.0.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_frames() -> "OrderedDict[str, pd.DataFrame]":
+    """
+    Return the process-wide frame dictionary, created once per server process.
+
+    Returns:
+        OrderedDict[str, pd.DataFrame]: Stored frames in least-recently-used order.
+    """
+    return OrderedDict()
+
+
+class PortfolioStore:
+    """
+    A process-wide, content-addressed store of read-only portfolio DataFrames.
+
+    Frames are stored once per distinct content and handed out as shallow
+    copies, which under pandas copy-on-write share memory with the stored
+    frame but can never modify it. The least recently used frames are evicted
+    once more than max_entries are held.
+
+    Attributes:
+        max_entries (int): Maximum number of frames kept in memory (class attribute).
+    """
+
+    max_entries = Constants.PORTFOLIO_STORE_MAX_ENTRIES
+    _lock = threading.Lock()
+
+    @staticmethod
+    def content_key(df: pd.DataFrame) -> str:
+        """
+        Compute a content hash for a DataFrame.
+
+        The hash covers column names and every cell value (not the index), so
+        the same data loaded in two sessions maps to the same key.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to hash.
+
+        Returns:
+            str: Hex SHA-256 digest of the frame's content.
+        """
+        digest = hashlib.sha256()
+        digest.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def put(cls, df: pd.DataFrame, key: Optional[str] = None) -> str:
+        """
+        Add a DataFrame to the store, reusing the stored copy if it already exists.
+
+        Args:
+            df (pd.DataFrame): The portfolio DataFrame to store.
+            key (Optional[str], optional): Precomputed content key (e.g. the hash of
+                the uploaded file). Defaults to the hash of the frame's content.
+
+        Returns:
+            str: The key under which the frame is stored.
+        """
+        key = key or cls.content_key(df)
+        frames = _shared_frames()
+        with cls._lock:
+            if key in frames:
+                frames.move_to_end(key)
+            else:
+                frames[key] = df.copy(deep=False)
+                while len(frames) > cls.max_entries:
+                    frames.popitem(last=False)
+        return key
+
+    @classmethod
+    def get(cls, key: Optional[str]) -> Optional[pd.DataFrame]:
+        """
+        Return a read-only view of a stored DataFrame.
+
+        Args:
+            key (Optional[str]): The key returned by put().
+
+        Returns:
+            Optional[pd.DataFrame]: A shallow copy sharing memory with the stored frame,
+                                    or None if the key is unknown or was evicted.
+        """
+        frames = _shared_frames()
+        with cls._lock:
+            df = frames.get(key)
+            if df is None:
+                return None
+            frames.move_to_end(key)
+        return df.copy(deep=False)
+
+    @classmethod
+    def load_excel(cls, path: str, prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> pd.DataFrame:
+        """
+        Read an Excel file once per file version and share it across sessions.
+
+        The key combines the path with the file's modification time, so an
+        updated file is read again while unchanged files are served from memory.
+
+        Args:
+            path (str): Path to the Excel file.
+            prepare (Optional[Callable[[pd.DataFrame], pd.DataFrame]], optional): Function
+                applied once after reading (e.g. to add derived columns); the prepared
+                frame is stored under its own key. Defaults to None.
+
+        Returns:
+            pd.DataFrame: A read-only view of the file's first sheet.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        key = f"{path}@{os.path.getmtime(path)}"
+        if prepare is not None:
+            key = f"{key}#{prepare.__name__}"
+        df = cls.get(key)
+        if df is None:
+            df = prepare(cls.load_excel(path)) if prepare is not None else pd.read_excel(path)
+            cls.put(df, key=key)
+            # Other sessions can evict the entry right after put(), so the frame
+            # just built is returned instead of being read back from the store
+            df = df.copy(deep=False)
+        return df
+
+
+def get_session_portfolio() -> Optional[pd.DataFrame]:
+    """
+    Return the portfolio of the current session from the shared store.
+
+    Returns:
+        Optional[pd.DataFrame]: The session's portfolio, or None if no file was
+                                processed or it was evicted from the store.
+    """
+    return PortfolioStore.get(st.session_state.get("portfolio_key"))
@@ -3,30 +3,41 @@ Search bar component module for the Streamlit application.
 
 This module provides a customizable search bar widget for searching buildings
 and supply IDs within the portfolio data using the streamlit_searchbox library.
+Tenants, owners, tax IDs and meter numbers can be searched too; their results
+point at the building or supply they belong to.
+Queries are answered from the portfolio's shared SearchIndex, and both the
+results and the options shown before typing are capped at Constants.SEARCH_TOP_K,
+so the widget payload does not grow with the portfolio.
 """
 
 import streamlit as st
-from streamlit_searchbox import st_searchbox
 from constants import Constants
+from src.lazy_imports import lazy_import
+from src.search_index import search_index_for
 import pandas as pd
 from typing import List, Optional
 
+streamlit_searchbox = lazy_import("streamlit_searchbox")
+
 class SearchBar:
     """
     A search bar component for filtering buildings and supply IDs.
     
     This class creates a searchable dropdown interface that allows users to
     search through both building addresses and supply IDs from a portfolio
-    DataFrame. It includes custom styling consistent with the application theme.
+    DataFrame, or by tenant, owner, tax ID ('afm:...') and meter number
+    ('meter:...'). It includes custom styling consistent with the application theme.
     
     Attributes:
         df (pd.DataFrame): The portfolio DataFrame containing building and supply data.
-        building_list (List[str]): Unique list of building addresses from the portfolio.
-        supply_list (List[str]): Unique list of supply IDs from the portfolio.
         selection_list (List[str]): Combined list of buildings and supply IDs for searching.
+        index (SearchIndex): Shared n-gram index over selection_list.
+        recent_key (str): Session state key of the recently selected options (class attribute).
         style_overrides (dict): Custom CSS styling configuration for the search box.
     """
     
+    recent_key = "recent_search_selections"
+    
     style_overrides = style_overrides = {
         "clear": {
             "width": 20,
@@ -67,23 +78,26 @@ class SearchBar:
         }
     }
     
-    def __init__(self, df: pd.DataFrame) -> None:
+    def __init__(self, df: pd.DataFrame, portfolio_key: Optional[str] = None,
+                 portfolio_type: Optional[str] = None) -> None:
         """
         Initialize the SearchBar with portfolio data.
         
         Args:
             df (pd.DataFrame): Portfolio DataFrame containing 'ΔΙΕΥΘΥΝΣΗ' (building address)
                               and 'ΑΡ.ΠΑΡΟΧΗΣ' (supply ID) columns.
+            portfolio_key (Optional[str], optional): PortfolioStore key of the portfolio,
+                used to share its search index across sessions. Defaults to the hash
+                of its content.
+            portfolio_type (Optional[str], optional): Portfolio type of df, so only that
+                history's entities are offered as inactive. Defaults to None (both).
         
         Returns:
             None
         """
         self.df = df
-        self.building_list = [str(x) for x in df['ΔΙΕΥΘΥΝΣΗ'].unique().tolist()]
-        print(f"Building List: {len(self.building_list)} items")
-        self.supply_list = [str(x) for x in df['ΑΡ.ΠΑΡΟΧΗΣ'].unique().tolist()]
-        print(f"Supply List: {len(self.supply_list)} items")
-        self.selection_list = self.building_list + self.supply_list
+        self.index = search_index_for(df, portfolio_key, portfolio_type)
+        self.selection_list = self.index.entries
 
     # Extract unique values from your dataframe
     # def search_buildings(self, searchterm: str) -> list:
@@ -100,19 +114,55 @@ class SearchBar:
         """
         Filter buildings and supply IDs based on search term.
         
-        This method performs case-insensitive substring matching on both
-        building addresses and supply IDs.
+        This method performs case- and accent-insensitive substring matching
+        on building addresses, supply IDs, tenants, owners, tax IDs and meter
+        numbers through the search index, which stores every entry already
+        folded, so no candidate is folded or scanned per keystroke. Queries
+        such as 'afm:094014249' are exact lookups of one field.
         
         Args:
             searchterm (str): The search string entered by the user.
         
         Returns:
-            List[str]: Filtered list of buildings and supply IDs matching the search term.
-                      Returns full list if searchterm is empty.
+            List[str]: At most Constants.SEARCH_TOP_K buildings and supply IDs matching
+                      the search term, best first. Returns the default options if
+                      searchterm is empty.
         """
         if not searchterm:
-            return self.selection_list
-        return [b for b in self.selection_list if searchterm.lower() in str(b).lower()]
+            return self.default_options()
+        return self.index.search(searchterm)
+
+    def default_options(self) -> List[str]:
+        """
+        Return the options shown before anything is typed.
+        
+        These are the session's recent selections that are in the portfolio,
+        followed by the buildings and supplies with the highest debt.
+        
+        Returns:
+            List[str]: At most Constants.SEARCH_TOP_K options.
+        """
+        recent = [option for option in st.session_state.get(self.recent_key, []) if option in self.index]
+        options = list(dict.fromkeys(recent + self.index.defaults))
+        return options[:Constants.SEARCH_TOP_K]
+
+    def remember_selection(self, selection: Optional[str]) -> None:
+        """
+        Record a selection as the most recent one of the session.
+        
+        Args:
+            selection (Optional[str]): The selected building or supply ID.
+        
+        Returns:
+            None
+        
+        Side Effects:
+            - Updates st.session_state[recent_key]
+        """
+        if selection is None:
+            return
+        recent = [option for option in st.session_state.get(self.recent_key, []) if option != selection]
+        st.session_state[self.recent_key] = ([selection] + recent)[:Constants.SEARCH_TOP_K]
 
     def building_searchbox(self) -> Optional[str]:
         """
@@ -130,12 +180,13 @@ class SearchBar:
             - Triggers rerun when selection is updated
         """
         
-        selected_option = st_searchbox(
+        selected_option = streamlit_searchbox.st_searchbox(
             self.search_buildings_supplies,
-            placeholder="Search for building or supply ID...",
+            placeholder="Search for building, supply ID, tenant, owner, ΑΦΜ or meter...",
             # label="Select Building or Supply ID",
             key="building_searchbox",
-            default_options=self.selection_list,
+            default_options=self.default_options(),
+            submit_function=self.remember_selection,
             style_overrides=self.style_overrides,
             rerun_on_update=True, 
             # rerun_scope="fragment",
@@ -0,0 +1,481 @@
+"""
+Search index module for the Streamlit application.
+
+This module answers the search bar's substring queries without scanning the
+candidates. Every entry (building address or supply ID) is folded once when
+the index is built (accents removed, case and final sigma folded, whitespace
+collapsed; see src.normalise.fold_text), and every 1-, 2- and 3-gram of its
+folded form points to the entries containing it (a posting list). Queries are
+folded the same way, so 'καλλιρροης' finds 'ΚΑΛΛΙΡΡΟΗΣ'. Prefixes (e.g. the
+digits of a supply ID) and word starts (e.g. 'αθηναιων' in 'δημοσ αθηναιων')
+are looked up by binary search in sorted arrays of the folded entries and of
+their words. Other substrings are answered by intersecting the posting lists
+of their trigrams and confirming the remaining candidates, only as far as the
+results need. Results are ranked and capped at Constants.SEARCH_TOP_K. Besides
+the portfolio's own entries, the index lists the buildings and supplies of the
+historical databases (src.entity_index) of the same portfolio type that are
+missing from the portfolio, marked ' (inactive)', and one hit per tenant,
+owner, tax ID ('ΑΦΜ') and meter number, pointing at the building or supply it
+belongs to. Field-scoped queries such as 'afm:094014249' or 'meter:Α97Τ46659'
+are answered by an exact hash lookup instead. An index is built once per
+portfolio and entity index version and shared by all sessions.
+"""
+
+import sys
+from collections import defaultdict
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from constants import Constants
+from src.entity_index import EntityIndex, shared_entity_index
+from src.normalise import building_keys, fold_text, tax_id_key
+
+INACTIVE_SUFFIX = " (inactive)"
+
+# Searchable field -> (column, level of the building or supply it points at)
+FIELDS = {
+    'tenant': ('ΕΝΟΙΚΟΣ', 'building'),
+    'owner': ('ΙΔΙΟΚΤΗΤΗΣ', 'building'),
+    'afm': ('ΑΦΜ', 'building'),
+    'meter': ('ΑΡ.ΜΕΤΡΗΤΗ', 'supply_id'),
+}
+
+# Folded prefixes of field-scoped queries ('afm:...', 'ΑΦΜ:...')
+FIELD_ALIASES = {fold_text(alias): field for field, aliases in {
+    'tenant': ('tenant', 'ενοικος'),
+    'owner': ('owner', 'ιδιοκτητης'),
+    'afm': ('afm', 'αφμ'),
+    'meter': ('meter', 'μετρητης'),
+}.items() for alias in aliases}
+
+NGRAM_SIZES = (1, 2, 3)
+
+# Positions of the rarest posting list intersected at a time
+CANDIDATE_CHUNK = 256
+
+
+def ngrams(text: str) -> set:
+    """
+    List the distinct 1-, 2- and 3-grams of a folded text.
+
+    Args:
+        text (str): Folded text.
+
+    Returns:
+        set: Every substring of text whose length is in NGRAM_SIZES.
+    """
+    return {text[start:start + size] for size in NGRAM_SIZES for start in range(len(text) - size + 1)}
+
+
+def supply_key(supply: Any) -> Any:
+    """
+    Return a supply ID in its canonical type.
+
+    Supply IDs are integers in the monthly files and floats in the histories,
+    and the search box returns strings; integral values are made int.
+
+    Args:
+        supply (Any): A 'ΑΡ.ΠΑΡΟΧΗΣ' value.
+
+    Returns:
+        Any: The supply ID as int, or unchanged if it is not an integral number.
+    """
+    number = pd.to_numeric(supply, errors='coerce')
+    if pd.isna(number) or number != int(number):
+        return supply
+    return int(number)
+
+
+def field_key(field: str, value: Any) -> str:
+    """
+    Return the exact-lookup key of a field value.
+
+    Args:
+        field (str): One of FIELDS.
+        value (Any): The value, as stored or as typed after 'field:'.
+
+    Returns:
+        str: The zero-padded tax ID for 'afm', otherwise the folded text.
+    """
+    return tax_id_key(value) if field == 'afm' else fold_text(value)
+
+
+class SearchIndex:
+    """
+    An n-gram inverted index over the searchable entries of a portfolio.
+
+    Results are ranked: entries starting with the query first (in alphabetical
+    order), then entries with a later word starting with it (in alphabetical
+    order of that word), then any other entry containing it (in index order).
+    The first two tiers are binary searches and the third stops once top K
+    are found, so the cost of a query does not grow with the number of matches.
+
+    Attributes:
+        entries (List[str]): Display strings, in the order they were indexed.
+        folded (List[str]): Folded form of every entry (see fold_text).
+        postings (Dict[str, np.ndarray]): Sorted entry positions per n-gram.
+        sorted_keys (np.ndarray): Folded entries in alphabetical order, for prefix lookups.
+        sorted_positions (np.ndarray): Entry position of every sorted key.
+        sorted_words (np.ndarray): Folded words after the first of every entry, in
+                                   alphabetical order, for word-start lookups.
+        word_positions (np.ndarray): Entry position of every sorted word.
+        defaults (List[str]): Entries offered before anything is typed (e.g. highest debt first).
+        resolution (Dict[str, Tuple[str, Any]]): Level ('building' or 'supply_id') and typed
+                                                 key (address or int supply ID) per entry.
+        inactive (Set[str]): Entries only found in the history, not in the portfolio.
+        fields (Dict[str, Dict[str, List[str]]]): Entries per field and exact key (see field_key).
+    """
+
+    def __init__(self, entries: List[str], defaults: Optional[List[str]] = None,
+                 resolution: Optional[Dict[str, Tuple[str, Any]]] = None,
+                 inactive: Optional[Iterable[str]] = None,
+                 fields: Optional[Dict[str, Dict[str, List[str]]]] = None) -> None:
+        """
+        Build the index over a list of entries.
+
+        Args:
+            entries (List[str]): Display strings to search, e.g. addresses and supply IDs.
+            defaults (Optional[List[str]], optional): Entries offered for an empty query.
+                Defaults to the first Constants.SEARCH_TOP_K entries.
+            resolution (Optional[Dict[str, Tuple[str, Any]]], optional): Level and key of
+                every entry, for resolve(). Defaults to none.
+            inactive (Optional[Iterable[str]], optional): Entries that are not in the
+                current portfolio. Defaults to none.
+            fields (Optional[Dict[str, Dict[str, List[str]]]], optional): Entries per
+                field and exact key, for field-scoped queries. Defaults to none.
+
+        Returns:
+            None
+        """
+        self.entries = list(entries)
+        self.resolution = dict(resolution or {})
+        self.inactive = set(inactive or ())
+        self.fields = {field: dict(keys) for field, keys in (fields or {}).items()}
+        self._entries = np.array(self.entries, dtype=object)
+        self._positions = {entry: position for position, entry in enumerate(self.entries)}
+        self.folded = [fold_text(entry) for entry in self.entries]
+        self.defaults = list(defaults if defaults is not None else self.entries[:Constants.SEARCH_TOP_K])
+
+        postings = defaultdict(list)
+        for position, text in enumerate(self.folded):
+            for gram in ngrams(text):
+                postings[gram].append(position)
+        self.postings = {gram: np.asarray(positions, dtype=np.int64) for gram, positions in postings.items()}
+
+        order = sorted(range(len(self.folded)), key=self.folded.__getitem__)
+        self.sorted_keys = np.array([self.folded[position] for position in order], dtype=object)
+        self.sorted_positions = np.asarray(order, dtype=np.int64)
+
+        # The first word of every entry is already covered by sorted_keys
+        words, word_positions = [], []
+        for position, text in enumerate(self.folded):
+            for word in text.split(" ")[1:]:
+                words.append(sys.intern(word))
+                word_positions.append(position)
+        order = sorted(range(len(words)), key=words.__getitem__)
+        self.sorted_words = np.array([words[index] for index in order], dtype=object)
+        self.word_positions = np.asarray(word_positions, dtype=np.int64)[order] if order else np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def from_portfolio(cls, df: pd.DataFrame, entities: Optional[EntityIndex] = None,
+                       portfolio_type: Optional[str] = None) -> "SearchIndex":
+        """
+        Build the index over the buildings and supply IDs of a portfolio.
+
+        The default options are the buildings and supplies with the highest
+        total debt ('ΟΦΕΙΛΗ'). Buildings and supplies of the entity index that
+        are not in the portfolio are added after them, marked ' (inactive)';
+        a historical address counts as present if its building key is. Then
+        every tenant, owner, tax ID and meter number of the portfolio and the
+        entity index gets one entry per building or supply it belongs to,
+        e.g. 'Α97Τ46659 · ΑΡ.ΜΕΤΡΗΤΗ · 1533178'. Every entry resolves to its
+        level and typed key (see resolve()).
+
+        Args:
+            df (pd.DataFrame): Portfolio with 'ΔΙΕΥΘΥΝΣΗ' and 'ΑΡ.ΠΑΡΟΧΗΣ' columns.
+            entities (Optional[EntityIndex], optional): Entities of the historical
+                databases. Defaults to None (portfolio only).
+            portfolio_type (Optional[str], optional): Portfolio type of df; only the
+                entities of that type's history are added, so the other portfolio's
+                buildings and supplies are not marked inactive. Defaults to None
+                (both portfolio types).
+
+        Returns:
+            SearchIndex: Buildings first, then supply IDs, in order of appearance,
+                         then the inactive buildings and supply IDs, then the field entries.
+        """
+        resolution = {}
+        for address in df['ΔΙΕΥΘΥΝΣΗ'].dropna().unique().tolist():
+            resolution.setdefault(str(address), ('building', address))
+        for supply in df['ΑΡ.ΠΑΡΟΧΗΣ'].dropna().unique().tolist():
+            key = supply_key(supply)
+            resolution.setdefault(str(key), ('supply_id', key))
+
+        defaults = None
+        if 'ΟΦΕΙΛΗ' in df.columns:
+            debt = pd.concat([df.groupby('ΔΙΕΥΘΥΝΣΗ')['ΟΦΕΙΛΗ'].sum(),
+                              df.groupby('ΑΡ.ΠΑΡΟΧΗΣ')['ΟΦΕΙΛΗ'].sum().rename(index=supply_key)])
+            defaults = [str(x) for x in debt.nlargest(Constants.SEARCH_TOP_K).index]
+
+        active_keys = set(building_keys(df['ΔΙΕΥΘΥΝΣΗ'].drop_duplicates()).astype(str))
+        active_supplies = set(pd.to_numeric(df['ΑΡ.ΠΑΡΟΧΗΣ'], errors='coerce').dropna().astype('int64').tolist())
+        inactive = {}
+        rows = EntityIndex.entities(df)
+        history = entities.rows(portfolio_type) if entities is not None else None
+        if history is not None and not history.empty:
+            addresses = entities.buildings(portfolio_type).index.to_series()
+            history_keys = pd.Series(building_keys(addresses).astype(str).to_numpy())
+            # One display address per building key, for buildings missing from the portfolio
+            missing = addresses[(~history_keys.isin(active_keys) & ~history_keys.duplicated()).to_numpy()]
+            for address in missing.tolist():
+                inactive[f"{address}{INACTIVE_SUFFIX}"] = ('building', address)
+            history_supplies = entities.supplies(portfolio_type).index
+            for supply in history_supplies[~history_supplies.isin(list(active_supplies))].tolist():
+                inactive[f"{supply}{INACTIVE_SUFFIX}"] = ('supply_id', supply)
+            rows = pd.concat([rows, history[EntityIndex.columns]], ignore_index=True)
+        for entry, target in inactive.items():
+            resolution.setdefault(entry, target)
+
+        fields = {field: {} for field in FIELDS}
+        for field, (column, level) in FIELDS.items():
+            target_column = 'ΔΙΕΥΘΥΝΣΗ' if level == 'building' else 'ΑΡ.ΠΑΡΟΧΗΣ'
+            pairs = rows[[column, target_column]].dropna()
+            pairs = pairs[pairs[column].astype(str).str.strip() != ""].drop_duplicates()
+            if level == 'building':
+                is_active = building_keys(pairs[target_column]).astype(str).isin(active_keys)
+            else:
+                is_active = pairs[target_column].isin(list(active_supplies))
+            for value, target, active in zip(pairs[column].tolist(), pairs[target_column].tolist(), is_active.tolist()):
+                entry = f"{value} · {column} · {target}" + ("" if active else INACTIVE_SUFFIX)
+                if entry in resolution:
+                    continue
+                resolution[entry] = (level, target)
+                if not active:
+                    inactive[entry] = (level, target)
+                fields[field].setdefault(field_key(field, value), []).append(entry)
+        return cls(list(resolution), defaults=defaults, resolution=resolution, inactive=inactive, fields=fields)
+
+    def __len__(self) -> int:
+        """
+        Return the number of indexed entries.
+
+        Returns:
+            int: Number of entries.
+        """
+        return len(self.entries)
+
+    def __contains__(self, entry: str) -> bool:
+        """
+        Tell whether an entry is indexed.
+
+        Args:
+            entry (str): Display string.
+
+        Returns:
+            bool: True if the entry is one of self.entries.
+        """
+        return entry in self._positions
+
+    def resolve(self, entry: Optional[str]) -> Optional[Tuple[str, Any]]:
+        """
+        Map a selected entry to what it refers to, with a single hash lookup.
+
+        Args:
+            entry (Optional[str]): Display string returned by the search box.
+
+        Returns:
+            Optional[Tuple[str, Any]]: ('building', address) or ('supply_id', int supply ID),
+                                       or None if the entry is not indexed.
+        """
+        return self.resolution.get(entry)
+
+    def prefix_positions(self, query: str) -> np.ndarray:
+        """
+        Find the entries starting with a folded query (e.g. supply IDs starting with its digits).
+
+        Args:
+            query (str): Folded query.
+
+        Returns:
+            np.ndarray: Entry positions of the matches, in alphabetical order.
+        """
+        # Every key starting with the query sorts between it and the query followed by the last code point
+        start = np.searchsorted(self.sorted_keys, query, side="left")
+        end = np.searchsorted(self.sorted_keys, query + "\U0010ffff", side="left")
+        return self.sorted_positions[start:end]
+
+    def word_start_positions(self, query: str) -> np.ndarray:
+        """
+        Find the entries with a word after the first that could start a folded query.
+
+        For a query of one word these are exactly the entries with a later
+        word starting with it. For a query of several words the first one
+        must be a whole word, and the rest still has to be confirmed.
+
+        Args:
+            query (str): Folded query.
+
+        Returns:
+            np.ndarray: Entry positions, in alphabetical order of the matching word;
+                        an entry with several matching words appears once per word.
+        """
+        first, space, _ = query.partition(" ")
+        start = np.searchsorted(self.sorted_words, first, side="left")
+        end = np.searchsorted(self.sorted_words, first if space else first + "\U0010ffff", side="right" if space else "left")
+        return self.word_positions[start:end]
+
+    def candidate_chunks(self, query: str, chunk_size: int = CANDIDATE_CHUNK) -> Iterator[np.ndarray]:
+        """
+        Find the entries containing every trigram of a folded query, a chunk at a time.
+
+        The posting list of the rarest trigram is walked in chunks and each
+        chunk is intersected with the other posting lists, so a caller that
+        stops early never intersects the rest. Queries of up to three
+        characters are answered exactly by their own posting list; longer ones
+        may include entries whose trigrams appear out of order.
+
+        Args:
+            query (str): Folded query.
+            chunk_size (int, optional): Positions of the rarest posting list per
+                chunk. Defaults to CANDIDATE_CHUNK.
+
+        Yields:
+            np.ndarray: Sorted positions of the next candidate entries.
+        """
+        size = max(NGRAM_SIZES)
+        grams = [query] if len(query) <= size else sorted(
+            {query[start:start + size] for start in range(len(query) - size + 1)},
+            key=lambda gram: len(self.postings.get(gram, ())))
+        empty = np.empty(0, dtype=np.int64)
+        rarest, *others = [self.postings.get(gram, empty) for gram in grams]
+        for start in range(0, len(rarest), chunk_size):
+            candidates = rarest[start:start + chunk_size]
+            for posting in others:
+                if len(candidates) == 0 or len(posting) == 0:
+                    candidates = empty
+                    break
+                found = np.searchsorted(posting, candidates)
+                found[found == len(posting)] = 0
+                candidates = candidates[posting[found] == candidates]
+            if len(candidates):
+                yield candidates
+
+    def ranked_positions(self, query: str, limit: int) -> List[int]:
+        """
+        Collect the best matches of a folded query, stopping once limit are found.
+
+        Args:
+            query (str): Folded query.
+            limit (int): Maximum number of matches.
+
+        Returns:
+            List[int]: Entry positions: prefix matches, then word matches, then substring matches.
+        """
+        ranked = self.prefix_positions(query)[:limit].tolist()
+        seen = set(ranked)
+        folded = self.folded
+        # Matches of the binary searches and the posting list of a short query
+        # are exact; the others are confirmed against the folded text. The
+        # candidates are only intersected as far as the remaining slots need.
+        tiers = ((self.word_start_positions(query), " " + query if " " in query else None),
+                 (chain.from_iterable(self.candidate_chunks(query)), query if len(query) > max(NGRAM_SIZES) else None))
+        for positions, needle in tiers:
+            if len(ranked) == limit:
+                break
+            for position in positions:
+                if len(ranked) == limit:
+                    return ranked
+                position = int(position)
+                if position in seen or (needle is not None and needle not in folded[position]):
+                    continue
+                seen.add(position)
+                ranked.append(position)
+        return ranked
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Return the best entries containing the query, ignoring case and accents.
+
+        A query of the form 'field:value' (e.g. 'afm:094014249', 'ΑΦΜ:094014249')
+        is an exact lookup of the field instead (see lookup()).
+
+        Args:
+            query (str): The search string entered by the user.
+            limit (Optional[int], optional): Maximum number of results. Defaults to
+                Constants.SEARCH_TOP_K.
+
+        Returns:
+            List[str]: The ranked matches; the default options if the query is empty.
+        """
+        limit = limit or Constants.SEARCH_TOP_K
+        prefix, separator, value = query.partition(":")
+        field = FIELD_ALIASES.get(fold_text(prefix)) if separator else None
+        if field is not None:
+            return self.lookup(field, value, limit)
+        folded = fold_text(query)
+        if not folded:
+            return self.defaults[:limit]
+        return self._entries[self.ranked_positions(folded, limit)].tolist()
+
+    def lookup(self, field: str, value: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Return the entries whose field equals a value exactly, with one hash lookup.
+
+        Args:
+            field (str): One of FIELDS ('tenant', 'owner', 'afm' or 'meter').
+            value (str): The value typed after 'field:'.
+            limit (Optional[int], optional): Maximum number of results. Defaults to
+                Constants.SEARCH_TOP_K.
+
+        Returns:
+            List[str]: The matching entries, each pointing at a building or supply.
+        """
+        return self.fields.get(field, {}).get(field_key(field, value), [])[:limit or Constants.SEARCH_TOP_K]
+
+
+@st.cache_resource(show_spinner=False, max_entries=Constants.PORTFOLIO_STORE_MAX_ENTRIES)
+def portfolio_search_index(portfolio_key: str, entities_version: int, portfolio_type: Optional[str],
+                           _df: pd.DataFrame, _entities: Optional[EntityIndex] = None) -> SearchIndex:
+    """
+    Return the search index of a portfolio, built once per process.
+
+    Args:
+        portfolio_key (str): PortfolioStore key identifying the portfolio's content.
+        entities_version (int): Version of the entity index, so the index is rebuilt
+            when a month is added to it.
+        portfolio_type (Optional[str]): Portfolio type of the portfolio, or None for both.
+        _df (pd.DataFrame): The portfolio (not hashed; the key identifies it).
+        _entities (Optional[EntityIndex], optional): Entities of the historical
+            databases (not hashed; the version identifies them). Defaults to None.
+
+    Returns:
+        SearchIndex: The portfolio's shared index.
+    """
+    return SearchIndex.from_portfolio(_df, _entities, portfolio_type)
+
+
+def search_index_for(df: pd.DataFrame, portfolio_key: Optional[str] = None,
+                     portfolio_type: Optional[str] = None) -> SearchIndex:
+    """
+    Return the shared search index of a portfolio, including inactive history entities.
+
+    Args:
+        df (pd.DataFrame): The portfolio.
+        portfolio_key (Optional[str], optional): Its PortfolioStore key. Defaults to
+            the hash of its content.
+        portfolio_type (Optional[str], optional): Its portfolio type, so only the
+            entities of that history are listed. Defaults to None (both).
+
+    Returns:
+        SearchIndex: The portfolio's shared index.
+    """
+    from src.portfolio_store import PortfolioStore
+
+    entities = shared_entity_index()
+    if portfolio_type is not None:
+        portfolio_type = portfolio_type.lower()
+    return portfolio_search_index(portfolio_key or PortfolioStore.content_key(df), entities.version, portfolio_type,
+                                  df, entities)
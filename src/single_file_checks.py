@@ -2,15 +2,18 @@
 Single file validation module for the Streamlit application.
 
 This module provides comprehensive data validation checks for uploaded monthly
-portfolio files, including column presence, empty rows, mandatory fields, and duplicates.
+portfolio files, including column presence, empty rows, mandatory fields, duplicates
+and cross-column business rules.
 """
 
 from constants import Constants
 from src.utils import animate_progress
+from src.validation_engine import ValidationEngine, ValidationResult, duplicate_key_groups
+import numpy as np
 import pandas as pd
 import streamlit as st
 import time
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 class MonthlyDataChecks:
     """
@@ -18,17 +21,24 @@ class MonthlyDataChecks:
     
     This class provides methods to validate uploaded portfolio files against
     expected schema and data quality requirements. It checks for missing columns,
-    empty rows, unfilled mandatory fields, and duplicate records.
+    empty rows, unfilled mandatory fields, duplicate records and business rule
+    violations. The row-level checks share a single ValidationEngine pass over
+    the data.
     
     Attributes:
         portfolio (pd.DataFrame): The portfolio DataFrame to validate.
         portfolio_name (str): Name identifier for the portfolio (e.g., 'eurobank', 'management').
+        validation (Optional[ValidationResult]): Per-row violations, computed on first use.
         column_names (List[str]): Expected column names (class attribute from Constants).
         mandatory_columns (List[str]): Columns that must not have null values (class attribute).
+        business_rules (List[dict]): Declarative cross-column rules (class attribute).
+        duplicate_key_columns (List[str]): Columns that together identify a bill (class attribute).
     """
     
     column_names = Constants.COLUMN_NAMES
     mandatory_columns = Constants.NON_NULLABLE_COLUMNS
+    business_rules = Constants.BUSINESS_RULES
+    duplicate_key_columns = Constants.DUPLICATE_KEY_COLUMNS
     
     def __init__(self, portfolio: pd.DataFrame, portfolio_name: str) -> None:
         """
@@ -43,6 +53,21 @@ class MonthlyDataChecks:
         """
         self.portfolio = portfolio
         self.portfolio_name = portfolio_name
+        self.validation = None
+
+    def run_validation(self) -> ValidationResult:
+        """
+        Evaluate all row-level rules in a single pass, once per instance.
+        
+        Returns:
+            ValidationResult: Per-row violation bitmask for empty rows, unfilled
+                              mandatory columns, duplicate invoices and business rules.
+        """
+        if self.validation is None:
+            engine = ValidationEngine(self.mandatory_columns, duplicate_key=self.duplicate_key_columns,
+                                      business_rules=self.business_rules)
+            self.validation = engine.evaluate(self.portfolio)
+        return self.validation
 
     def exist_all_columns(self) -> List[str]:
         """
@@ -65,13 +90,14 @@ class MonthlyDataChecks:
         Side Effects:
             - Modifies self.portfolio by removing empty rows in place
         """
-        num_rows_before = len(self.portfolio)
-        self.portfolio.dropna(how='all', inplace=True)
-        num_rows_after = len(self.portfolio)
-        if num_rows_before != num_rows_after:
-            return num_rows_before - num_rows_after
-        else:
+        validation = self.run_validation()
+        empty_rows = validation.rows_failing("empty_row")
+        num_empty_rows = int(empty_rows.sum())
+        if num_empty_rows == 0:
             return 0
+        self.portfolio.drop(index=self.portfolio.index[empty_rows], inplace=True)
+        self.validation = validation.select(~empty_rows, self.portfolio)
+        return num_empty_rows
         
 
     def exist_unfilled_values_in_mandatory_columns(self) -> List[str]:
@@ -82,36 +108,113 @@ class MonthlyDataChecks:
             List[str]: List of mandatory column names that contain null values.
                       Empty list if all mandatory columns are filled.
         """
-        missing_columns = [col for col in self.mandatory_columns if col not in self.portfolio.columns]
-        mandatory_cols_unfilled = []
-        for col in self.mandatory_columns:
-            if self.portfolio[col].isnull().any():
-                mandatory_cols_unfilled.append(col)
-        return mandatory_cols_unfilled
+        failed_rules = self.run_validation().failed_rules(prefix="missing:")
+        return [rule.split(":", 1)[1] for rule in failed_rules]
     
-    def exist_duplicates(self, cols: str = "ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ") -> Tuple[int, Optional[pd.DataFrame]]:
+    def exist_duplicates(self, cols: Optional[List[str]] = None) -> Tuple[int, Optional[pd.DataFrame]]:
         """
-        Check for duplicate rows based on specified column.
+        Check for duplicate rows based on a composite key.
         
         Args:
-            cols (str, optional): Column name to check for duplicates. Defaults to "ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ".
+            cols (Optional[List[str]], optional): Columns that together identify a row.
+                Defaults to duplicate_key_columns.
         
         Returns:
             Tuple[int, Optional[pd.DataFrame]]: A tuple containing:
-                - Number of duplicate rows found
-                - DataFrame containing all duplicate rows (including originals), or None if no duplicates
+                - Number of duplicate rows found (occurrences after the first)
+                - DataFrame containing all duplicate rows (including originals) with
+                  their 'Duplicate Group', or None if no duplicates
         """
-        duplicates = self.portfolio[cols].duplicated()
-        num_duplicates = duplicates.sum()
-        # Get duplicate rows
-        duplicate_rows = self.portfolio[duplicates]
-        #  Check for duplicates keeping all occurrences
-        all_duplicates = self.portfolio[self.portfolio.duplicated(keep=False)]
+        cols = list(cols) if cols is not None else list(self.duplicate_key_columns)
+        if cols == list(self.duplicate_key_columns):
+            validation = self.run_validation()
+        else:
+            groups, num_duplicates = duplicate_key_groups(self.portfolio, cols)
+            validation = ValidationResult(self.portfolio, [], np.zeros(len(self.portfolio), dtype=np.uint64),
+                                          num_duplicates, duplicate_groups=groups)
         
-        if num_duplicates > 0:
-            return num_duplicates, all_duplicates
+        if validation.num_duplicates > 0:
+            return validation.num_duplicates, validation.duplicates()
         else:
             return 0, None
+    
+    def exist_business_rule_violations(self) -> Tuple[List[str], List[str]]:
+        """
+        Check the portfolio against the declarative business rules.
+        
+        Returns:
+            Tuple[List[str], List[str]]: A tuple containing:
+                - Descriptions of broken rules with severity 'error'
+                - Descriptions of broken rules with severity 'warning'
+        """
+        validation = self.run_validation()
+        counts = validation.counts()
+        descriptions = {f"rule:{rule['name']}": rule.get('description', rule['name']) for rule in self.business_rules}
+        errors = [f"{descriptions[rule]} ({counts[rule]} rows)" for rule in validation.failed_rules("rule:", severity="error")]
+        warnings = [f"{descriptions[rule]} ({counts[rule]} rows)" for rule in validation.failed_rules("rule:", severity="warning")]
+        return errors, warnings
+        
+    def validate(self) -> Dict[str, Any]:
+        """
+        Run all validation checks without rendering anything in the UI.
+        
+        Runs the same checks, in the same order, as single_file_checks_pipeline
+        but returns the findings instead of displaying them, so it can be used
+        from worker threads or processes (e.g. batch uploads).
+        
+        Returns:
+            Dict[str, Any]: A report with keys:
+                - passed (bool): True if no blocking issue was found
+                - missing_columns (List[str]): Required columns not in the file
+                - empty_rows (int): Completely empty rows that were removed
+                - unfilled_mandatory_columns (List[str]): Mandatory columns with nulls
+                - num_duplicates (int): Number of duplicate rows
+                - duplicates (Optional[pd.DataFrame]): All duplicate rows, or None
+                - rule_errors (List[str]): Broken business rules that fail the file
+                - rule_warnings (List[str]): Broken business rules that are only reported
+                - violations (Optional[pd.DataFrame]): Per-row report of failed rules
+                - messages (List[str]): Human readable findings
+                
+        Side Effects:
+            - Modifies self.portfolio by removing empty rows
+        """
+        report = {
+            "passed": False,
+            "missing_columns": self.exist_all_columns(),
+            "empty_rows": 0,
+            "unfilled_mandatory_columns": [],
+            "num_duplicates": 0,
+            "duplicates": None,
+            "rule_errors": [],
+            "rule_warnings": [],
+            "violations": None,
+            "messages": [],
+        }
+        if report["missing_columns"]:
+            report["messages"].append(f"Missing columns or different name: {', '.join(report['missing_columns'])}")
+            return report
+        
+        report["empty_rows"] = self.exist_empty_rows()
+        if report["empty_rows"]:
+            report["messages"].append(f"{report['empty_rows']} completely empty rows were deleted")
+        
+        report["unfilled_mandatory_columns"] = self.exist_unfilled_values_in_mandatory_columns()
+        if report["unfilled_mandatory_columns"]:
+            report["messages"].append(f"Missing values in mandatory columns: {', '.join(report['unfilled_mandatory_columns'])}")
+        
+        report["num_duplicates"], report["duplicates"] = self.exist_duplicates()
+        if report["num_duplicates"]:
+            report["messages"].append(f"{report['num_duplicates']} duplicate rows")
+        
+        report["rule_errors"], report["rule_warnings"] = self.exist_business_rule_violations()
+        report["messages"].extend(report["rule_errors"])
+        report["messages"].extend(f"Warning: {warning}" for warning in report["rule_warnings"])
+        
+        report["passed"] = (not report["unfilled_mandatory_columns"] and report["num_duplicates"] == 0
+                            and not report["rule_errors"])
+        if not report["passed"]:
+            report["violations"] = self.run_validation().report()
+        return report
         
     def single_file_checks_pipeline(self) -> bool:
         """
@@ -123,8 +226,11 @@ class MonthlyDataChecks:
         2. Empty rows detection and removal
         3. Mandatory columns validation
         4. Duplicate rows detection
+        5. Business rules validation
         
         The process is visualized with an animated progress bar and status messages.
+        The checks share a single row-level validation pass, run by the first
+        check that needs it.
         
         Returns:
             bool: True if all validation checks pass, False if any check fails.
@@ -132,7 +238,7 @@ class MonthlyDataChecks:
         Side Effects:
             - Displays animated progress bar during checks
             - Shows success/warning/error messages for each check
-            - Displays expandable DataFrames for duplicate rows
+            - Displays expandable DataFrames for duplicate rows and rule violations
             - Modifies self.portfolio by removing empty rows
         """
         # Initialize progress bar and status text
@@ -142,7 +248,7 @@ class MonthlyDataChecks:
         
         # Check 1: Column presence
         status_text.text("Checking columns...")
-        progress_bar = animate_progress(progress_bar, 0, 25)
+        progress_bar = animate_progress(progress_bar, 0, 20)
         # progress_bar.progress(0)
         missing_cols = self.exist_all_columns()
         if len(missing_cols) > 0:
@@ -157,7 +263,7 @@ class MonthlyDataChecks:
         
         # Check 2: Empty rows
         status_text.text("Checking for empty rows...")
-        progress_bar = animate_progress(progress_bar, 25, 50)
+        progress_bar = animate_progress(progress_bar, 20, 40)
         num_empty_rows = self.exist_empty_rows()
         if num_empty_rows != 0:
             st.warning(f"{self.portfolio_name} portfolio has {num_empty_rows} completely empty rows, that are now deleted.")
@@ -168,12 +274,14 @@ class MonthlyDataChecks:
         
         # Check 3: Mandatory columns
         status_text.text("Checking mandatory columns...")
-        progress_bar = animate_progress(progress_bar, 50, 75)
+        progress_bar = animate_progress(progress_bar, 40, 60)
         mandatory_cols_unfilled = self.exist_unfilled_values_in_mandatory_columns()
         if mandatory_cols_unfilled:
             status_text.empty()
             progress_bar.empty()
             st.error(f"The following mandatory columns have missing values in {self.portfolio_name} portfolio: {', '.join(mandatory_cols_unfilled)}")
+            with st.expander("View rows with missing mandatory values"):
+                st.dataframe(self.run_validation().report(), hide_index=True)
             return False
         else:
             info_placeholder = st.empty()
@@ -182,19 +290,37 @@ class MonthlyDataChecks:
         
         # Check 4: Duplicates
         status_text.text("Checking for duplicates...")
-        progress_bar = animate_progress(progress_bar, 75, 100)
+        progress_bar = animate_progress(progress_bar, 60, 80)
         num_duplicates, all_duplicates = self.exist_duplicates()
         if num_duplicates > 0:
             status_text.empty()
             progress_bar.empty()
             st.error(f"{self.portfolio_name} portfolio has {num_duplicates} duplicate rows")
-            with st.expander("View duplicate rows based on 'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ' column"):
-                st.dataframe(all_duplicates)
+            with st.expander(f"View duplicate rows based on {', '.join(self.duplicate_key_columns)}"):
+                st.dataframe(all_duplicates, hide_index=True)
             return False
         else:
             info_placeholder = st.empty()
             info_placeholder.success(f"No duplicate rows")
             info_messages.append(info_placeholder)
+        
+        # Check 5: Business rules
+        status_text.text("Checking business rules...")
+        progress_bar = animate_progress(progress_bar, 80, 100)
+        rule_errors, rule_warnings = self.exist_business_rule_violations()
+        for warning in rule_warnings:
+            st.warning(f"{self.portfolio_name} portfolio: {warning}")
+        if rule_errors:
+            status_text.empty()
+            progress_bar.empty()
+            st.error(f"{self.portfolio_name} portfolio breaks business rules: {'; '.join(rule_errors)}")
+            with st.expander("View rows breaking business rules"):
+                st.dataframe(self.run_validation().report(), hide_index=True)
+            return False
+        elif not rule_warnings:
+            info_placeholder = st.empty()
+            info_placeholder.success(f"No business rule violations")
+            info_messages.append(info_placeholder)
 
         # Complete
         status_text.markdown('<span style="color: #0db1f2;">Validation complete ✓</span>', unsafe_allow_html=True)
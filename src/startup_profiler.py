@@ -0,0 +1,227 @@
+"""
+Cold-start profiling module for the Streamlit application.
+
+This module measures how long the application takes to boot: the import time
+of every module pulled in by the entry points (via ``python -X importtime``)
+and the first-render time of every page (via Streamlit's AppTest harness).
+Each measurement runs in a fresh interpreter so that it reflects a true cold
+start. Results are appended to a JSON Lines history file so regressions
+against the startup time budget can be tracked between versions.
+
+To run: python -m src.startup_profiler [--top 20] [--no-render]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from constants import Constants
+
+# Modules imported by `streamlit run app.py` before the first page is shown
+ENTRY_MODULES = [
+    "constants",
+    "src.authentication",
+    "pages.bill_tab1",
+    "pages.bill_tab2",
+    "pages.bill_tab3",
+]
+
+PAGE_FILES = [
+    "app.py",
+    "pages/bills.py",
+    "pages/property_management.py",
+    "pages/budget_forecast.py",
+]
+
+PROFILE_HISTORY_FILE = "startup_profile.jsonl"
+
+# Pages are reached through app.py's st.navigation, exactly as in the browser
+_RENDER_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness_loaded = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout={timeout})
+at.run()
+app_rendered = time.perf_counter()
+if {page!r} != "app.py":
+    at.switch_page({page!r})
+    at.run()
+done = time.perf_counter()
+print(json.dumps({{
+    "harness_seconds": harness_loaded - start,
+    "app_seconds": app_rendered - harness_loaded,
+    "render_seconds": done - app_rendered if {page!r} != "app.py" else app_rendered - harness_loaded,
+    "exceptions": [str(e.value) for e in at.exception],
+}}))
+"""
+
+
+def _run_importtime(code: str) -> List[Dict[str, float]]:
+    """
+    Run code in a fresh interpreter with -X importtime and parse its report.
+
+    Args:
+        code (str): Python source to execute.
+
+    Returns:
+        List[Dict[str, float]]: One entry per imported module, in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        # Format: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            timings.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+    return timings
+
+
+def profile_imports(modules: List[str]) -> List[Dict[str, float]]:
+    """
+    Measure cold import time per module using the interpreter's -X importtime flag.
+
+    Modules the bare interpreter imports on its own (site, encodings, ...) are
+    excluded so only the application's import graph is reported.
+
+    Args:
+        modules (List[str]): Module names to import in a fresh interpreter.
+
+    Returns:
+        List[Dict[str, float]]: One entry per imported module with its self and
+            cumulative import time in milliseconds, sorted by cumulative time.
+    """
+    interpreter_modules = {t["module"] for t in _run_importtime("pass")}
+    code = "; ".join(f"import {module}" for module in modules)
+    timings = [t for t in _run_importtime(code) if t["module"] not in interpreter_modules]
+    return sorted(timings, key=lambda t: t["cumulative_ms"], reverse=True)
+
+
+def profile_first_render(page: str, timeout: float = 60) -> Dict[str, object]:
+    """
+    Measure the first-render time of a page in a fresh interpreter.
+
+    The app entry point is rendered first (boot), then the page is opened
+    through the navigation menu and its render is timed separately.
+
+    Args:
+        page (str): Path of the page script, relative to the repository root.
+        timeout (float, optional): Seconds allowed for the script run. Defaults to 60.
+
+    Returns:
+        Dict[str, object]: Harness load time, render time in seconds and any
+            exceptions raised while rendering the page.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _RENDER_SCRIPT.format(page=page, timeout=timeout)],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    )
+    try:
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        return {"render_seconds": None, "exceptions": [result.stderr.strip()[-500:]]}
+
+
+def load_previous_profile(history_path: str) -> Optional[Dict[str, object]]:
+    """
+    Load the most recent profile from the history file.
+
+    Args:
+        history_path (str): Path of the JSON Lines history file.
+
+    Returns:
+        Optional[Dict[str, object]]: The last recorded profile, or None if there is no history.
+    """
+    if not os.path.exists(history_path):
+        return None
+    with open(history_path, encoding="utf-8") as file:
+        lines = [line for line in file if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def run_profile(top: int = 20, render: bool = True) -> Dict[str, object]:
+    """
+    Run the full cold-start profile, print a report and append it to the history.
+
+    Args:
+        top (int, optional): Number of slowest top-level imports to print. Defaults to 20.
+        render (bool, optional): Whether to measure first-render time per page. Defaults to True.
+
+    Returns:
+        Dict[str, object]: The recorded profile.
+
+    Side Effects:
+        - Spawns one Python subprocess for imports and one per page
+        - Appends the profile to Constants.EXPORT_PATH/startup_profile.jsonl
+    """
+    history_path = os.path.join(Constants.EXPORT_PATH, PROFILE_HISTORY_FILE)
+    previous = load_previous_profile(history_path)
+
+    imports = profile_imports(ENTRY_MODULES)
+    top_level = [t for t in imports if t["depth"] == 0]
+    boot_ms = sum(t["cumulative_ms"] for t in top_level)
+
+    print(f"Cold import time: {boot_ms:,.0f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>10}  module")
+    for timing in top_level[:top]:
+        print(f"{timing['cumulative_ms']:>14,.1f} {timing['self_ms']:>10,.1f}  {timing['module']}")
+
+    pages = {}
+    if render:
+        print("\nFirst render per page:")
+        for page in PAGE_FILES:
+            pages[page] = profile_first_render(page)
+            seconds = pages[page].get("render_seconds")
+            status = "ok" if not pages[page].get("exceptions") else "raised"
+            shown = f"{seconds:.2f} s" if seconds is not None else "failed"
+            print(f"  {page:<35} {shown:>10}  {status}")
+
+    profile = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "boot_import_ms": boot_ms,
+        "top_imports": top_level[:top],
+        "pages": pages,
+    }
+
+    if previous is not None:
+        delta = boot_ms - previous["boot_import_ms"]
+        print(f"\nChange since {previous['timestamp']}: {delta:+,.0f} ms import time")
+
+    budget_ms = Constants.STARTUP_TIME_BUDGET * 1000
+    if boot_ms > budget_ms:
+        print(f"Over startup budget: {boot_ms:,.0f} ms > {budget_ms:,.0f} ms")
+
+    os.makedirs(Constants.EXPORT_PATH, exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(profile, ensure_ascii=False) + "\n")
+
+    return profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile cold start of the CPS Utilities app.")
+    parser.add_argument("--top", type=int, default=20, help="number of slowest imports to show")
+    parser.add_argument("--no-render", action="store_true", help="skip first-render timing per page")
+    args = parser.parse_args()
+    profile = run_profile(top=args.top, render=not args.no_render)
+    sys.exit(1 if profile["boot_import_ms"] > Constants.STARTUP_TIME_BUDGET * 1000 else 0)
@@ -0,0 +1,282 @@
+"""
+Streaming validation module for the Streamlit application.
+
+This module validates very large portfolio workbooks without loading them into
+a DataFrame. Rows are read in fixed-size chunks from a read-only openpyxl
+sheet, each chunk is checked with the ValidationEngine, and only rolling state
+is kept between chunks (the hashes of the keys seen so far and per-rule
+counters), so peak memory is bounded by the chunk size. Validation can stop at
+the first chunk with a fatal error.
+
+To run: python -m src.streaming_checks <workbook.xlsx> [--portfolio eurobank] [--chunk-size N] [--no-fail-fast]
+"""
+
+import argparse
+import sys
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from constants import Constants
+from src.validation_engine import ValidationEngine
+
+
+def normalised_key_hashes(chunk: pd.DataFrame, key_columns: List[str]) -> np.ndarray:
+    """
+    Hash the composite key of every row independently of how the chunk was typed.
+
+    A column can be read as int in one chunk and float (or object) in the
+    next, depending on its missing values, which would change its hash.
+    Numbers are therefore hashed as float64, dates as datetime64[ns] and
+    anything else as text.
+
+    Args:
+        chunk (pd.DataFrame): Rows of the workbook.
+        key_columns (List[str]): Columns that together identify a row.
+
+    Returns:
+        np.ndarray: One uint64 hash per row.
+    """
+    key = {}
+    for col in key_columns:
+        values = chunk[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            key[col] = values.astype("datetime64[ns]")
+        elif pd.api.types.is_numeric_dtype(values):
+            key[col] = values.astype("float64")
+        else:
+            key[col] = values.astype("string")
+    return pd.util.hash_pandas_object(pd.DataFrame(key), index=False).to_numpy()
+
+
+class StreamingDataChecks:
+    """
+    A bounded-memory validator for monthly portfolio workbooks.
+
+    Runs the same rules as MonthlyDataChecks.validate (column presence, empty
+    rows, mandatory columns, composite-key duplicates and business rules) one
+    chunk of rows at a time. Duplicates across chunks are found through a
+    sorted array of the key hashes seen so far (8 bytes per distinct key).
+
+    Attributes:
+        file (Union[str, BinaryIO]): Path or binary stream of the workbook.
+        portfolio_name (str): Name identifier for the portfolio.
+        chunk_size (int): Rows evaluated per chunk.
+        fail_fast (bool): Stop at the first chunk with a fatal error.
+        max_report_rows (int): Maximum number of failing rows kept for the report.
+        column_names (List[str]): Expected column names (class attribute from Constants).
+        mandatory_columns (List[str]): Columns that must not have null values (class attribute).
+        business_rules (List[dict]): Declarative cross-column rules (class attribute).
+        duplicate_key_columns (List[str]): Columns that together identify a bill (class attribute).
+    """
+
+    column_names = Constants.COLUMN_NAMES
+    mandatory_columns = Constants.NON_NULLABLE_COLUMNS
+    business_rules = Constants.BUSINESS_RULES
+    duplicate_key_columns = Constants.DUPLICATE_KEY_COLUMNS
+
+    def __init__(self, file: Union[str, BinaryIO], portfolio_name: str, chunk_size: Optional[int] = None,
+                 fail_fast: bool = True, max_report_rows: int = 1000) -> None:
+        """
+        Initialize the StreamingDataChecks.
+
+        Args:
+            file (Union[str, BinaryIO]): Path or seekable binary stream of an .xlsx workbook.
+            portfolio_name (str): Name identifier for the portfolio.
+            chunk_size (Optional[int], optional): Rows per chunk. Defaults to
+                Constants.VALIDATION_CHUNK_ROWS.
+            fail_fast (bool, optional): Stop at the first fatal error. Defaults to True.
+            max_report_rows (int, optional): Failing rows kept for the report. Defaults to 1000.
+
+        Returns:
+            None
+        """
+        self.file = file
+        self.portfolio_name = portfolio_name
+        self.chunk_size = chunk_size or Constants.VALIDATION_CHUNK_ROWS
+        self.fail_fast = fail_fast
+        self.max_report_rows = max_report_rows
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Read the first sheet of the workbook in chunks of rows.
+
+        The index of every chunk continues the row numbering of the sheet
+        (0 = first data row), as it would be in a frame read with read_excel.
+
+        A sheet without data rows yields one empty chunk, so the header can
+        still be checked.
+
+        Yields:
+            pd.DataFrame: The next chunk_size rows, with the header row as columns.
+
+        Raises:
+            ValueError: If the file is not a readable .xlsx workbook.
+        """
+        from openpyxl import load_workbook
+
+        if hasattr(self.file, "seek"):
+            self.file.seek(0)
+        try:
+            workbook = load_workbook(self.file, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Not a readable .xlsx workbook: {e}") from e
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+            start, buffer = 0, []
+            for row in rows:
+                buffer.append(row)
+                if len(buffer) == self.chunk_size:
+                    yield pd.DataFrame(buffer, columns=columns, index=pd.RangeIndex(start, start + len(buffer)))
+                    start, buffer = start + len(buffer), []
+            if buffer or start == 0:
+                yield pd.DataFrame(buffer, columns=columns, index=pd.RangeIndex(start, start + len(buffer)))
+        finally:
+            workbook.close()
+
+    def validate(self) -> Dict[str, Any]:
+        """
+        Validate the workbook chunk by chunk.
+
+        Returns:
+            Dict[str, Any]: A report with the keys of MonthlyDataChecks.validate
+                            (except 'duplicates', which would need the whole file)
+                            plus:
+                - rows (int): Number of data rows read
+                - aborted (bool): True if validation stopped at a fatal error
+        """
+        report = {
+            "passed": False,
+            "missing_columns": [],
+            "empty_rows": 0,
+            "unfilled_mandatory_columns": [],
+            "num_duplicates": 0,
+            "rule_errors": [],
+            "rule_warnings": [],
+            "violations": None,
+            "messages": [],
+            "rows": 0,
+            "aborted": False,
+        }
+        engine = ValidationEngine(self.mandatory_columns, duplicate_key=self.duplicate_key_columns,
+                                  business_rules=self.business_rules)
+        duplicate_rule = engine.rule_names[1 + len(self.mandatory_columns)]
+        counts = dict.fromkeys(engine.rule_names, 0)
+        seen_keys = np.empty(0, dtype=np.uint64)
+        violations = []
+        kept_rows = 0
+
+        for number, chunk in enumerate(self.iter_chunks()):
+            if number == 0:
+                report["missing_columns"] = [col for col in self.column_names if col not in chunk.columns]
+                if report["missing_columns"]:
+                    report["messages"].append(f"Missing columns or different name: {', '.join(report['missing_columns'])}")
+                    report["aborted"] = True
+                    return report
+            report["rows"] += len(chunk)
+
+            result = engine.evaluate(chunk)
+            empty = result.rows_failing("empty_row")
+            # Duplicates within the chunk are already flagged; add rows whose key
+            # was seen in an earlier chunk and count every repeat exactly once
+            hashes = normalised_key_hashes(chunk, self.duplicate_key_columns)[~empty]
+            earlier = np.isin(hashes, seen_keys, assume_unique=False)
+            distinct = np.unique(hashes)
+            new_keys = distinct[~np.isin(distinct, seen_keys)]
+            repeats = len(hashes) - len(new_keys)
+            seen_keys = np.union1d(seen_keys, new_keys)
+            if earlier.any():
+                in_earlier = np.zeros(len(chunk), dtype=bool)
+                in_earlier[np.flatnonzero(~empty)[earlier]] = True
+                result.mask |= in_earlier.astype(np.uint64) * result.bit(duplicate_rule)
+
+            for rule, count in result.counts().items():
+                counts[rule] += count
+            counts[duplicate_rule] = report["num_duplicates"] = report["num_duplicates"] + repeats
+
+            if kept_rows < self.max_report_rows and result.mask.any():
+                chunk_report = result.report(exclude=["empty_row"]).head(self.max_report_rows - kept_rows)
+                violations.append(chunk_report)
+                kept_rows += len(chunk_report)
+
+            if self.fail_fast and self._fatal(counts, engine):
+                report["aborted"] = True
+                break
+
+        self._summarise(report, counts, engine)
+        if violations:
+            report["violations"] = pd.concat(violations, ignore_index=True)
+        return report
+
+    def _fatal(self, counts: Dict[str, int], engine: ValidationEngine) -> bool:
+        """
+        Tell whether the counts so far already fail the file.
+
+        Args:
+            counts (Dict[str, int]): Failing rows per rule so far.
+            engine (ValidationEngine): The engine defining the rules.
+
+        Returns:
+            bool: True if a mandatory, duplicate or error-level business rule failed.
+        """
+        return any(count and rule != "empty_row" and engine.severities.get(rule, "error") == "error"
+                   for rule, count in counts.items())
+
+    def _summarise(self, report: Dict[str, Any], counts: Dict[str, int], engine: ValidationEngine) -> None:
+        """
+        Fill the findings and the verdict of the report from the rule counters.
+
+        Args:
+            report (Dict[str, Any]): The report being built.
+            counts (Dict[str, int]): Failing rows per rule.
+            engine (ValidationEngine): The engine defining the rules.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Updates report in place
+        """
+        report["empty_rows"] = counts["empty_row"]
+        if report["empty_rows"]:
+            report["messages"].append(f"{report['empty_rows']} completely empty rows (ignored)")
+
+        report["unfilled_mandatory_columns"] = [rule.split(":", 1)[1] for rule in engine.rule_names
+                                                if rule.startswith("missing:") and counts[rule]]
+        if report["unfilled_mandatory_columns"]:
+            report["messages"].append(f"Missing values in mandatory columns: {', '.join(report['unfilled_mandatory_columns'])}")
+
+        if report["num_duplicates"]:
+            report["messages"].append(f"{report['num_duplicates']} duplicate rows")
+
+        for rule in self.business_rules:
+            count = counts[f"rule:{rule['name']}"]
+            if count:
+                finding = f"{rule.get('description', rule['name'])} ({count} rows)"
+                report["rule_errors" if rule.get("severity", "error") == "error" else "rule_warnings"].append(finding)
+        report["messages"].extend(report["rule_errors"])
+        report["messages"].extend(f"Warning: {warning}" for warning in report["rule_warnings"])
+
+        if report["aborted"]:
+            report["messages"].append(f"Stopped after {report['rows']} rows at the first fatal error")
+        report["passed"] = (not report["aborted"] and not report["unfilled_mandatory_columns"]
+                            and report["num_duplicates"] == 0 and not report["rule_errors"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate a portfolio workbook with bounded memory.")
+    parser.add_argument("workbook", help="path to the .xlsx workbook")
+    parser.add_argument("--portfolio", default="eurobank", help="portfolio name used in messages")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per chunk")
+    parser.add_argument("--no-fail-fast", action="store_true", help="read the whole file even after a fatal error")
+    args = parser.parse_args()
+
+    checks = StreamingDataChecks(args.workbook, args.portfolio, chunk_size=args.chunk_size,
+                                 fail_fast=not args.no_fail_fast)
+    result = checks.validate()
+    print(f"{result['rows']} rows: {'passed' if result['passed'] else 'failed'}")
+    for message in result["messages"]:
+        print(f"  - {message}")
+    sys.exit(0 if result["passed"] else 1)
@@ -0,0 +1,233 @@
+"""
+Supply state module for the Streamlit application.
+
+This module maintains a "last state per supply" table: for every supply
+('ΑΡ.ΠΑΡΟΧΗΣ') the meter number, the current reading and the end of the
+latest metered consumption period found in the historical database. A new
+month is checked for meter-reading continuity by joining its rows against
+this table, so the check costs O(new rows) instead of a history scan. The
+table is built from the history once, then advanced with every new month.
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from constants import Constants
+
+SUPPLY = 'ΑΡ.ΠΑΡΟΧΗΣ'
+METER = 'ΑΡ.ΜΕΤΡΗΤΗ'
+PERIOD_START = 'ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΑΠΌ'
+PERIOD_END = 'ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΕΩΣ'
+PREVIOUS_READING = 'ΠΡΟΗΓ.ΕΝΔ.'
+CURRENT_READING = 'ΠΑΡ.ΕΝΔΕΙΞΗ'
+
+
+def metered_rows(portfolio: pd.DataFrame) -> pd.DataFrame:
+    """
+    Select the metered bills of a portfolio in a comparable form.
+
+    Rows without a supply, meter or consumption period (e.g. late-payment
+    interest) carry no meter reading and are left out. Supplies are made
+    integers and meter numbers strings, since their dtypes differ between the
+    history and the monthly files.
+
+    Args:
+        portfolio (pd.DataFrame): A monthly file or the historical database.
+
+    Returns:
+        pd.DataFrame: Supply, meter, period and reading columns of the metered
+                      rows (plus the invoice number, if present), keeping the
+                      portfolio's index. Empty if a column is missing.
+    """
+    from src.update_timeseries import TimeSeriesUpdate
+
+    columns = [SUPPLY, METER, PERIOD_START, PERIOD_END, PREVIOUS_READING, CURRENT_READING]
+    if any(col not in portfolio.columns for col in columns):
+        return pd.DataFrame(columns=columns)
+    if 'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ' in portfolio.columns:
+        columns = columns + ['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ']
+    rows = portfolio[columns].assign(**{
+        SUPPLY: pd.to_numeric(portfolio[SUPPLY], errors='coerce'),
+        PERIOD_START: pd.to_datetime(portfolio[PERIOD_START], errors='coerce'),
+        PERIOD_END: pd.to_datetime(portfolio[PERIOD_END], errors='coerce'),
+        PREVIOUS_READING: pd.to_numeric(portfolio[PREVIOUS_READING], errors='coerce'),
+        CURRENT_READING: pd.to_numeric(portfolio[CURRENT_READING], errors='coerce'),
+    }).dropna(subset=[SUPPLY, METER, PERIOD_START, PERIOD_END])
+    return rows.assign(**{SUPPLY: rows[SUPPLY].astype('int64'),
+                          METER: TimeSeriesUpdate.invoice_keys(rows[METER])})
+
+
+class SupplyState:
+    """
+    The latest metered state of every supply of a historical database.
+
+    Attributes:
+        portfolio_type (str): Portfolio type ('eurobank' or 'management').
+        table (pd.DataFrame): Meter, current reading, period end and
+                              Processed_Month of the latest bill, indexed by supply.
+        months (List[int]): Processed_Month values already applied to the table.
+        source (Optional[str]): file_signature of the history the table was built from, if any.
+        path (str): Directory holding the tables (class attribute).
+    """
+
+    path = os.path.join(Constants.CACHE_PATH, "supply_state")
+    _lock = threading.Lock()
+
+    def __init__(self, portfolio_type: str) -> None:
+        """
+        Initialize an empty supply state.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            None
+        """
+        self.portfolio_type = portfolio_type.lower()
+        self.table = pd.DataFrame(columns=[METER, CURRENT_READING, PERIOD_END, 'Processed_Month'],
+                                  index=pd.Index([], dtype='int64', name=SUPPLY))
+        self.months = []
+        self.source = None
+
+    @classmethod
+    def load(cls, portfolio_type: str) -> "SupplyState":
+        """
+        Load the stored supply state of a portfolio type.
+
+        Args:
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            SupplyState: The stored state, or an empty one.
+        """
+        state = cls(portfolio_type)
+        entry = os.path.join(cls.path, f"{state.portfolio_type}.pkl")
+        try:
+            stored = pd.read_pickle(entry) if os.path.exists(entry) else None
+        except Exception:
+            # A corrupt or incompatible table is rebuilt by the next reconcile
+            stored = None
+        if isinstance(stored, dict):
+            state.__dict__.update(stored)
+        return state
+
+    def save(self) -> None:
+        """
+        Store the supply state atomically.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Writes a pickle file under Constants.CACHE_PATH/supply_state
+        """
+        os.makedirs(self.path, exist_ok=True)
+        entry = os.path.join(self.path, f"{self.portfolio_type}.pkl")
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            pd.to_pickle(dict(self.__dict__), tmp_entry)
+            os.replace(tmp_entry, entry)
+
+    def advance(self, new_file: pd.DataFrame, processed_month: Optional[int] = None) -> None:
+        """
+        Apply the bills of a new month to the table.
+
+        A supply's state is replaced only by a bill whose period ends no
+        earlier than the stored one, so late bills for older periods are ignored.
+
+        Args:
+            new_file (pd.DataFrame): The new monthly file (or history rows).
+            processed_month (Optional[int], optional): Month of the file as YYYYMM.
+                Defaults to the file's 'Processed_Month' column, if any.
+
+        Returns:
+            None
+        """
+        rows = metered_rows(new_file)
+        if processed_month is None and 'Processed_Month' in new_file.columns:
+            months = pd.to_numeric(new_file.loc[rows.index, 'Processed_Month'], errors='coerce')
+        else:
+            months = pd.Series(processed_month, index=rows.index, dtype='float64')
+        latest = (rows.assign(Processed_Month=months)
+                  .sort_values(PERIOD_END, kind='stable')
+                  .groupby(SUPPLY)[[METER, CURRENT_READING, PERIOD_END, 'Processed_Month']].last())
+        if self.table.empty:
+            self.table = latest
+        else:
+            stored_end = self.table[PERIOD_END].reindex(latest.index)
+            newer = latest[stored_end.isna() | (latest[PERIOD_END] >= stored_end)]
+            self.table = pd.concat([self.table.drop(newer.index, errors='ignore'), newer]).sort_index()
+        self.months = sorted(set(self.months) | set(int(month) for month in months.dropna().unique()))
+
+    def reconcile(self, timeseries: pd.DataFrame, source: Optional[str] = None) -> List[int]:
+        """
+        Bring the table up to date with a historical database.
+
+        If the history is the version the table was built from, nothing is
+        read. If the history only gained months, just their rows are applied;
+        otherwise (months removed, or no Processed_Month column) the table is
+        rebuilt from the whole history.
+
+        Args:
+            timeseries (pd.DataFrame): The historical database.
+            source (Optional[str], optional): file_signature of the file it was
+                read from. Defaults to None (always compare months).
+
+        Returns:
+            List[int]: The months applied to the table.
+
+        Side Effects:
+            - Saves the table if anything changed
+        """
+        if source is not None and source == self.source:
+            return []
+
+        if 'Processed_Month' in timeseries.columns:
+            months = pd.to_numeric(timeseries['Processed_Month'], errors='coerce')
+        else:
+            months = pd.Series(np.nan, index=timeseries.index)
+        present = set(int(month) for month in months.dropna().unique())
+        if not self.months or not set(self.months) <= present:
+            self.__init__(self.portfolio_type)
+            self.advance(timeseries)
+            added = sorted(present)
+        else:
+            added = sorted(present - set(self.months))
+            if added:
+                self.advance(timeseries[months.isin(added)])
+        self.source = source
+        self.save()
+        return added
+
+    def check_continuity(self, new_file: pd.DataFrame) -> pd.DataFrame:
+        """
+        Check the first bill of every supply in a new month against its last state.
+
+        A bill continues the supply's last state when its previous reading
+        ('ΠΡΟΗΓ.ΕΝΔ.') equals the stored current reading ('ΠΑΡ.ΕΝΔΕΙΞΗ') and its
+        meter number is unchanged. Only bills whose period starts after the
+        stored period ended are compared.
+
+        Args:
+            new_file (pd.DataFrame): The new monthly file.
+
+        Returns:
+            pd.DataFrame: One row per discontinuity with the supply, invoice,
+                          'Issue' ('Reading mismatch' or 'Meter changed') and the
+                          previous and current meter and reading. Empty if none.
+        """
+        rows = metered_rows(new_file)
+        first = rows.sort_values(PERIOD_START, kind='stable').drop_duplicates(SUPPLY)
+        joined = first.join(self.table, on=SUPPLY, rsuffix=' (last)', how='inner')
+        joined = joined[joined[PERIOD_START] > joined[f"{PERIOD_END} (last)"]]
+
+        meter_changed = (joined[METER] != joined[f"{METER} (last)"]).to_numpy()
+        reading_mismatch = ~meter_changed & (joined[PREVIOUS_READING] != joined[f"{CURRENT_READING} (last)"]).to_numpy()
+        issues = joined[meter_changed | reading_mismatch].assign(
+            Issue=np.where(meter_changed, "Meter changed", "Reading mismatch")[meter_changed | reading_mismatch])
+        columns = [SUPPLY, 'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ', 'Issue', f"{METER} (last)", METER,
+                   f"{CURRENT_READING} (last)", PREVIOUS_READING, f"{PERIOD_END} (last)", PERIOD_START]
+        return issues[[col for col in columns if col in issues.columns]]
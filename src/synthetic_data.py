@@ -0,0 +1,304 @@
+"""
+Synthetic portfolio module for the Streamlit application.
+
+This module generates reproducible monthly portfolio files for load testing.
+Files have exactly the columns of Constants.COLUMN_NAMES, Greek building
+addresses in the layout of the real files ('ΣΤΑΔΙΟΥ 49  Δήμος ΑΘΗΝΑΙΩΝ ΤΚ 10559')
+and the bill-type mix of the Eurobank history (about half water bills, the
+rest interest, surcharges and fees). Water bills satisfy the business rules
+and continue their meter readings from one month to the next, so consecutive
+months can be appended to each other. Duplicate rows and missing mandatory
+values are injected at controlled rates.
+
+To run: python -m src.synthetic_data <output.xlsx> [--rows 10000] [--month 202510] [--duplicate-rate 0] [--null-rate 0] [--seed 0]
+"""
+
+import argparse
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from constants import Constants
+
+STREETS = [
+    "ΣΤΑΔΙΟΥ", "ΠΑΝΕΠΙΣΤΗΜΙΟΥ", "ΑΚΑΔΗΜΙΑΣ", "ΕΡΜΟΥ", "ΑΘΗΝΑΣ", "ΠΑΤΗΣΙΩΝ",
+    "ΒΟΥΚΟΥΡΕΣΤΙΟΥ", "ΟΜΗΡΟΥ", "ΠΙΝΔΑΡΟΥ", "ΧΑΡΗΤΟΣ", "ΙΠΠΟΚΡΑΤΟΥΣ", "ΝΕΑΠΟΛΕΩΣ",
+    "ΕΡΥΘΡΑΙΑΣ", "ΦΛΕΜΙΝΓΚ", "ΚΕΦΑΛΛΗΝΙΑΣ", "ΚΑΛΛΙΡΡΟΗΣ", "ΘΗΣΕΩΣ", "ΚΗΦΙΣΙΑΣ ΛΕΩΦ.",
+    "ΒΟΥΛΙΑΓΜΕΝΗΣ ΛΕΩΦ.", "ΒΕΝΙΖΕΛΟΥ ΕΛΕΥΘ. ΛΕΩΦ.", "ΚΑΝΑΡΗ Κ.", "ΓΡ. ΛΑΜΠΡΑΚΗ", "ΜΕΣΟΓΕΙΩΝ ΛΕΩΦ.",
+    "ΣΥΓΓΡΟΥ ΛΕΩΦ.", "ΑΓ. ΓΕΩΡΓΙΟΥ", "ΠΛΑΣΤΗΡΑ Ν.", "ΘΕΜΙΣΤΟΚΛΕΟΥΣ", "ΚΟΡΑΗ", "ΜΑΚΡΥΓΙΑΝΝΗ",
+]
+
+MUNICIPALITIES = [
+    ("ΑΘΗΝΑΙΩΝ", "10559"), ("ΑΘΗΝΑΙΩΝ", "10671"), ("ΑΘΗΝΑΙΩΝ", "10679"), ("ΠΕΙΡΑΙΩΣ", "18541"),
+    ("ΝΙΚΑΙΑΣ", "18451"), ("ΑΙΓΑΛΕΩ", "12242"), ("ΚΑΙΣΑΡΙΑΝΗΣ", "16121"), ("ΒΥΡΩΝΟΣ", "16231"),
+    ("ΔΑΦΝΗΣ", "17235"), ("ΑΓ. ΔΗΜΗΤΡΙΟΥ", "17341"), ("ΓΑΛΑΤΣΙΟΥ", "11147"),
+    ("ΝΕΑΣ ΦΙΛΑΔΕΛΦΕΙΑΣ", "14341"), ("ΜΕΤΑΜΟΡΦΩΣΕΩΣ", "14452"), ("ΑΧΑΡΝΩΝ", "13671"),
+    ("ΖΩΓΡΑΦΟΥ", "15771"), ("ΑΛΙΜΟΥ", "17456"), ("ΗΛΙΟΥΠΟΛΕΩΣ", "16345"), ("ΓΛΥΦΑΔΑΣ", "16675"),
+]
+
+OWNERS = ["ΤΡΑΠΕΖΑ  EUROBANK A.E.", "GRIVALIA PROPERTIES ΑΝΩΝΥΜΗ ΕΤΑΙΡΕΙΑ ΕΠΕΝΔΥΣΕΩΝ ΣΕ",
+          "ΣΙΔΕΡΗΣ ΔΗΜΗΤΡΙΟΣ & ΣΙΑ ΑΕ", "ΓΕΩΡΓΙΟΥ ΓΕΩΡΓΙΟΣ", "ΔΑΝΙΗΛ ΑΓΛΑΪΑ & ΛΟΙΠΟΙ ΣΥΝΙΔΙΟΚΤ"]
+
+# Share of each bill type in the Eurobank history
+BILL_TYPES = {
+    "ΛΟΓΑΡ. ΥΔΡΕΥΣΗΣ": 0.51,
+    "ΒΕΒΑΙΩΜΕΝΟΣ ΤΟΚΟΣ ΕΚΠΡΟΘΕΣΜΗΣ ΟΦΕΙΛΗΣ": 0.42,
+    "BEBAIΩΜΕΝΗ ΠΡΟΣΑΥΞΗΣΗ": 0.06,
+    "ΑΠΟΔΕΙΞΗ ΕΙΣΠΡΑΞΗΣ ΔΙΚΑΣΤΙΚΩΝ ΕΞΟΔΩΝ": 0.01,
+}
+WATER_BILL = "ΛΟΓΑΡ. ΥΔΡΕΥΣΗΣ"
+
+# Cubic metres per consumption tier (the last tier is unbounded) and price per cubic metre
+TIER_VOLUMES = [15.0, 35.0, 25.0, 27.0]
+TIER_PRICES = [0.35, 0.64, 1.83, 2.56, 3.20]
+TIER_COLUMNS = [("ΚΥΒΙΚΑ 1", "ΤΙΜΗΜΑ 1"), ("ΚΥΒΙΚΑ 2", "ΤΙΜΗΜΑ 2"), ("ΚΥΒ.3", "ΤΙΜ.3"),
+                ("ΚΥΒ.4", "ΤΙΜΗΜΑ 4"), ("ΚΥΒ.5", "ΤΙΜΗΜΑ 5")]
+
+# Rows of one worksheet (the header row takes the first of Excel's 1,048,576)
+MAX_WORKSHEET_ROWS = 1_048_575
+
+
+class SyntheticPortfolio:
+    """
+    A reproducible generator of monthly portfolio files.
+
+    The supplies (address, meter, owner, tenant, base reading) are fixed by
+    the seed; every month draws its bills from them, so files of consecutive
+    months share supplies and continue each other's meter readings.
+
+    Attributes:
+        rows (int): Rows per generated month.
+        duplicate_rate (float): Share of rows replaced by a copy of another row.
+        null_rate (float): Share of cells emptied in every mandatory column.
+        seed (int): Seed of the random generator.
+        supplies (pd.DataFrame): One row per supply with its fixed attributes.
+    """
+
+    def __init__(self, rows: int = 10_000, duplicate_rate: float = 0.0, null_rate: float = 0.0, seed: int = 0,
+                 num_supplies: Optional[int] = None) -> None:
+        """
+        Initialize the SyntheticPortfolio and draw its supplies.
+
+        Args:
+            rows (int, optional): Rows per month. Defaults to 10,000.
+            duplicate_rate (float, optional): Share of duplicate rows (0-1). Defaults to 0.
+            null_rate (float, optional): Share of missing values per mandatory column (0-1). Defaults to 0.
+            seed (int, optional): Random seed. Defaults to 0.
+            num_supplies (Optional[int], optional): Number of supplies. Defaults to
+                one per four rows, as in the real files.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If rows is not positive or a rate is outside [0, 1].
+        """
+        if rows <= 0:
+            raise ValueError("rows must be positive")
+        if not (0 <= duplicate_rate <= 1 and 0 <= null_rate <= 1):
+            raise ValueError("duplicate_rate and null_rate must be between 0 and 1")
+        self.rows = rows
+        self.duplicate_rate = duplicate_rate
+        self.null_rate = null_rate
+        self.seed = seed
+        self.supplies = self._draw_supplies(num_supplies or max(1, rows // 4))
+
+    def _draw_supplies(self, num_supplies: int) -> pd.DataFrame:
+        """
+        Draw the fixed attributes of every supply.
+
+        Args:
+            num_supplies (int): Number of supplies.
+
+        Returns:
+            pd.DataFrame: Supply number, address, meter, owner, tenant, AFM,
+                          reading at the start, monthly consumption and billing day.
+        """
+        rng = np.random.default_rng(self.seed)
+        streets = np.array(STREETS, dtype=object)[rng.integers(0, len(STREETS), num_supplies)]
+        numbers = rng.integers(1, 200, num_supplies)
+        municipalities = rng.integers(0, len(MUNICIPALITIES), num_supplies)
+        addresses = [f"{street} {number}  Δήμος {MUNICIPALITIES[m][0]} ΤΚ {MUNICIPALITIES[m][1]}"
+                     for street, number, m in zip(streets, numbers, municipalities)]
+        # Several supplies per building, as in the real portfolio
+        addresses = np.array(addresses, dtype=object)[rng.integers(0, max(1, num_supplies // 3), num_supplies)]
+
+        letters = np.array(list("ΑΒΓΔΕΖΚΜΠΡΣΤ"), dtype=object)
+        meters = (letters[rng.integers(0, len(letters), num_supplies)]
+                  + pd.Series(rng.integers(80, 100, num_supplies)).astype(str).to_numpy(dtype=object)
+                  + letters[rng.integers(0, len(letters), num_supplies)]
+                  + pd.Series(rng.integers(0, 100_000, num_supplies)).astype(str).str.zfill(5).to_numpy(dtype=object))
+        owners = np.array(OWNERS, dtype=object)[rng.choice(len(OWNERS), num_supplies, p=[0.8, 0.05, 0.05, 0.05, 0.05])]
+        return pd.DataFrame({
+            "ΑΡ.ΠΑΡΟΧΗΣ": 100 + 30 * np.arange(num_supplies) + rng.integers(0, 30, num_supplies),
+            "ΔΙΕΥΘΥΝΣΗ": addresses,
+            "ΑΡ.ΜΕΤΡΗΤΗ": meters,
+            "ΙΔΙΟΚΤΗΤΗΣ": owners,
+            "ΕΝΟΙΚΟΣ": np.where(rng.random(num_supplies) < 0.9, OWNERS[0], owners),
+            "ΑΦΜ": np.where(owners == OWNERS[0], 996866969, rng.integers(10**8, 10**9, num_supplies)),
+            "reading": rng.integers(0, 20_000, num_supplies),
+            "consumption": np.maximum(1, rng.lognormal(2.5, 1.0, num_supplies).round()).astype("int64"),
+            "day": rng.integers(0, 28, num_supplies),
+        })
+
+    def month(self, processed_month: int) -> pd.DataFrame:
+        """
+        Generate the portfolio file of one month.
+
+        Args:
+            processed_month (int): Month of the file as YYYYMM.
+
+        Returns:
+            pd.DataFrame: self.rows bills with the columns of Constants.COLUMN_NAMES.
+        """
+        rng = np.random.default_rng([self.seed, processed_month])
+        n = self.rows
+        year, month = divmod(processed_month, 100)
+        month_index = year * 12 + month - 1
+        month_start = pd.Timestamp(date(year, month, 1))
+        previous_start = month_start - pd.DateOffset(months=1)
+
+        supply = self.supplies.iloc[rng.integers(0, len(self.supplies), n)].reset_index(drop=True)
+        bill_type = np.array(list(BILL_TYPES), dtype=object)[rng.choice(len(BILL_TYPES), n, p=list(BILL_TYPES.values()))]
+        water = bill_type == WATER_BILL
+        days = pd.to_timedelta(supply["day"].to_numpy(), unit="D")
+        issued = month_start + pd.to_timedelta(rng.integers(0, 28, n), unit="D")
+
+        # Readings advance by the supply's consumption every month since 2000
+        consumption = supply["consumption"].to_numpy()
+        current = supply["reading"].to_numpy() + consumption * max(0, month_index - 2000 * 12)
+        volumes, charges, remaining = [], [], consumption.astype("float64")
+        for cap, price in zip(TIER_VOLUMES + [np.inf], TIER_PRICES):
+            volume = np.minimum(remaining, cap)
+            remaining = remaining - volume
+            volumes.append(np.where(volume > 0, volume, np.nan))
+            charges.append(np.where(volume > 0, (volume * price).round(2), np.nan))
+        charge = np.nansum(charges, axis=0).round(2)
+        fixed = rng.uniform(3.0, 3.5, n).round(2)
+        sewage = (charge * rng.uniform(0.6, 0.8, n)).round(2)
+        other_charges = (fixed + sewage).round(2)
+        vat_charge = (charge * 0.13).round(2)
+        vat_other = (other_charges * 0.24).round(2)
+        fee = rng.lognormal(1.0, 1.0, n).round(2)
+        total = np.where(water, (charge + other_charges + vat_charge + vat_other).round(2), fee)
+
+        def water_only(values: np.ndarray) -> np.ndarray:
+            return np.where(water, values, np.nan)
+
+        # Invoice numbers are unique within the month and never repeat another month's
+        first_invoice = year * 10**10 + month * 10**8
+        step = max(1, 10**8 // (n + 1))
+        invoices = first_invoice + np.arange(n, dtype="int64") * step + rng.integers(0, step, n)
+
+        columns: Dict[str, object] = {
+            "ΔΙΑΔΡΟΜΗ": water_only(rng.integers(1, 80, n).astype("float64")),
+            "ΑΡ.ΠΑΡΟΧΗΣ": supply["ΑΡ.ΠΑΡΟΧΗΣ"].to_numpy(),
+            "ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΑΠΌ": pd.Series(previous_start + days).where(water),
+            "ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΕΩΣ": pd.Series(month_start + days - pd.Timedelta(days=1)).where(water),
+            "ΗΜΕΡ.ΛΗΞΕΩΣ": issued + pd.to_timedelta(np.where(water, 28, 0), unit="D"),
+            "ΗΜ.ΚΑΤΑΝΑΛΩΣΗΣ": water_only(np.full(n, float((month_start - previous_start).days))),
+            "ΠΕΡΙΦ.ΓΡΑΦ.": np.array(list("ΑΖΒΘΔΠΙΕ"), dtype=object)[rng.integers(0, 8, n)],
+            "ΤΙΜΟΛΟΓΙΟ": np.where(water, "Β1", None),
+            "ΙΔΙΟΚΤΗΤΗΣ": supply["ΙΔΙΟΚΤΗΤΗΣ"].to_numpy(),
+            "ΕΝΟΙΚΟΣ": supply["ΕΝΟΙΚΟΣ"].to_numpy(),
+            "ΔΙΕΥΘΥΝΣΗ": supply["ΔΙΕΥΘΥΝΣΗ"].to_numpy(),
+            "ΑΦΜ": supply["ΑΦΜ"].to_numpy(),
+            "ΑΡ.ΜΕΤΡΗΤΗ": np.where(water, supply["ΑΡ.ΜΕΤΡΗΤΗ"].to_numpy(), None),
+            "ΔΙΑΜ.": np.where(water, np.where(rng.random(n) < 0.83, "[ 5/8 ]", "[ 3/4 ]"), None),
+            "ΠΡΟΗΓ.ΕΝΔ.": np.where(water, current - consumption, 0),
+            "ΠΑΡ.ΕΝΔΕΙΞΗ": np.where(water, current, 0),
+            "ΤΕΚΜ.": np.where(water & (rng.random(n) < 0.3), rng.uniform(5.5, 6.5, n).round(1), 0.0),
+            "ΤΡΙΜ": np.where(water, consumption, 0),
+            "ΠΡΟΣΘ": np.zeros(n, dtype="int64"),
+            "ΤΥΠΟΣ ΛΟΓΑΡΙΑΣΜΟΥ": bill_type,
+        }
+        for (volume_col, charge_col), volume, tier_charge in zip(TIER_COLUMNS, volumes, charges):
+            columns[volume_col] = water_only(volume)
+            columns[charge_col] = water_only(tier_charge)
+        columns.update({
+            "ΤΙΜΗΜΑ": water_only(charge),
+            "ΠΑΓΙΟ": water_only(fixed),
+            "ΤΕΑΠ": np.full(n, np.nan),
+            "ΟΑΠ": water_only(sewage),
+            "ΦΠΑ ΤΙΜ.": np.where(water, vat_charge, 0.0),
+            "ΦΠΑ ΛΟΙΠΩΝ": water_only(vat_other),
+            "ΕΡΓΑΣΙΕΣ": np.where(water, np.nan, fee),
+            "ΔΙΑΦ.ΚΕΡΜ.": np.zeros(n),
+            "ΚΥΡΙΑ ΟΦ.": total,
+            "ΠΙΣΤΩΤΙΚΟ": np.zeros(n),
+            "ΟΦΕΙΛΗ": total,
+            "ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ": invoices,
+            "ΗΜΕΡΟΜ.ΕΚΔΟΣΗΣ": issued,
+        })
+        portfolio = pd.DataFrame(columns)[Constants.COLUMN_NAMES]
+        return self._inject_errors(portfolio, rng)
+
+    def _inject_errors(self, portfolio: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+        """
+        Replace rows by copies of others and empty mandatory cells at the configured rates.
+
+        Args:
+            portfolio (pd.DataFrame): A clean generated month.
+            rng (np.random.Generator): The month's random generator.
+
+        Returns:
+            pd.DataFrame: The portfolio with the injected duplicates and missing values.
+        """
+        n = len(portfolio)
+        num_duplicates = int(round(n * self.duplicate_rate))
+        if num_duplicates and n > 1:
+            targets = rng.choice(n, num_duplicates, replace=False)
+            sources = rng.choice(np.setdiff1d(np.arange(n), targets), num_duplicates)
+            portfolio.iloc[targets] = portfolio.iloc[sources].to_numpy()
+        if self.null_rate:
+            for col in Constants.NON_NULLABLE_COLUMNS:
+                empty = rng.random(n) < self.null_rate
+                if empty.any():
+                    portfolio[col] = portfolio[col].mask(empty)
+        return portfolio
+
+    def write_workbook(self, path: str, processed_month: int) -> int:
+        """
+        Write one month to an .xlsx workbook, streaming rows through openpyxl.
+
+        Args:
+            path (str): Destination .xlsx file.
+            processed_month (int): Month of the file as YYYYMM.
+
+        Returns:
+            int: Number of data rows written.
+
+        Raises:
+            ValueError: If self.rows does not fit in one worksheet.
+
+        Side Effects:
+            - Writes the workbook to path
+        """
+        from openpyxl import Workbook
+
+        if self.rows > MAX_WORKSHEET_ROWS:
+            raise ValueError(f"{self.rows} rows do not fit in one worksheet (max {MAX_WORKSHEET_ROWS})")
+        portfolio = self.month(processed_month)
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(portfolio.columns))
+        for row in portfolio.astype(object).where(portfolio.notna(), None).itertuples(index=False):
+            sheet.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value for value in row])
+        workbook.save(path)
+        return len(portfolio)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic monthly portfolio workbook.")
+    parser.add_argument("output", help="path of the .xlsx workbook to write")
+    parser.add_argument("--rows", type=int, default=10_000, help="number of rows")
+    parser.add_argument("--month", type=int, default=int(date.today().strftime("%Y%m")), help="month as YYYYMM")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of duplicate rows")
+    parser.add_argument("--null-rate", type=float, default=0.0, help="share of missing mandatory values")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    generator = SyntheticPortfolio(args.rows, duplicate_rate=args.duplicate_rate, null_rate=args.null_rate, seed=args.seed)
+    written = generator.write_workbook(args.output, args.month)
+    print(f"{written} rows written to {args.output}")
@@ -2,14 +2,26 @@
 Master file update module for the Streamlit application.
 
 This module provides functionality to update master files by checking for new
-supply IDs in uploaded portfolio files and alerting users to add them.
+supply IDs in uploaded portfolio files and alerting users to add them. Master
+files come from the shared MasterFileRegistry, so they are only parsed again
+after they change. New supplies can be added to the registry from the upload,
+and the updated master file is generated only when it is downloaded.
 """
 
+import re
 import pandas as pd
 from constants import Constants
 import streamlit as st
+from datetime import datetime
+from src.masterfile_registry import SUPPLY_COLUMN, masterfile_registry, supply_keys
+from src.update_timeseries import TimeSeriesUpdate
 from typing import Literal
 
+# '<street> <number> Δήμος <municipality> ΤΚ <postcode>', e.g.
+# 'ΚΑΛΛΙΡΡΟΗΣ 19 Α Δήμος ΑΘΗΝΑΙΩΝ ΤΚ 11743'; the number is optional
+ADDRESS_PARTS = re.compile(r"^(?P<street>.*?)(?:\s+(?P<number>\d\S*(?: \S)?))?\s+Δήμος\s+"
+                           r"(?P<municipality>.*?)\s+ΤΚ\s*(?P<postcode>\d{3}\s?\d{2})\s*$")
+
 class MasterFileUpdate:
     """
     A class for updating master files with new supply IDs from portfolio data.
@@ -20,6 +32,7 @@ class MasterFileUpdate:
     
     Attributes:
         portfolio_type (str): Type of portfolio ('eurobank' or 'management').
+        registry (MasterFileRegistry): The master file with its supply ID index.
         masterfile (pd.DataFrame): The existing master file DataFrame.
         new_file (pd.DataFrame): The newly uploaded portfolio DataFrame.
         path (str): Base path for master file storage (class attribute).
@@ -39,18 +52,66 @@ class MasterFileUpdate:
             None
         """
         self.portfolio_type = portfolio_type.lower() 
-        if self.portfolio_type == "eurobank":
-            self.masterfile = pd.read_excel(self.path + "eurobank_masterfile.xlsx")
-        elif self.portfolio_type == "management":
-            self.masterfile = pd.read_excel(self.path + "management_masterfile.xlsx")
+        self.registry = masterfile_registry(self.portfolio_type)
+        self.masterfile = self.registry.masterfile
         self.new_file = new_file
         
+    def new_supply_rows(self, untracked_rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Turn the bills of untracked supplies into master file rows.
+
+        The address is split into street, number, postcode and municipality;
+        the meter is the one of the supply's latest bill. Columns the monthly
+        file has no value for (e.g. 'ΚΩΔ ΑΚΙΝ') are left empty.
+
+        Args:
+            untracked_rows (pd.DataFrame): Bills whose supply ID is not in the master file.
+
+        Returns:
+            pd.DataFrame: One row per supply, with the master file's columns.
+        """
+        bills = untracked_rows
+        if 'ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΕΩΣ' in bills.columns:
+            bills = bills.sort_values('ΠΕΡΙΟΔΟΣ ΚΑΤΑΝΑΛΩΣΗΣ ΕΩΣ', kind='stable')
+        meters = bills['ΑΡ.ΜΕΤΡΗΤΗ'].dropna() if 'ΑΡ.ΜΕΤΡΗΤΗ' in bills.columns else pd.Series(dtype=object)
+        supplies = bills.assign(**{'ΑΡ.ΜΕΤΡΗΤΗ': TimeSeriesUpdate.invoice_keys(meters).reindex(bills.index)})
+        supplies = (supplies.reindex(columns=['ΔΙΕΥΘΥΝΣΗ', 'ΑΡ.ΜΕΤΡΗΤΗ'])
+                    .groupby(supply_keys(supplies['ΑΡ.ΠΑΡΟΧΗΣ'])).last())
+        address = supplies['ΔΙΕΥΘΥΝΣΗ'].astype(str).str.extract(ADDRESS_PARTS)
+        rows = pd.DataFrame({
+            SUPPLY_COLUMN: supplies.index,
+            'Δ/ση ακινήτου': address['street'].fillna(supplies['ΔΙΕΥΘΥΝΣΗ']).to_numpy(),
+            'Δση_αριθμ': address['number'].to_numpy(),
+            'Δση_ΤΚ': pd.to_numeric(address['postcode'].str.replace(" ", ""), errors='coerce').to_numpy(),
+            'Δση_δήμος': address['municipality'].to_numpy(),
+            'Ενεργός Μετρητής': supplies['ΑΡ.ΜΕΤΡΗΤΗ'].to_numpy(),
+        })
+        return rows.reindex(columns=self.masterfile.columns)
+
+    def add_new_supplies(self, untracked_rows: pd.DataFrame) -> int:
+        """
+        Upsert the untracked supplies into the master file registry.
+
+        Args:
+            untracked_rows (pd.DataFrame): Bills whose supply ID is not in the master file.
+
+        Returns:
+            int: Number of supplies written.
+
+        Side Effects:
+            - Appends the new rows to the registry's delta log
+        """
+        written = self.registry.upsert(self.new_supply_rows(untracked_rows))
+        self.masterfile = self.registry.masterfile
+        return written
+
     def update_masterfile(self) -> None:
         """
-        Check for new supply IDs and display untracked ones.
+        Check for new supply IDs, display untracked ones and offer to add them.
         
-        Compares supply IDs in the new file against the master file and identifies
-        any supply IDs that exist in the new file but not in the master file.
+        Compares supply IDs in the new file against the master file's supply ID
+        index and identifies any supply IDs that exist in the new file but not in
+        the master file.
         Displays a warning with the untracked rows if new supply IDs are found.
         
         Returns:
@@ -60,15 +121,35 @@ class MasterFileUpdate:
             - Displays warning message if new supply IDs are found
             - Shows DataFrame with untracked rows
             - Displays info message if no new supply IDs found
+            - Adds the new supply IDs to the master file registry when the button is clicked
+            - Tells how many added supply IDs the master file workbook does not hold yet
+            - Provides a download button for the up-to-date master file
         """
         
-        unique_supply_ids_newfile = set(self.new_file['ΑΡ.ΠΑΡΟΧΗΣ'].unique())
-        unique_supply_ids_masterfile = set(self.masterfile['Παροχή'].unique())
-        untracked_supply_ids = list(unique_supply_ids_newfile - unique_supply_ids_masterfile)
-        untracked_rows = self.new_file[self.new_file['ΑΡ.ΠΑΡΟΧΗΣ'].isin(untracked_supply_ids)]
+        # Vectorised hash lookup of the integer supply IDs in the registry's index
+        untracked_rows = self.new_file[self.registry.untracked(self.new_file['ΑΡ.ΠΑΡΟΧΗΣ'])]
         
-        if untracked_supply_ids:
+        if not untracked_rows.empty:
             st.warning(f"There are new supply IDs! Please add them to the master file")
             st.dataframe(untracked_rows)
+            num_supplies = untracked_rows['ΑΡ.ΠΑΡΟΧΗΣ'].nunique()
+            if num_supplies and st.button(f"Add {num_supplies} new supply IDs to the master file", key=f"add_supplies_{self.portfolio_type}"):
+                written = self.add_new_supplies(untracked_rows)
+                st.success(f"Added {written} supply IDs to the {self.portfolio_type} master file.")
         else:
-            st.info("No new supply IDs found compared to masterfile.")
\ No newline at end of file
+            st.info("No new supply IDs found compared to masterfile.")
+
+        if len(self.registry.upserted):
+            st.info(f"{len(self.registry.upserted)} added supply IDs are not in "
+                    f"{self.registry.masterfile_path(self.portfolio_type)} yet. They are kept in "
+                    f"{self.registry.delta_path(self.portfolio_type)} until the master file "
+                    f"downloaded below replaces it.")
+
+        # The workbook is only generated when the button is clicked
+        current_date = datetime.now().strftime("%Y%m%d")
+        st.download_button(
+            label=f"Download {self.portfolio_type.title()} Master File",
+            data=self.registry.to_xlsx,
+            file_name=f"{self.portfolio_type}_masterfile_{current_date}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
\ No newline at end of file
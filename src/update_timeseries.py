@@ -3,6 +3,10 @@ Time series update module for the Streamlit application.
 
 This module provides functionality to append new monthly portfolio data to
 historical database files while checking for duplicates and data integrity.
+The history itself is only verified where it changed, through its
+IntegrityWatermark, and meter-reading continuity is checked against its
+SupplyState. Appended months are added to the shared EntityIndex and to the
+portfolio's supply activity bitmap.
 """
 
 import pandas as pd
@@ -10,10 +14,14 @@ import streamlit as st
 import time
 from io import BytesIO
 from constants import Constants
-from src.single_file_checks import MonthlyDataChecks
+from src.activity_bitmap import activity_bitmap
+from src.entity_index import shared_entity_index
+from src.integrity_watermark import IntegrityWatermark, file_signature
+from src.supply_state import SupplyState
 from src.utils import animate_progress
+from src.validation_scheduler import ValidationScheduler
 from datetime import datetime
-from typing import Literal, Optional, Union
+from typing import List, Literal, Optional, Tuple, Union
 
 class TimeSeriesUpdate:
     """
@@ -26,7 +34,11 @@ class TimeSeriesUpdate:
     Attributes:
         new_file (pd.DataFrame): The newly uploaded portfolio DataFrame to be added.
         portfolio_type (str): Type of portfolio ('eurobank' or 'management').
+        processed_month (Optional[int]): Month of the new file as YYYYMM, if known.
         timeseries (pd.DataFrame): The existing historical database DataFrame.
+        source (Optional[str]): Signature of the file the history was read from, if any.
+        watermark (Optional[IntegrityWatermark]): Verified state of the history, set by verify_history().
+        supply_state (Optional[SupplyState]): Last state per supply of the history, set by load_supply_state().
         path (str): Base path for time series storage (class attribute).
         export_path (str): Path for exported files (class attribute).
     """
@@ -34,23 +46,164 @@ class TimeSeriesUpdate:
     path = Constants.TIMESERIES_PATH
     export_path = Constants.EXPORT_PATH
     
-    def __init__(self, new_file: pd.DataFrame, portfolio_type: Literal["eurobank", "management"]) -> None:
+    def __init__(self, new_file: pd.DataFrame, portfolio_type: Literal["eurobank", "management"], timeseries: Optional[pd.DataFrame] = None, processed_month: Optional[int] = None) -> None:
         """
         Initialize the TimeSeriesUpdate with new portfolio data.
         
         Args:
             new_file (pd.DataFrame): The newly uploaded portfolio DataFrame to append.
             portfolio_type (Literal["eurobank", "management"]): The type of portfolio to process.
+            timeseries (Optional[pd.DataFrame], optional): An already loaded historical
+                database, e.g. when several months are appended in a row. Defaults to
+                reading the portfolio's historical database file.
+            processed_month (Optional[int], optional): Month of the new file as YYYYMM,
+                written to the 'Processed_Month' column on append. Defaults to None.
         
         Returns:
             None
         """
         self.new_file = new_file
         self.portfolio_type = portfolio_type.lower()
-        if self.portfolio_type == "eurobank":
+        self.processed_month = processed_month
+        self.source = None
+        self.watermark = None
+        self.supply_state = None
+        if timeseries is not None:
+            self.timeseries = timeseries
+        elif self.portfolio_type == "eurobank":
             self.timeseries = pd.read_excel(self.path + "eurobank_historical_db.xlsx")
+            self.source = file_signature(self.path + "eurobank_historical_db.xlsx")
         elif self.portfolio_type == "management":
             self.timeseries = pd.read_excel(self.path + "management_historical_db.xlsx")
+            self.source = file_signature(self.path + "management_historical_db.xlsx")
+
+    def verify_history(self) -> IntegrityWatermark:
+        """
+        Verify the parts of the historical database that changed since they were last verified.
+        
+        Returns:
+            IntegrityWatermark: The up-to-date watermark of the history, also kept
+                                in self.watermark.
+        
+        Side Effects:
+            - Updates the stored watermark of the portfolio type
+        """
+        watermark = IntegrityWatermark.load(self.portfolio_type)
+        watermark.reconcile(self.timeseries, source=self.source)
+        self.watermark = watermark
+        return watermark
+
+    def load_supply_state(self) -> SupplyState:
+        """
+        Load the last state per supply and apply the months of the history it lacks.
+        
+        Returns:
+            SupplyState: The up-to-date supply state, also kept in self.supply_state.
+        
+        Side Effects:
+            - Updates the stored supply state of the portfolio type
+        """
+        supply_state = SupplyState.load(self.portfolio_type)
+        supply_state.reconcile(self.timeseries, source=self.source)
+        self.supply_state = supply_state
+        return supply_state
+
+    def check_continuity(self) -> pd.DataFrame:
+        """
+        Check that the new file continues the meter readings of the history.
+        
+        Returns:
+            pd.DataFrame: The discontinuities (reading mismatches and meter changes)
+                          per supply, empty if there are none.
+        """
+        supply_state = self.supply_state or self.load_supply_state()
+        return supply_state.check_continuity(self.new_file)
+
+    def update_entity_index(self) -> None:
+        """
+        Add the buildings, supplies and tenants of the new file to the shared entity index.
+        
+        The index is only advanced in memory, like the SupplyState of a batch:
+        the appended database is offered as a download and the history file
+        on disk is unchanged, so the month is only stored once reconcile finds
+        it in the history file.
+        
+        Returns:
+            None
+        
+        Side Effects:
+            - Advances the process-wide entity index, so the search bar finds them
+        """
+        entities = shared_entity_index()
+        entities.advance(self.portfolio_type, self.new_file, self.processed_month, pending=True)
+
+    def update_activity(self) -> None:
+        """
+        Set the new file's month in the supply activity bitmap of the portfolio type.
+        
+        As with the entity index, the month is only set in memory and marked
+        pending; it is stored once reconcile finds it in the history file.
+        
+        Returns:
+            None
+        
+        Side Effects:
+            - Advances the process-wide activity bitmap, used by the Comparison tab
+        """
+        bitmap = activity_bitmap(self.portfolio_type)
+        bitmap.advance(self.new_file, self.processed_month, pending=True)
+
+    def find_existing_invoices(self) -> Tuple[List[str], int]:
+        """
+        Find invoices of the new file that are already in the historical database.
+        
+        Uses the invoice numbers stored in the watermark once verify_history()
+        has run, so the history itself is not scanned.
+        
+        Returns:
+            Tuple[List[str], int]: The invoice numbers ('ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ') found in both,
+                                   and the number of distinct invoices in the new file.
+        """
+        if self.watermark is not None:
+            return self.watermark.existing_invoices(self.new_file)
+        unique_invoice_timeseries = set(self.invoice_keys(self.timeseries['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ']).unique())
+        unique_invoice_newfile = set(self.invoice_keys(self.new_file['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ']).unique())
+        common_ids = list(unique_invoice_timeseries.intersection(unique_invoice_newfile))
+        return common_ids, len(unique_invoice_newfile)
+
+    @staticmethod
+    def invoice_keys(invoices: pd.Series) -> pd.Series:
+        """
+        Convert invoice numbers to comparable strings.
+        
+        The historical database stores invoice numbers as floats (because of
+        empty cells) while monthly files store them as integers, so a plain
+        astype(str) gives '20250007703139.0' on one side and '20250007703139'
+        on the other. Whole numbers are therefore written without decimals.
+        
+        Args:
+            invoices (pd.Series): Invoice numbers ('ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ') of any dtype.
+        
+        Returns:
+            pd.Series: Invoice numbers as strings, consistent across dtypes.
+        """
+        numeric = pd.to_numeric(invoices, errors='coerce')
+        is_whole = numeric.notna() & (numeric % 1 == 0)
+        keys = invoices.astype(str).str.strip()
+        keys[is_whole] = numeric[is_whole].astype('int64').astype(str)
+        return keys
+
+    def append_new_data(self) -> pd.DataFrame:
+        """
+        Concatenate the new file to the historical database without any checks or UI.
+        
+        Returns:
+            pd.DataFrame: The updated historical database.
+        """
+        new_file = self.new_file
+        if self.processed_month is not None and 'Processed_Month' not in new_file.columns:
+            new_file = new_file.assign(Processed_Month=self.processed_month)
+        return pd.concat([self.timeseries, new_file], ignore_index=True)
 
     def add_new_data(self) -> Union[pd.DataFrame, bool]:
         """
@@ -60,9 +213,16 @@ class TimeSeriesUpdate:
         1. Checks for missing columns in the time series
         2. Checks for duplicate rows within the time series
         3. Checks if the new data already exists in the time series
+        4. Checks meter-reading continuity with the history (warnings only)
+        
+        Checks 1 and 2 are answered by the history's IntegrityWatermark, which
+        only verifies partitions (months) that changed since the last upload,
+        and check 3 compares the new file with the invoice numbers stored in it.
+        Check 4 joins the new file against the history's SupplyState.
         
         If all checks pass, the new data is concatenated with the existing time series
-        and offered as a download. The process is visualized with an animated progress bar.
+        and offered as a download. The process is visualized with an animated progress bar;
+        the history is verified in the background while it animates.
         
         Returns:
             Union[pd.DataFrame, bool]: The updated DataFrame if successful, False if
@@ -72,18 +232,25 @@ class TimeSeriesUpdate:
             - Displays progress bar and status messages during processing
             - Shows error/warning/info messages for various validation states
             - Provides download button for updated database
-            - Displays expandable DataFrames for duplicate rows
+            - Displays expandable DataFrames for duplicate rows and discontinuities
+            - Adds the new file's entities to the shared entity index
+            - Sets the new file's month in the supply activity bitmap
         """
                 
         progress_bar = st.progress(0)
         status_text = st.empty()
         info_messages = []
         
-        # Check 1: Column presence
-        status_text.text("Checking columns...")
-        progress_bar = animate_progress(progress_bar, 0, 33)
-        single_file_checks = MonthlyDataChecks(self.timeseries, self.portfolio_type)
-        missing_cols = single_file_checks.exist_all_columns()
+        with ValidationScheduler() as scheduler:
+            scheduler.add("history", self.verify_history)
+            scheduler.add("supply_state", self.load_supply_state)
+            
+            # Check 1: Column presence
+            status_text.text("Checking columns...")
+            progress_bar = animate_progress(progress_bar, 0, 33)
+            watermark = scheduler.result("history")
+            scheduler.result("supply_state")
+        missing_cols = watermark.missing_columns()
         if len(missing_cols) > 0:
             status_text.empty()
             progress_bar.empty()
@@ -96,31 +263,29 @@ class TimeSeriesUpdate:
         # Check 2: Duplicates
         status_text.text("Checking for duplicates in timeseries...")
         progress_bar = animate_progress(progress_bar, 33, 66)
-        num_duplicates, all_duplicates = single_file_checks.exist_duplicates()
+        num_duplicates = watermark.num_duplicates()
+        all_duplicates = watermark.duplicate_rows(self.timeseries) if num_duplicates else None
         if num_duplicates > 0:
             status_text.empty()
             progress_bar.empty()
             st.error(f"{self.portfolio_type} Timeseries has {num_duplicates} duplicate rows")
-            with st.expander("View duplicate rows based on 'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ' column"):
-                st.dataframe(all_duplicates)
+            with st.expander(f"View duplicate rows based on {', '.join(watermark.key_columns)}"):
+                st.dataframe(all_duplicates, hide_index=True)
             return
         else:
             info_placeholder = st.empty()
             info_messages.append(info_placeholder)
             
         # Check 3: Check if new data already in timeseries
-        unique_invoice_timeseries = set(self.timeseries['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ'].astype(str).unique())
-        unique_invoice_newfile = set(self.new_file['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ'].astype(str).unique())
-        common_ids = unique_invoice_timeseries.intersection(unique_invoice_newfile)
-        common_ids = list(common_ids)
+        common_ids, num_invoices_newfile = self.find_existing_invoices()
         if common_ids:
             status_text.empty()
             progress_bar.empty()
-            if len(common_ids) == len(list(unique_invoice_newfile)):
+            if len(common_ids) == num_invoices_newfile:
                 st.info(f"File already in database.")
             else:
-                st.info(f"{len(common_ids)}/{len(unique_invoice_newfile)} records already in database.")
-                df_duplicates = self.new_file[self.new_file['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ'].astype(str).isin(common_ids)]
+                st.info(f"{len(common_ids)}/{num_invoices_newfile} records already in database.")
+                df_duplicates = self.new_file[self.invoice_keys(self.new_file['ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ']).isin(common_ids)]
                 st.error(f"{self.portfolio_type} portfolio has {len(df_duplicates)} duplicate rows with database")
                 with st.expander("View duplicate rows based on 'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ' column"):
                     st.dataframe(df_duplicates)
@@ -131,10 +296,18 @@ class TimeSeriesUpdate:
         
         else:
         
+            # Check 4: Meter-reading continuity (does not block the append)
+            discontinuities = self.check_continuity()
+            if not discontinuities.empty:
+                st.warning(f"{len(discontinuities)} supplies do not continue their last meter reading or meter number")
+                with st.expander("View meter-reading discontinuities"):
+                    st.dataframe(discontinuities, hide_index=True)
+            
             status_text.text("Appending new file to timeseries...")
             progress_bar = animate_progress(progress_bar, 66, 100)
-            updated_timeseries = pd.concat([self.timeseries, self.new_file], ignore_index=True)
-            updated_timeseries.reset_index(drop=True, inplace=True)
+            updated_timeseries = self.append_new_data()
+            self.update_entity_index()
+            self.update_activity()
             buffer = BytesIO()
             updated_timeseries.to_excel(buffer, index=False)
             buffer.seek(0)
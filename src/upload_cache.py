@@ -0,0 +1,203 @@
+"""
+Upload cache module for the Streamlit application.
+
+This module identifies uploaded files by a streaming SHA-256 of their bytes and
+keeps persistent on-disk caches from that hash to the parsed, validated
+portfolio DataFrame and to the validation verdict, so re-uploading the same
+file (in any session, or after a server restart) skips Excel parsing and
+validation entirely. Entries are also keyed by the version of the validation
+rules, so changing a rule in Constants invalidates them automatically.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Any, BinaryIO, Dict, Optional
+
+import pandas as pd
+from constants import Constants
+from src.validation_engine import rule_set_version
+
+
+def file_sha256(file: BinaryIO, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 of a file-like object without loading it at once.
+
+    The stream is rewound before and after hashing so it can still be read
+    by the Excel parser afterwards.
+
+    Args:
+        file (BinaryIO): The uploaded file (or any seekable binary stream).
+        chunk_size (int, optional): Bytes read per iteration. Defaults to 1 MiB.
+
+    Returns:
+        str: Hex SHA-256 digest of the file's bytes.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """
+    A persistent cache of parsed and validated portfolio files keyed by content hash.
+
+    Entries are pickled DataFrames, which keep the exact dtypes produced by
+    the Excel parser. They are written atomically so that a concurrent reader
+    never sees a partially written file. A file validated under older rules
+    is a cache miss.
+
+    Attributes:
+        path (str): Directory holding the cached frames (class attribute).
+    """
+
+    path = os.path.join(Constants.CACHE_PATH, "uploads")
+
+    @classmethod
+    def _entry_path(cls, file_hash: str, portfolio_type: str) -> str:
+        """
+        Build the on-disk path of a cache entry.
+
+        Args:
+            file_hash (str): SHA-256 of the uploaded file.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            str: Path of the pickled entry.
+        """
+        return os.path.join(cls.path, f"{portfolio_type.lower()}_{file_hash}_{rule_set_version()}.pkl")
+
+    @classmethod
+    def _read(cls, file_hash: str, portfolio_type: str) -> Optional[Any]:
+        """
+        Unpickle a cache entry.
+
+        Args:
+            file_hash (str): SHA-256 of the uploaded file.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            Optional[Any]: The cached object, or None on a cache miss or if the
+                           entry cannot be read.
+        """
+        entry = cls._entry_path(file_hash, portfolio_type)
+        if not os.path.exists(entry):
+            return None
+        try:
+            return pd.read_pickle(entry)
+        except Exception:
+            # A corrupt or incompatible entry is treated as a miss and rebuilt
+            return None
+
+    @classmethod
+    def _write(cls, file_hash: str, portfolio_type: str, obj: Any) -> None:
+        """
+        Pickle a cache entry atomically.
+
+        Args:
+            file_hash (str): SHA-256 of the uploaded file.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+            obj (Any): The object to store.
+
+        Returns:
+            None
+        """
+        os.makedirs(cls.path, exist_ok=True)
+        entry = cls._entry_path(file_hash, portfolio_type)
+        tmp_entry = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pd.to_pickle(obj, tmp_entry)
+        os.replace(tmp_entry, entry)
+
+    @classmethod
+    def get(cls, file_hash: str, portfolio_type: str) -> Optional[pd.DataFrame]:
+        """
+        Load a previously parsed and validated file.
+
+        A cached frame is only trusted if the VerdictCache holds a passing
+        verdict for the same file and rule set.
+
+        Args:
+            file_hash (str): SHA-256 of the uploaded file.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            Optional[pd.DataFrame]: The cached DataFrame, or None on a cache miss,
+                                    if the entry cannot be read or if no passing
+                                    verdict is recorded for the file.
+        """
+        verdict = VerdictCache.get(file_hash, portfolio_type)
+        if verdict is None or not verdict.get("passed"):
+            return None
+        return cls._read(file_hash, portfolio_type)
+
+    @classmethod
+    def put(cls, file_hash: str, portfolio_type: str, df: pd.DataFrame) -> None:
+        """
+        Store a parsed and validated file in the cache.
+
+        Args:
+            file_hash (str): SHA-256 of the uploaded file.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+            df (pd.DataFrame): The parsed portfolio DataFrame.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Writes a pickle file under Constants.CACHE_PATH/uploads
+        """
+        cls._write(file_hash, portfolio_type, df)
+
+
+class VerdictCache(UploadCache):
+    """
+    A persistent cache of validation reports keyed by content hash and rule-set version.
+
+    Unlike UploadCache it also remembers files that failed, so uploading a
+    rejected file again returns the same findings without parsing it.
+
+    Attributes:
+        path (str): Directory holding the cached reports (class attribute).
+    """
+
+    path = os.path.join(Constants.CACHE_PATH, "verdicts")
+
+    @classmethod
+    def get(cls, file_hash: str, portfolio_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the validation report of a previously validated file.
+
+        Args:
+            file_hash (str): SHA-256 of the uploaded file.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+
+        Returns:
+            Optional[Dict[str, Any]]: The report returned by the validator, or None
+                                      if the file was not validated under the
+                                      current rules.
+        """
+        return cls._read(file_hash, portfolio_type)
+
+    @classmethod
+    def put(cls, file_hash: str, portfolio_type: str, report: Dict[str, Any]) -> None:
+        """
+        Store the validation report of a file.
+
+        The 'duplicates' frame is left out; it is a copy of rows of the file
+        and the per-row 'violations' report already identifies them.
+
+        Args:
+            file_hash (str): SHA-256 of the uploaded file.
+            portfolio_type (str): Portfolio type ('eurobank' or 'management').
+            report (Dict[str, Any]): The report returned by the validator.
+
+        Returns:
+            None
+
+        Side Effects:
+            - Writes a pickle file under Constants.CACHE_PATH/verdicts
+        """
+        cls._write(file_hash, portfolio_type, {key: value for key, value in report.items() if key != "duplicates"})
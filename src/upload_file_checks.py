@@ -1,6 +1,6 @@
 import pandas as pd
 import streamlit as st
-from typing import Optional, Any
+from typing import BinaryIO, List, Optional, Any, Tuple
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 class UploadedFileCheck:
@@ -37,6 +37,30 @@ class UploadedFileCheck:
             self.sheet_names = self.excel_file.sheet_names
             self.df = pd.DataFrame()
         
+    @staticmethod
+    def read_workbook(file: BinaryIO, sheet_name: Optional[str] = None) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Read one sheet of an Excel workbook without any user interaction.
+        
+        Used where no one can be prompted for a sheet (e.g. batch uploads
+        processed in a worker pool): the requested sheet, or the first one, is read.
+        
+        Args:
+            file (BinaryIO): The Excel file or a seekable binary stream.
+            sheet_name (Optional[str], optional): Sheet to read. Defaults to the first sheet.
+        
+        Returns:
+            Tuple[pd.DataFrame, List[str]]: The sheet's data and the names of all
+                                            sheets in the workbook.
+        
+        Raises:
+            ValueError: If the file is not a readable Excel workbook.
+        """
+        excel_file = pd.ExcelFile(file)
+        sheet_names = excel_file.sheet_names
+        df = excel_file.parse(sheet_name if sheet_name is not None else sheet_names[0])
+        return df, sheet_names
+        
     def exist_multiple_sheets(self) -> Optional[pd.DataFrame]:
         """
         Check if the Excel file contains multiple sheets and handle sheet selection.
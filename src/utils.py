@@ -8,9 +8,11 @@ and token generation used throughout the application.
 import streamlit as st
 import time
 import secrets
-import streamlit_authenticator as stauth
+from src.lazy_imports import lazy_import
 from typing import List
 
+stauth = lazy_import("streamlit_authenticator")
+
 def animate_progress(progress_bar: st.delta_generator.DeltaGenerator, start: int, end: int, steps: int = 10, delay: float = 0.1) -> st.delta_generator.DeltaGenerator:
     """
     Animate a Streamlit progress bar from start to end percentage.
@@ -45,7 +47,8 @@ def generate_hashed_passwords(passwords: List[str]) -> List[str]:
     Generate hashed passwords for a list of plain text passwords.
     
     Uses the streamlit_authenticator library's Hasher to securely hash
-    passwords for storage in the authentication configuration.
+    passwords for storage in the authentication configuration. This is the
+    slow bcrypt step that `python -m src.hash_passwords` runs ahead of time.
     
     Args:
         passwords (List[str]): List of plain text passwords to hash.
@@ -57,7 +60,7 @@ def generate_hashed_passwords(passwords: List[str]) -> List[str]:
         >>> plain_passwords = ["password123", "secret456"]
         >>> hashed = generate_hashed_passwords(plain_passwords)
     """
-    return stauth.Hasher().generate(passwords)
+    return stauth.Hasher.hash_list(passwords)
 
 
 def create_token_hex() -> str:
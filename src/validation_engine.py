@@ -0,0 +1,452 @@
+"""
+Validation engine module for the Streamlit application.
+
+This module evaluates every row-level validation rule of a portfolio file in a
+single vectorised pass and records the outcome as one bitmask per row (bit i
+set = rule i failed), from which both the per-rule summary and the per-row
+violation report are derived without scanning the data again.
+
+Cross-column business rules are declared as data (Constants.BUSINESS_RULES)
+and compiled once into vectorised column expressions, so adding a rule adds
+one array operation per file rather than a Python loop over its rows.
+"""
+
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from constants import Constants
+
+
+RuleCheck = Callable[[pd.DataFrame], np.ndarray]
+
+# Bump when the meaning of a check changes without any rule in Constants changing
+ENGINE_VERSION = 1
+
+
+def rule_set_version() -> str:
+    """
+    Fingerprint the validation rules currently configured in Constants.
+
+    Any change to the expected columns, mandatory columns, duplicate key or
+    business rules (or to ENGINE_VERSION) gives a different fingerprint, which
+    invalidates every cached verdict computed under the old rules.
+
+    Returns:
+        str: The first 16 hex digits of a SHA-256 over the rule configuration.
+    """
+    rules = {
+        "engine": ENGINE_VERSION,
+        "columns": Constants.COLUMN_NAMES,
+        "mandatory": Constants.NON_NULLABLE_COLUMNS,
+        "duplicate_key": Constants.DUPLICATE_KEY_COLUMNS,
+        "business_rules": Constants.BUSINESS_RULES,
+    }
+    payload = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _numeric(portfolio: pd.DataFrame, col: str) -> pd.Series:
+    """
+    Return a column as numbers (or dates), with unparseable values as missing.
+
+    Args:
+        portfolio (pd.DataFrame): The portfolio DataFrame.
+        col (str): Column name.
+
+    Returns:
+        pd.Series: The column unchanged if it is numeric or datetime, otherwise
+                   coerced to numbers.
+    """
+    values = portfolio[col]
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _less_equal(rule: Dict[str, Any]) -> RuleCheck:
+    """
+    Compile a 'less_equal' rule: columns[0] <= columns[1].
+
+    Args:
+        rule (Dict[str, Any]): The rule declaration.
+
+    Returns:
+        RuleCheck: Function returning True for every failing row.
+    """
+    low, high = rule["columns"]
+
+    def check(portfolio: pd.DataFrame) -> np.ndarray:
+        left, right = _numeric(portfolio, low), _numeric(portfolio, high)
+        return (left.notna() & right.notna() & (left > right)).to_numpy()
+    return check
+
+
+def _sum_equals(rule: Dict[str, Any]) -> RuleCheck:
+    """
+    Compile a 'sum_equals' rule: sum(columns) == target within tolerance.
+
+    Missing addends count as zero; rows with a missing target are not checked.
+
+    Args:
+        rule (Dict[str, Any]): The rule declaration.
+
+    Returns:
+        RuleCheck: Function returning True for every failing row.
+    """
+    return _rate({**rule, "rate": 1.0})
+
+
+def _rate(rule: Dict[str, Any]) -> RuleCheck:
+    """
+    Compile a 'rate' rule: sum(columns) * rate == target within tolerance.
+
+    Missing base amounts count as zero; rows with a missing target are not checked.
+
+    Args:
+        rule (Dict[str, Any]): The rule declaration.
+
+    Returns:
+        RuleCheck: Function returning True for every failing row.
+    """
+    columns, target = rule["columns"], rule["target"]
+    rate, tolerance = float(rule["rate"]), float(rule.get("tolerance", 0.0))
+
+    def check(portfolio: pd.DataFrame) -> np.ndarray:
+        base = np.zeros(len(portfolio))
+        for col in columns:
+            base += _numeric(portfolio, col).fillna(0).to_numpy(dtype=float)
+        expected = _numeric(portfolio, target).to_numpy(dtype=float)
+        # NaN targets compare False and are therefore never reported
+        return np.abs(base * rate - expected) > tolerance + 1e-9
+    return check
+
+
+RULE_CHECKS: Dict[str, Callable[[Dict[str, Any]], RuleCheck]] = {
+    "less_equal": _less_equal,
+    "sum_equals": _sum_equals,
+    "rate": _rate,
+}
+
+
+def compile_rule(rule: Dict[str, Any]) -> RuleCheck:
+    """
+    Compile a declarative business rule into a vectorised check.
+
+    Args:
+        rule (Dict[str, Any]): A rule from Constants.BUSINESS_RULES.
+
+    Returns:
+        RuleCheck: Function taking the portfolio and returning a boolean array,
+                   True for every row that breaks the rule.
+
+    Raises:
+        ValueError: If the rule's check type is unknown.
+    """
+    if rule["check"] not in RULE_CHECKS:
+        raise ValueError(f"Unknown check '{rule['check']}' in business rule '{rule['name']}'")
+    return RULE_CHECKS[rule["check"]](rule)
+
+
+def rule_columns(rule: Dict[str, Any]) -> List[str]:
+    """
+    List every column a business rule reads.
+
+    Args:
+        rule (Dict[str, Any]): The rule declaration.
+
+    Returns:
+        List[str]: The rule's columns followed by its target, if any.
+    """
+    return list(rule["columns"]) + ([rule["target"]] if "target" in rule else [])
+
+
+def duplicate_key_groups(portfolio: pd.DataFrame, key_columns: List[str],
+                         skip: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+    """
+    Group rows sharing the same composite key, hashing the key once.
+
+    Every row's key columns are hashed into one uint64, the hashes are
+    factorised into group codes and the group sizes counted with a single
+    bincount, so the cost is linear in the number of rows whatever the
+    number of key columns.
+
+    Args:
+        portfolio (pd.DataFrame): The DataFrame to check.
+        key_columns (List[str]): Columns that together identify a row.
+        skip (Optional[np.ndarray], optional): Boolean array of rows to leave out
+            (e.g. empty rows). Defaults to None.
+
+    Returns:
+        Tuple[np.ndarray, int]: A tuple containing:
+            - Duplicate group code per row (0, 1, ... in order of first
+              appearance), -1 for rows whose key is unique or skipped
+            - Number of repeated rows (occurrences after the first of each group)
+    """
+    hashes = pd.util.hash_pandas_object(portfolio[key_columns], index=False).to_numpy()
+    codes, _ = pd.factorize(hashes)
+    if skip is not None:
+        codes[skip] = -1
+    kept = codes >= 0
+    sizes = np.bincount(codes[kept], minlength=codes.max() + 1 if kept.any() else 0)
+    repeated = sizes > 1
+    num_duplicates = int((sizes[repeated] - 1).sum())
+
+    groups = np.full(len(codes), -1, dtype=np.int64)
+    if num_duplicates:
+        # Renumber the repeated keys only, keeping their order of first appearance
+        renumber = np.cumsum(repeated) - 1
+        in_group = kept & repeated[np.where(kept, codes, 0)]
+        groups[in_group] = renumber[codes[in_group]]
+    return groups, num_duplicates
+
+
+class ValidationResult:
+    """
+    The outcome of a ValidationEngine run: one violation bitmask per row.
+
+    Attributes:
+        portfolio (pd.DataFrame): The validated DataFrame.
+        rule_names (List[str]): Rule name of every bit, bit i = rule_names[i].
+        mask (np.ndarray): uint64 bitmask per row of the portfolio.
+        num_duplicates (int): Number of repeated rows (occurrences after the first).
+        severities (Dict[str, str]): Severity ('error' or 'warning') of every rule.
+        duplicate_groups (np.ndarray): Duplicate group code per row, -1 if the row's key is unique.
+    """
+
+    def __init__(self, portfolio: pd.DataFrame, rule_names: List[str], mask: np.ndarray, num_duplicates: int,
+                 severities: Optional[Dict[str, str]] = None, duplicate_groups: Optional[np.ndarray] = None) -> None:
+        """
+        Initialize the ValidationResult.
+
+        Args:
+            portfolio (pd.DataFrame): The validated DataFrame.
+            rule_names (List[str]): Rule name of every bit.
+            mask (np.ndarray): uint64 bitmask per row.
+            num_duplicates (int): Number of repeated rows.
+            severities (Optional[Dict[str, str]], optional): Severity per rule name.
+                Rules not listed are errors. Defaults to None.
+            duplicate_groups (Optional[np.ndarray], optional): Duplicate group code
+                per row. Defaults to None (no duplicates).
+
+        Returns:
+            None
+        """
+        self.portfolio = portfolio
+        self.rule_names = rule_names
+        self.mask = mask
+        self.num_duplicates = num_duplicates
+        self.severities = severities or {}
+        self.duplicate_groups = duplicate_groups if duplicate_groups is not None else np.full(len(mask), -1, dtype=np.int64)
+
+    def select(self, rows: np.ndarray, portfolio: pd.DataFrame) -> "ValidationResult":
+        """
+        Restrict the result to a subset of rows, e.g. after empty rows are deleted.
+
+        Args:
+            rows (np.ndarray): Boolean array of the rows to keep.
+            portfolio (pd.DataFrame): The portfolio after the same rows were removed.
+
+        Returns:
+            ValidationResult: A result aligned with the new portfolio.
+        """
+        return ValidationResult(portfolio, self.rule_names, self.mask[rows], self.num_duplicates,
+                                self.severities, self.duplicate_groups[rows])
+
+    def bit(self, rule: str) -> np.uint64:
+        """
+        Return the bit of a rule.
+
+        Args:
+            rule (str): Rule name.
+
+        Returns:
+            np.uint64: The rule's bit value (1 << position).
+        """
+        return np.uint64(1) << np.uint64(self.rule_names.index(rule))
+
+    def rows_failing(self, rule: str) -> np.ndarray:
+        """
+        Return a boolean array of the rows that failed a rule.
+
+        Args:
+            rule (str): Rule name.
+
+        Returns:
+            np.ndarray: True for every row where the rule's bit is set.
+        """
+        return (self.mask & self.bit(rule)) != 0
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Count failing rows per rule.
+
+        Returns:
+            Dict[str, int]: Number of failing rows for every rule that failed at least once.
+        """
+        bits = np.arange(len(self.rule_names), dtype=np.uint64)
+        per_rule = ((self.mask[:, None] >> bits) & np.uint64(1)).sum(axis=0)
+        return {rule: int(count) for rule, count in zip(self.rule_names, per_rule) if count}
+
+    def failed_rules(self, prefix: str = "", severity: Optional[str] = None) -> List[str]:
+        """
+        List the rules that failed on at least one row, in rule order.
+
+        Args:
+            prefix (str, optional): Only return rules starting with this prefix,
+                e.g. "missing:" for the mandatory column rules. Defaults to "".
+            severity (Optional[str], optional): Only return rules of this severity
+                ('error' or 'warning'). Defaults to None (any severity).
+
+        Returns:
+            List[str]: Names of failed rules.
+        """
+        return [rule for rule in self.counts()
+                if rule.startswith(prefix) and severity in (None, self.severities.get(rule, "error"))]
+
+    def duplicates(self) -> Optional[pd.DataFrame]:
+        """
+        Return every row of a duplicate group, grouped together.
+
+        Returns:
+            Optional[pd.DataFrame]: The duplicate rows (originals included) with a
+                                    leading 'Duplicate Group' column, ordered by
+                                    group, or None if there are no duplicates.
+        """
+        positions = np.flatnonzero(self.duplicate_groups >= 0)
+        if positions.size == 0:
+            return None
+        positions = positions[np.argsort(self.duplicate_groups[positions], kind="stable")]
+        duplicates = self.portfolio.iloc[positions].copy()
+        duplicates.insert(0, "Duplicate Group", self.duplicate_groups[positions] + 1)
+        return duplicates
+
+    def report(self, id_columns: Optional[List[str]] = None, exclude: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Build the per-row violation report.
+
+        Args:
+            id_columns (Optional[List[str]], optional): Columns shown to identify each row.
+                Defaults to supply ID and invoice number.
+            exclude (Optional[List[str]], optional): Rules left out of the report
+                (e.g. "empty_row" once empty rows are deleted). Defaults to None.
+
+        Returns:
+            pd.DataFrame: One row per failing portfolio row with its Excel row number,
+                          identifying columns and the names of the failed rules.
+        """
+        id_columns = id_columns or ['ΑΡ.ΠΑΡΟΧΗΣ', 'ΑΡ.ΠΑΡΑΣΤΑΤΙΚΟΥ']
+        mask = self.mask
+        if exclude:
+            excluded = np.uint64(0)
+            for rule in exclude:
+                excluded |= self.bit(rule)
+            mask = mask & ~excluded
+        positions = np.flatnonzero(mask)
+
+        report = self.portfolio.iloc[positions][[c for c in id_columns if c in self.portfolio.columns]].copy()
+        # Header is row 1 of the sheet, so data row i is spreadsheet row i + 2. The
+        # index of a frame read with read_excel keeps the original row numbers
+        # even after empty rows have been deleted.
+        rows = report.index.to_numpy() if pd.api.types.is_integer_dtype(report.index) else positions
+        report.insert(0, "Excel Row", rows + 2)
+        # Decode each distinct mask once; rows usually share a handful of patterns
+        decoded = {m: ", ".join(rule for i, rule in enumerate(self.rule_names) if int(m) >> i & 1)
+                   for m in np.unique(mask[positions])}
+        report["Failed Rules"] = [decoded[m] for m in mask[positions]]
+        return report.reset_index(drop=True)
+
+
+class ValidationEngine:
+    """
+    A vectorised, single-pass validator for monthly portfolio files.
+
+    Every rule is assigned one bit of a uint64 mask. The null map of the
+    whole frame is computed once and shared by the empty-row and mandatory
+    column rules; the duplicate rule adds one hash-based pass over the
+    composite key, and every business rule one compiled column expression.
+
+    Attributes:
+        mandatory_columns (List[str]): Columns that must not contain nulls.
+        duplicate_key (List[str]): Columns whose combined values must be unique.
+        business_rules (List[Dict[str, Any]]): Declarative cross-column rules.
+        rule_names (List[str]): Rule name of every bit.
+        severities (Dict[str, str]): Severity of every business rule, by rule name.
+    """
+
+    def __init__(self, mandatory_columns: Optional[List[str]] = None, duplicate_key: Optional[Union[str, List[str]]] = None,
+                 business_rules: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Initialize the ValidationEngine and assign a bit to every rule.
+
+        Args:
+            mandatory_columns (Optional[List[str]], optional): Columns that must be filled.
+                Defaults to Constants.NON_NULLABLE_COLUMNS.
+            duplicate_key (Optional[Union[str, List[str]]], optional): Column or columns
+                checked for duplicates. Defaults to Constants.DUPLICATE_KEY_COLUMNS.
+            business_rules (Optional[List[Dict[str, Any]]], optional): Business rules to
+                compile. Defaults to Constants.BUSINESS_RULES.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If there are more rules than bits in the mask, or a
+                        business rule has an unknown check type.
+        """
+        self.mandatory_columns = list(mandatory_columns if mandatory_columns is not None else Constants.NON_NULLABLE_COLUMNS)
+        if duplicate_key is None:
+            duplicate_key = Constants.DUPLICATE_KEY_COLUMNS
+        self.duplicate_key = [duplicate_key] if isinstance(duplicate_key, str) else list(duplicate_key)
+        self.business_rules = list(business_rules if business_rules is not None else Constants.BUSINESS_RULES)
+        self._checks = [compile_rule(rule) for rule in self.business_rules]
+        self.rule_names = (["empty_row"]
+                           + [f"missing:{col}" for col in self.mandatory_columns]
+                           + [f"duplicate:{'+'.join(self.duplicate_key)}"]
+                           + [f"rule:{rule['name']}" for rule in self.business_rules])
+        self.severities = {f"rule:{rule['name']}": rule.get("severity", "error") for rule in self.business_rules}
+        if len(self.rule_names) > 64:
+            raise ValueError(f"{len(self.rule_names)} rules do not fit in a 64-bit violation mask")
+
+    def evaluate(self, portfolio: pd.DataFrame) -> ValidationResult:
+        """
+        Evaluate all rules on a portfolio in one pass.
+
+        Empty rows only get the empty_row bit, since they are deleted rather
+        than reported as missing values or duplicates. Mandatory columns and
+        business rules whose columns are absent from the file are skipped (the
+        column presence check reports them).
+
+        Args:
+            portfolio (pd.DataFrame): The portfolio DataFrame to validate.
+
+        Returns:
+            ValidationResult: The per-row violation bitmask and summary.
+        """
+        num_rows = len(portfolio)
+        mask = np.zeros(num_rows, dtype=np.uint64)
+        nulls = portfolio.isna().to_numpy()
+        empty = nulls.all(axis=1) if nulls.shape[1] else np.zeros(num_rows, dtype=bool)
+        mask |= empty.astype(np.uint64)
+
+        positions = {col: i for i, col in enumerate(portfolio.columns)}
+        present = [(bit, positions[col]) for bit, col in enumerate(self.mandatory_columns, start=1) if col in positions]
+        if present:
+            bits = np.array([bit for bit, _ in present], dtype=np.uint64)
+            mandatory_nulls = nulls[:, [pos for _, pos in present]] & ~empty[:, None]
+            mask |= np.bitwise_or.reduce(mandatory_nulls.astype(np.uint64) << bits, axis=1)
+
+        duplicate_bit = np.uint64(1 + len(self.mandatory_columns))
+        duplicate_groups, num_duplicates = None, 0
+        if all(col in positions for col in self.duplicate_key):
+            duplicate_groups, num_duplicates = duplicate_key_groups(portfolio, self.duplicate_key, skip=empty)
+            if num_duplicates:
+                mask |= (duplicate_groups >= 0).astype(np.uint64) << duplicate_bit
+
+        for bit, (rule, check) in enumerate(zip(self.business_rules, self._checks), start=int(duplicate_bit) + 1):
+            if all(col in positions for col in rule_columns(rule)):
+                mask |= (check(portfolio) & ~empty).astype(np.uint64) << np.uint64(bit)
+
+        return ValidationResult(portfolio, self.rule_names, mask, num_duplicates, self.severities, duplicate_groups)
@@ -0,0 +1,105 @@
+"""
+Validation scheduler module for the Streamlit application.
+
+This module runs independent validation stages concurrently in a thread pool.
+pandas and NumPy release the GIL in their heavy kernels (hashing, isna,
+comparisons), so stages overlap. Each stage's result is read back by name
+once the caller needs it.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from constants import Constants
+
+
+class ValidationScheduler:
+    """
+    A thread pool running named validation stages and collecting their results by name.
+
+    Stages start as soon as they are added. Stages must not modify shared
+    data (e.g. delete rows from the portfolio) and must not call Streamlit;
+    the caller renders the results once they are read back.
+
+    Attributes:
+        max_workers (int): Size of the thread pool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        """
+        Initialize the ValidationScheduler.
+
+        Args:
+            max_workers (Optional[int], optional): Number of threads. Defaults to
+                Constants.VALIDATION_WORKERS.
+
+        Returns:
+            None
+        """
+        self.max_workers = max_workers or Constants.VALIDATION_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="validation")
+        self._futures: Dict[str, Future] = {}
+
+    def __enter__(self) -> "ValidationScheduler":
+        """
+        Use the scheduler as a context manager that shuts the pool down on exit.
+
+        Returns:
+            ValidationScheduler: This scheduler.
+        """
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """
+        Shut the thread pool down when leaving the context.
+
+        Returns:
+            None
+        """
+        self.shutdown()
+
+    def add(self, name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Start a stage in the background.
+
+        Args:
+            name (str): Unique stage name, used to read its result.
+            func (Callable[..., Any]): The check to run.
+            *args (Any): Positional arguments for func.
+            **kwargs (Any): Keyword arguments for func.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If a stage with the same name was already added.
+        """
+        if name in self._futures:
+            raise ValueError(f"Validation stage '{name}' was already added")
+
+        self._futures[name] = self._executor.submit(func, *args, **kwargs)
+
+    def result(self, name: str) -> Any:
+        """
+        Wait for a stage and return its result.
+
+        Args:
+            name (str): Stage name.
+
+        Returns:
+            Any: The value returned by the stage.
+
+        Raises:
+            KeyError: If no stage has this name
+            Exception: Whatever the stage raised
+        """
+        return self._futures[name].result()
+
+    def shutdown(self) -> None:
+        """
+        Stop the thread pool once the running stages have finished.
+
+        Returns:
+            None
+        """
+        self._executor.shutdown(wait=True)